@@ -0,0 +1,88 @@
+"""simulation run ids and history indexes
+
+Adds ``user_simulations.run_id`` and the indexes behind run lookups, keyset
+history pages and the risk assessment cache, and drops the superseded
+``(user_id, started_at)`` history index.
+
+Tables missing here are created complete by ``create_tables()`` on startup,
+so every step is skipped when its table or index already matches. On
+Postgres the indexes are built ``CONCURRENTLY``, outside the migration
+transaction, so writes to these tables keep flowing while they build.
+
+Revision ID: 7d2e4c1a9b3f
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2e4c1a9b3f'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (name, columns, unique, dialect options)
+INDEXES = {
+    "user_simulations": [
+        ("ix_user_simulations_run_id", ["run_id"], True, {}),
+        ("ix_user_simulations_user_id_completed_at_id", ["user_id", "completed_at", "id"], False, {}),
+    ],
+    "user_quiz_attempts": [
+        (
+            "ix_user_quiz_attempts_user_id_quiz_id_completed_at_id",
+            ["user_id", "quiz_id", "completed_at", "id"],
+            False,
+            {"postgresql_include": ["score", "passed", "time_taken"]},
+        ),
+    ],
+    "risk_assessments": [
+        ("ix_risk_assessments_type_target_expires_at", ["type", "target", "expires_at"], False, {}),
+    ],
+}
+
+RETIRED_INDEXES = {
+    "user_simulations": ["ix_user_simulations_user_id_started_at"],
+}
+
+
+def upgrade() -> None:
+    # Offline (--sql) output assumes a database from before this revision
+    if context.is_offline_mode():
+        tables, has_run_id = set(INDEXES), False
+    else:
+        inspector = sa.inspect(op.get_bind())
+        tables = set(inspector.get_table_names())
+        has_run_id = "user_simulations" in tables and "run_id" in {
+            column["name"] for column in inspector.get_columns("user_simulations")
+        }
+
+    if "user_simulations" in tables and not has_run_id:
+        op.add_column("user_simulations", sa.Column("run_id", sa.String(length=100), nullable=True))
+
+    with op.get_context().autocommit_block():
+        for table, indexes in INDEXES.items():
+            if table not in tables:
+                continue
+            for name, columns, unique, options in indexes:
+                op.create_index(
+                    name, table, columns, unique=unique, if_not_exists=True,
+                    postgresql_concurrently=True, **options
+                )
+        for table, names in RETIRED_INDEXES.items():
+            if table not in tables:
+                continue
+            for name in names:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, indexes in INDEXES.items():
+            for name, _, _, _ in indexes:
+                op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    op.drop_column("user_simulations", "run_id")
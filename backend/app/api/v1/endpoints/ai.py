@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+import json
 import structlog
 
 from app.services.ai_service import AIService
-from app.core.deps import get_current_user
+from app.core.cancellation import run_until_disconnect
+from app.core.deps import get_current_user, get_ai_service
 from app.models.user import User
 
 logger = structlog.get_logger()
@@ -50,24 +53,47 @@ class ChatResponse(BaseModel):
     suggestions: Optional[List[str]] = None
     related_topics: Optional[List[str]] = None
 
+# Server-sent events helpers
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"  # stop nginx from buffering the stream
+}
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a single server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def _sse_stream(
+    events: AsyncIterator[Tuple[str, Dict[str, Any]]],
+    done_extra: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """Encode service events as SSE, merging ``done_extra`` into the trailing event"""
+    async for event, data in events:
+        if event == "done" and done_extra:
+            data = {**done_extra, **data}
+        yield _sse_event(event, data)
+
 @router.post("/explain-concept", response_model=ExplainConceptResponse)
 async def explain_concept(
     request: ExplainConceptRequest,
-    current_user: User = Depends(get_current_user)
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Explain a DeFi concept in simple terms using AI
     """
     try:
-        ai_service = AIService()
-        
         # Adjust explanation based on user's experience level
         user_level = current_user.experience_level if current_user else request.user_level
         
-        explanation = await ai_service.explain_concept(
-            concept=request.concept,
-            user_level=user_level,
-            include_example=request.include_example
+        explanation = await run_until_disconnect(
+            http_request,
+            ai_service.explain_concept(
+                concept=request.concept,
+                user_level=user_level,
+                include_example=request.include_example
+            )
         )
         
         return ExplainConceptResponse(
@@ -77,6 +103,8 @@ async def explain_concept(
             next_steps=explanation.get("next_steps", [])
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to explain concept", concept=request.concept, error=str(e))
         raise HTTPException(
@@ -84,17 +112,43 @@ async def explain_concept(
             detail="Failed to generate explanation"
         )
 
+@router.post("/explain-concept/stream")
+async def stream_explain_concept(
+    request: ExplainConceptRequest,
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """
+    Stream a DeFi concept explanation as server-sent events.
+
+    Emits ``token`` events with text deltas and a trailing ``done`` event
+    with ``difficulty``, ``examples`` and ``next_steps``.
+    """
+    user_level = current_user.experience_level if current_user else request.user_level
+    
+    events = ai_service.stream_explain_concept(
+        concept=request.concept,
+        user_level=user_level,
+        include_example=request.include_example
+    )
+    
+    return StreamingResponse(
+        _sse_stream(events, done_extra={"difficulty": user_level}),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.post("/generate-quiz", response_model=GenerateQuizResponse)
 async def generate_quiz(
     request: GenerateQuizRequest,
-    current_user: User = Depends(get_current_user)
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Generate an interactive quiz on a DeFi topic using AI
     """
     try:
-        ai_service = AIService()
-        
         # Adjust difficulty based on user's level
         difficulty = request.difficulty
         if current_user:
@@ -103,10 +157,13 @@ async def generate_quiz(
             elif current_user.experience_level == "intermediate":
                 difficulty = "medium"
         
-        quiz_data = await ai_service.generate_quiz(
-            topic=request.topic,
-            difficulty=difficulty,
-            question_count=request.question_count
+        quiz_data = await run_until_disconnect(
+            http_request,
+            ai_service.generate_quiz(
+                topic=request.topic,
+                difficulty=difficulty,
+                question_count=request.question_count
+            )
         )
         
         questions = [
@@ -127,6 +184,8 @@ async def generate_quiz(
             total_questions=len(questions)
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to generate quiz", topic=request.topic, error=str(e))
         raise HTTPException(
@@ -137,14 +196,14 @@ async def generate_quiz(
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user)
+    http_request: Request,
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Chat with AI assistant about DeFi topics
     """
     try:
-        ai_service = AIService()
-        
         # Build context from user's learning history
         context = request.context or ""
         if current_user:
@@ -152,9 +211,12 @@ async def chat_with_ai(
             context += f"\nProgress: {current_user.overall_progress_percentage}%"
             context += f"\nLessons completed: {current_user.total_lessons_completed}"
         
-        response = await ai_service.chat(
-            message=request.message,
-            context=context
+        response = await run_until_disconnect(
+            http_request,
+            ai_service.chat(
+                message=request.message,
+                context=context
+            )
         )
         
         return ChatResponse(
@@ -163,6 +225,8 @@ async def chat_with_ai(
             related_topics=response.get("related_topics", [])
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error("Failed to process chat", message=request.message, error=str(e))
         raise HTTPException(
@@ -170,16 +234,44 @@ async def chat_with_ai(
             detail="Failed to process chat message"
         )
 
+@router.post("/chat/stream")
+async def stream_chat_with_ai(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """
+    Stream a chat reply as server-sent events.
+
+    Emits ``token`` events with text deltas and a trailing ``done`` event
+    with ``suggestions`` and ``related_topics``.
+    """
+    context = request.context or ""
+    if current_user:
+        context += f"\nUser level: {current_user.experience_level}"
+        context += f"\nProgress: {current_user.overall_progress_percentage}%"
+        context += f"\nLessons completed: {current_user.total_lessons_completed}"
+    
+    events = ai_service.stream_chat(
+        message=request.message,
+        context=context
+    )
+    
+    return StreamingResponse(
+        _sse_stream(events),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @router.get("/learning-path")
 async def get_personalized_learning_path(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Get AI-generated personalized learning path for the user
     """
     try:
-        ai_service = AIService()
-        
         learning_path = await ai_service.generate_learning_path(
             user_level=current_user.experience_level,
             completed_lessons=current_user.total_lessons_completed,
@@ -203,17 +295,29 @@ async def get_personalized_learning_path(
             detail="Failed to generate learning path"
         )
 
+@router.get("/usage")
+async def get_ai_usage(
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
+):
+    """
+    Cache hit rates and upstream LLM spend for this worker
+    """
+    return {
+        "caches": ai_service.cache_stats(),
+        "llm": ai_service.usage_stats()
+    }
+
 @router.post("/analyze-transaction")
 async def analyze_transaction(
     transaction_data: dict,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    ai_service: AIService = Depends(get_ai_service)
 ):
     """
     Analyze a transaction and provide AI insights
     """
     try:
-        ai_service = AIService()
-        
         analysis = await ai_service.analyze_transaction(
             transaction_data=transaction_data,
             user_level=current_user.experience_level
@@ -1,15 +1,17 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from jose import jwt
 import structlog
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.user import User
 from app.core.deps import get_current_user
+from app.services.user_cache import invalidate_cached_user
 
 logger = structlog.get_logger()
 security = HTTPBearer()
@@ -53,7 +55,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 @router.post("/login", response_model=AuthResponse)
 async def login_with_wallet(
     auth_request: WalletAuthRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Authenticate user with wallet signature
@@ -64,7 +66,9 @@ async def login_with_wallet(
         wallet_address = auth_request.wallet_address.lower()
         
         # Get or create user
-        user = db.query(User).filter(User.wallet_address == wallet_address).first()
+        user = (await db.execute(
+            select(User).where(User.wallet_address == wallet_address)
+        )).scalar_one_or_none()
         
         if not user:
             # Create new user
@@ -74,13 +78,14 @@ async def login_with_wallet(
                 is_active=True
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
             logger.info("New user created", wallet_address=wallet_address)
         
         # Update last login
         user.last_login = datetime.utcnow()
-        db.commit()
+        await db.commit()
+        await invalidate_cached_user(user.wallet_address)
         
         # Create access token
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
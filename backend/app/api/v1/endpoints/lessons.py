@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import List, Optional
 import structlog
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.database import get_async_db
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.services.user_cache import invalidate_cached_user
 from app.models.user import User
 
 logger = structlog.get_logger()
@@ -88,7 +89,7 @@ class LessonProgressRequest(BaseModel):
 @router.get("/", response_model=List[LessonResponse])
 async def get_lessons(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all lessons with user progress"""
     try:
@@ -155,8 +156,8 @@ async def get_lesson_detail(
 async def complete_lesson(
     lesson_id: str,
     progress_data: LessonProgressRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Mark lesson as completed"""
     try:
@@ -169,7 +170,8 @@ async def complete_lesson(
         
         # Update user progress
         current_user.update_progress(lesson_completed=True)
-        db.commit()
+        await db.commit()
+        await invalidate_cached_user(current_user.wallet_address)
         
         logger.info(
             "Lesson completed",
@@ -1,18 +1,115 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 import structlog
 from datetime import datetime
 
+from app.core.catalog import catalog
 from app.core.database import get_db
 from app.core.deps import get_current_user
 from app.models.user import User
+from app.services.protocol_index import SORT_KEYS, ProtocolIndex
+from app.services.protocol_metrics import TIMEFRAMES, protocol_metrics_store
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
+# Mock protocol data - in production, this would come from database/APIs
+PROTOCOLS = [
+    {
+        "name": "uniswap",
+        "display_name": "Uniswap V3",
+        "description": "Leading decentralized exchange with concentrated liquidity",
+        "category": "dex",
+        "tvl": "$4.2B",
+        "apy_range": "5-25%",
+        "risk_level": "low",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum", "polygon", "arbitrum"],
+        "features": ["token_swaps", "liquidity_provision", "yield_farming"],
+        "logo_url": "https://uniswap.org/logo.png",
+        "website": "https://uniswap.org",
+        "documentation": "https://docs.uniswap.org"
+    },
+    {
+        "name": "aave",
+        "display_name": "Aave V3",
+        "description": "Decentralized lending and borrowing protocol",
+        "category": "lending",
+        "tvl": "$6.8B",
+        "apy_range": "2-8%",
+        "risk_level": "low",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum", "polygon", "avalanche"],
+        "features": ["lending", "borrowing", "flash_loans"],
+        "logo_url": "https://aave.com/logo.png",
+        "website": "https://aave.com",
+        "documentation": "https://docs.aave.com"
+    },
+    {
+        "name": "compound",
+        "display_name": "Compound V3",
+        "description": "Algorithmic money market protocol",
+        "category": "lending",
+        "tvl": "$2.1B",
+        "apy_range": "1-6%",
+        "risk_level": "medium",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum", "polygon"],
+        "features": ["lending", "borrowing", "governance"],
+        "logo_url": "https://compound.finance/logo.png",
+        "website": "https://compound.finance",
+        "documentation": "https://docs.compound.finance"
+    },
+    {
+        "name": "curve",
+        "display_name": "Curve Finance",
+        "description": "Decentralized exchange for stablecoins and similar assets",
+        "category": "dex",
+        "tvl": "$3.5B",
+        "apy_range": "3-15%",
+        "risk_level": "medium",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum", "polygon", "arbitrum"],
+        "features": ["stable_swaps", "liquidity_provision", "yield_farming"],
+        "logo_url": "https://curve.fi/logo.png",
+        "website": "https://curve.fi",
+        "documentation": "https://docs.curve.fi"
+    },
+    {
+        "name": "lido",
+        "display_name": "Lido",
+        "description": "Liquid staking protocol for Ethereum 2.0",
+        "category": "staking",
+        "tvl": "$14.1B",
+        "apy_range": "4-6%",
+        "risk_level": "low",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum"],
+        "features": ["liquid_staking", "steth_tokens"],
+        "logo_url": "https://lido.fi/logo.png",
+        "website": "https://lido.fi",
+        "documentation": "https://docs.lido.fi"
+    },
+    {
+        "name": "makerdao",
+        "display_name": "MakerDAO",
+        "description": "Decentralized credit platform and DAI stablecoin issuer",
+        "category": "stablecoin",
+        "tvl": "$5.2B",
+        "apy_range": "1-4%",
+        "risk_level": "low",
+        "audit_status": "audited",
+        "supported_networks": ["ethereum"],
+        "features": ["dai_minting", "collateral_vaults", "governance"],
+        "logo_url": "https://makerdao.com/logo.png",
+        "website": "https://makerdao.com",
+        "documentation": "https://docs.makerdao.com"
+    }
+]
+
 # Response models
 class ProtocolInfo(BaseModel):
     name: str
@@ -35,127 +132,72 @@ class ProtocolMetrics(BaseModel):
     utilization_rate: str
     last_updated: datetime
 
+# Facet, sort and page lookups over PROTOCOLS
+protocol_index = ProtocolIndex(PROTOCOLS)
+
+MAX_PAGE_SIZE = 100
+
+def _protocol_listing(
+    filters: Dict[str, Optional[str]],
+    sort_by: Optional[str] = None,
+    descending: bool = True,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> Dict[str, Any]:
+    total, page = protocol_index.search(filters, sort_by, descending, offset, limit)
+    return {
+        "protocols": page,
+        "total_count": total,
+        "offset": offset,
+        "limit": limit,
+        "categories": protocol_index.facet_values["category"],
+        "networks": protocol_index.facet_values["network"],
+        "risk_levels": protocol_index.facet_values["risk_level"],
+        "facets": protocol_index.facets(filters)
+    }
+
+@catalog.register("protocols:list")
+def _all_protocols_payload() -> Dict[str, Any]:
+    return _protocol_listing({})
+
 @router.get("/")
 async def get_protocols(
+    request: Request,
     category: Optional[str] = None,
     network: Optional[str] = None,
-    risk_level: Optional[str] = None
+    risk_level: Optional[str] = None,
+    sort_by: Optional[str] = None,  # tvl, apy
+    order: str = "desc",
+    limit: Optional[int] = None,
+    offset: int = 0
 ):
-    """Get list of supported DeFi protocols with filtering"""
-    
-    # Mock protocol data - in production, this would come from database/APIs
-    protocols = [
-        {
-            "name": "uniswap",
-            "display_name": "Uniswap V3",
-            "description": "Leading decentralized exchange with concentrated liquidity",
-            "category": "dex",
-            "tvl": "$4.2B",
-            "apy_range": "5-25%",
-            "risk_level": "low",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum", "polygon", "arbitrum"],
-            "features": ["token_swaps", "liquidity_provision", "yield_farming"],
-            "logo_url": "https://uniswap.org/logo.png",
-            "website": "https://uniswap.org",
-            "documentation": "https://docs.uniswap.org"
-        },
-        {
-            "name": "aave",
-            "display_name": "Aave V3",
-            "description": "Decentralized lending and borrowing protocol",
-            "category": "lending",
-            "tvl": "$6.8B",
-            "apy_range": "2-8%",
-            "risk_level": "low",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum", "polygon", "avalanche"],
-            "features": ["lending", "borrowing", "flash_loans"],
-            "logo_url": "https://aave.com/logo.png",
-            "website": "https://aave.com",
-            "documentation": "https://docs.aave.com"
-        },
-        {
-            "name": "compound",
-            "display_name": "Compound V3",
-            "description": "Algorithmic money market protocol",
-            "category": "lending",
-            "tvl": "$2.1B",
-            "apy_range": "1-6%",
-            "risk_level": "medium",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum", "polygon"],
-            "features": ["lending", "borrowing", "governance"],
-            "logo_url": "https://compound.finance/logo.png",
-            "website": "https://compound.finance",
-            "documentation": "https://docs.compound.finance"
-        },
-        {
-            "name": "curve",
-            "display_name": "Curve Finance",
-            "description": "Decentralized exchange for stablecoins and similar assets",
-            "category": "dex",
-            "tvl": "$3.5B",
-            "apy_range": "3-15%",
-            "risk_level": "medium",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum", "polygon", "arbitrum"],
-            "features": ["stable_swaps", "liquidity_provision", "yield_farming"],
-            "logo_url": "https://curve.fi/logo.png",
-            "website": "https://curve.fi",
-            "documentation": "https://docs.curve.fi"
-        },
-        {
-            "name": "lido",
-            "display_name": "Lido",
-            "description": "Liquid staking protocol for Ethereum 2.0",
-            "category": "staking",
-            "tvl": "$14.1B",
-            "apy_range": "4-6%",
-            "risk_level": "low",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum"],
-            "features": ["liquid_staking", "steth_tokens"],
-            "logo_url": "https://lido.fi/logo.png",
-            "website": "https://lido.fi",
-            "documentation": "https://docs.lido.fi"
-        },
-        {
-            "name": "makerdao",
-            "display_name": "MakerDAO",
-            "description": "Decentralized credit platform and DAI stablecoin issuer",
-            "category": "stablecoin",
-            "tvl": "$5.2B",
-            "apy_range": "1-4%",
-            "risk_level": "low",
-            "audit_status": "audited",
-            "supported_networks": ["ethereum"],
-            "features": ["dai_minting", "collateral_vaults", "governance"],
-            "logo_url": "https://makerdao.com/logo.png",
-            "website": "https://makerdao.com",
-            "documentation": "https://docs.makerdao.com"
-        }
-    ]
-    
-    # Apply filters
-    filtered_protocols = protocols
-    
-    if category:
-        filtered_protocols = [p for p in filtered_protocols if p["category"] == category]
-    
-    if network:
-        filtered_protocols = [p for p in filtered_protocols if network in p["supported_networks"]]
+    """Get list of supported DeFi protocols with filtering, sorting and pagination"""
+    if sort_by is not None and sort_by not in SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort_by must be one of: {', '.join(SORT_KEYS)}"
+        )
+    if order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="order must be asc or desc"
+        )
+    if offset < 0 or (limit is not None and not 1 <= limit <= MAX_PAGE_SIZE):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_PAGE_SIZE} and offset non-negative"
+        )
     
-    if risk_level:
-        filtered_protocols = [p for p in filtered_protocols if p["risk_level"] == risk_level]
+    filters = {"category": category, "network": network, "risk_level": risk_level}
+    query = (category, network, risk_level, sort_by, order, offset, limit)
+    if query == (None, None, None, None, "desc", 0, None):
+        return catalog.respond("protocols:list", request)
     
-    return {
-        "protocols": filtered_protocols,
-        "total_count": len(filtered_protocols),
-        "categories": list(set(p["category"] for p in protocols)),
-        "networks": list(set(network for p in protocols for network in p["supported_networks"])),
-        "risk_levels": list(set(p["risk_level"] for p in protocols))
-    }
+    return catalog.respond(
+        ("protocols:list", protocol_index.version, *query),
+        request,
+        build=lambda: _protocol_listing(filters, sort_by, order == "desc", offset, limit)
+    )
 
 @router.get("/{protocol_name}")
 async def get_protocol_details(
@@ -333,6 +375,50 @@ async def get_protocol_details(
     
     return protocol_data
 
+# Shown until the ingester has recorded live metrics for a protocol
+STATIC_METRICS = {
+    "uniswap": {
+        "current": {
+            "tvl": "$4.2B",
+            "volume_24h": "$1.2B",
+            "fees_24h": "$3.6M",
+            "users_24h": 45000,
+            "transactions_24h": 125000,
+            "average_apy": "15.2%"
+        },
+        "historical": {
+            "tvl_7d": ["$4.0B", "$4.1B", "$4.0B", "$4.2B", "$4.1B", "$4.3B", "$4.2B"],
+            "volume_7d": ["$1.1B", "$1.3B", "$1.0B", "$1.2B", "$1.4B", "$1.1B", "$1.2B"],
+            "fees_7d": ["$3.3M", "$3.9M", "$3.0M", "$3.6M", "$4.2M", "$3.3M", "$3.6M"]
+        },
+        "top_pools": [
+            {"pair": "ETH/USDC", "tvl": "$450M", "volume_24h": "$180M", "apy": "12.5%"},
+            {"pair": "USDC/USDT", "tvl": "$320M", "volume_24h": "$95M", "apy": "8.2%"},
+            {"pair": "ETH/WBTC", "tvl": "$280M", "volume_24h": "$75M", "apy": "18.7%"}
+        ]
+    },
+    "aave": {
+        "current": {
+            "tvl": "$6.8B",
+            "volume_24h": "$450M",
+            "fees_24h": "$1.2M",
+            "users_24h": 12000,
+            "transactions_24h": 35000,
+            "average_apy": "3.5%"
+        },
+        "historical": {
+            "tvl_7d": ["$6.5B", "$6.7B", "$6.6B", "$6.8B", "$6.9B", "$6.7B", "$6.8B"],
+            "volume_7d": ["$420M", "$480M", "$390M", "$450M", "$510M", "$430M", "$450M"],
+            "fees_7d": ["$1.1M", "$1.3M", "$1.0M", "$1.2M", "$1.4M", "$1.1M", "$1.2M"]
+        },
+        "top_markets": [
+            {"asset": "USDC", "supply_apy": "3.2%", "borrow_apy": "4.8%", "utilization": "68%"},
+            {"asset": "ETH", "supply_apy": "2.1%", "borrow_apy": "3.5%", "utilization": "45%"},
+            {"asset": "WBTC", "supply_apy": "1.8%", "borrow_apy": "3.2%", "utilization": "52%"}
+        ]
+    }
+}
+
 @router.get("/{protocol_name}/metrics")
 async def get_protocol_metrics(
     protocol_name: str,
@@ -340,51 +426,24 @@ async def get_protocol_metrics(
 ):
     """Get real-time metrics for a specific protocol"""
     
-    # Mock metrics data - in production, this would fetch from DeFi APIs
-    metrics_data = {
-        "uniswap": {
-            "current": {
-                "tvl": "$4.2B",
-                "volume_24h": "$1.2B",
-                "fees_24h": "$3.6M",
-                "users_24h": 45000,
-                "transactions_24h": 125000,
-                "average_apy": "15.2%"
-            },
-            "historical": {
-                "tvl_7d": ["$4.0B", "$4.1B", "$4.0B", "$4.2B", "$4.1B", "$4.3B", "$4.2B"],
-                "volume_7d": ["$1.1B", "$1.3B", "$1.0B", "$1.2B", "$1.4B", "$1.1B", "$1.2B"],
-                "fees_7d": ["$3.3M", "$3.9M", "$3.0M", "$3.6M", "$4.2M", "$3.3M", "$3.6M"]
-            },
-            "top_pools": [
-                {"pair": "ETH/USDC", "tvl": "$450M", "volume_24h": "$180M", "apy": "12.5%"},
-                {"pair": "USDC/USDT", "tvl": "$320M", "volume_24h": "$95M", "apy": "8.2%"},
-                {"pair": "ETH/WBTC", "tvl": "$280M", "volume_24h": "$75M", "apy": "18.7%"}
-            ]
-        },
-        "aave": {
-            "current": {
-                "tvl": "$6.8B",
-                "volume_24h": "$450M",
-                "fees_24h": "$1.2M",
-                "users_24h": 12000,
-                "transactions_24h": 35000,
-                "average_apy": "3.5%"
-            },
-            "historical": {
-                "tvl_7d": ["$6.5B", "$6.7B", "$6.6B", "$6.8B", "$6.9B", "$6.7B", "$6.8B"],
-                "volume_7d": ["$420M", "$480M", "$390M", "$450M", "$510M", "$430M", "$450M"],
-                "fees_7d": ["$1.1M", "$1.3M", "$1.0M", "$1.2M", "$1.4M", "$1.1M", "$1.2M"]
-            },
-            "top_markets": [
-                {"asset": "USDC", "supply_apy": "3.2%", "borrow_apy": "4.8%", "utilization": "68%"},
-                {"asset": "ETH", "supply_apy": "2.1%", "borrow_apy": "3.5%", "utilization": "45%"},
-                {"asset": "WBTC", "supply_apy": "1.8%", "borrow_apy": "3.2%", "utilization": "52%"}
-            ]
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid timeframe; use one of {', '.join(TIMEFRAMES)}"
+        )
+    
+    # Served from the in-process store the ingester fills; never waits on DefiLlama
+    snapshot = protocol_metrics_store.snapshot(protocol_name.lower(), TIMEFRAMES[timeframe])
+    if snapshot is not None:
+        return {
+            "protocol": protocol_name,
+            "timeframe": timeframe,
+            "metrics": {"current": snapshot["current"], "history": snapshot["history"]},
+            "source": "defillama",
+            "last_updated": datetime.utcfromtimestamp(snapshot["last_updated"]).isoformat()
         }
-    }
     
-    protocol_metrics = metrics_data.get(protocol_name.lower())
+    protocol_metrics = STATIC_METRICS.get(protocol_name.lower())
     if not protocol_metrics:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -395,6 +454,7 @@ async def get_protocol_metrics(
         "protocol": protocol_name,
         "timeframe": timeframe,
         "metrics": protocol_metrics,
+        "source": "static",
         "last_updated": datetime.utcnow().isoformat()
     }
 
@@ -479,10 +539,8 @@ async def get_protocol_tutorials(
         }
     }
 
-@router.get("/categories/overview")
-async def get_protocol_categories():
-    """Get overview of all protocol categories"""
-    
+@catalog.register("protocols:categories")
+def _protocol_categories_payload() -> Dict[str, Any]:
     categories = {
         "dex": {
             "name": "Decentralized Exchanges",
@@ -528,3 +586,8 @@ async def get_protocol_categories():
         "most_popular": "lending",
         "fastest_growing": "staking"
     }
+
+@router.get("/categories/overview")
+async def get_protocol_categories(request: Request):
+    """Get overview of all protocol categories"""
+    return catalog.respond("protocols:categories", request)
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, List, Optional
 import structlog
+from datetime import datetime
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.catalog import PRIVATE_CACHE_CONTROL, catalog
+from app.core.database import get_async_db
+from app.core.pagination import fetch_keyset_page
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.services.user_cache import invalidate_cached_user
+from app.models.quiz import Quiz, UserQuizAttempt
 from app.models.user import User
 
 logger = structlog.get_logger()
@@ -16,6 +23,7 @@ router = APIRouter()
 class QuizAttemptRequest(BaseModel):
     quiz_id: str
     answers: List[int]  # List of selected answer indices
+    time_taken: Optional[int] = None  # seconds, as measured by the client
 
 class QuizResultResponse(BaseModel):
     quiz_id: str
@@ -26,9 +34,8 @@ class QuizResultResponse(BaseModel):
     time_taken: Optional[int] = None
     feedback: List[dict]
 
-@router.get("/")
-async def get_available_quizzes(current_user: User = Depends(get_current_user)):
-    """Get all available quizzes for the user"""
+@catalog.register("quizzes:catalog", PRIVATE_CACHE_CONTROL)
+def _quiz_catalog_payload() -> List[Dict[str, Any]]:
     # Mock quiz data
     quizzes = [
         {
@@ -65,6 +72,11 @@ async def get_available_quizzes(current_user: User = Depends(get_current_user)):
     
     return quizzes
 
+@router.get("/")
+async def get_available_quizzes(request: Request, current_user: User = Depends(get_current_user)):
+    """Get all available quizzes for the user"""
+    return catalog.respond("quizzes:catalog", request)
+
 @router.get("/{quiz_id}")
 async def get_quiz(
     quiz_id: str,
@@ -195,8 +207,8 @@ async def get_quiz(
 async def submit_quiz(
     quiz_id: str,
     attempt: QuizAttemptRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit quiz answers and get results"""
     try:
@@ -219,6 +231,12 @@ async def submit_quiz(
                 detail="Invalid number of answers"
             )
         
+        if attempt.time_taken is not None and attempt.time_taken < 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="time_taken must not be negative"
+            )
+        
         # Calculate score
         correct_count = sum(1 for i, answer in enumerate(attempt.answers) 
                           if answer == correct_answers[i])
@@ -250,10 +268,23 @@ async def submit_quiz(
                 "explanation": _get_explanation(quiz_id, i + 1, is_correct)
             })
         
+        db.add(UserQuizAttempt(
+            user_id=current_user.id,
+            quiz_id=await _quiz_pk(db, quiz_id, passing_score),
+            answers=attempt.answers,
+            score=score,
+            passed=passed,
+            time_taken=attempt.time_taken,
+            completed_at=datetime.utcnow()
+        ))
+        
         # Update user progress if passed
         if passed:
             current_user.update_progress(quiz_passed=True)
-            db.commit()
+        await db.commit()
+        
+        if passed:
+            await invalidate_cached_user(current_user.wallet_address)
             
             logger.info(
                 "Quiz completed successfully",
@@ -268,6 +299,7 @@ async def submit_quiz(
             passed=passed,
             correct_answers=correct_count,
             total_questions=total_questions,
+            time_taken=attempt.time_taken,
             feedback=feedback
         )
         
@@ -288,34 +320,81 @@ async def submit_quiz(
 @router.get("/{quiz_id}/results")
 async def get_quiz_results(
     quiz_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = 10,
+    cursor: Optional[str] = None
 ):
-    """Get user's previous quiz results"""
-    # Mock results data - in production, this would come from database
-    mock_results = [
-        {
-            "attempt_id": 1,
-            "quiz_id": quiz_id,
-            "score": 85,
-            "passed": True,
-            "completed_at": "2024-01-15T10:30:00Z",
-            "time_taken": 240
-        },
-        {
-            "attempt_id": 2,
+    """Get user's previous quiz results, newest first; pass ``next_cursor`` back for the next page"""
+    try:
+        own_attempts = (
+            UserQuizAttempt.user_id == current_user.id,
+            UserQuizAttempt.quiz_id == select(Quiz.id).where(Quiz.quiz_id == quiz_id).scalar_subquery()
+        )
+        query = select(
+            UserQuizAttempt.id,
+            UserQuizAttempt.score,
+            UserQuizAttempt.passed,
+            UserQuizAttempt.time_taken,
+            UserQuizAttempt.completed_at
+        ).where(*own_attempts)
+        page = await fetch_keyset_page(db, query, UserQuizAttempt, f"quizzes:{quiz_id}", limit, cursor)
+        
+        best_score, total_attempts = (await db.execute(
+            select(func.max(UserQuizAttempt.score), func.count()).where(*own_attempts)
+        )).one()
+        
+        return {
             "quiz_id": quiz_id,
-            "score": 92,
-            "passed": True,
-            "completed_at": "2024-01-20T14:15:00Z",
-            "time_taken": 180
+            "attempts": [_attempt_item(quiz_id, row) for row in page.rows],
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor,
+            "best_score": best_score or 0,
+            "total_attempts": total_attempts
         }
-    ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to get quiz results", user_id=current_user.id, quiz_id=quiz_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get quiz results"
+        )
+
+async def _quiz_pk(db: AsyncSession, quiz_id: str, passing_score: int) -> int:
+    """The ``quizzes`` row id for a quiz slug, created from the catalog on first submit"""
+    query = select(Quiz.id).where(Quiz.quiz_id == quiz_id)
+    quiz_pk = (await db.execute(query)).scalar_one_or_none()
+    if quiz_pk is not None:
+        return quiz_pk
     
+    listing = next((quiz for quiz in _quiz_catalog_payload() if quiz["id"] == quiz_id), {})
+    try:
+        async with db.begin_nested():
+            quiz = Quiz(
+                quiz_id=quiz_id,
+                title=listing.get("title", quiz_id),
+                description=listing.get("description"),
+                difficulty=listing.get("difficulty", "beginner"),
+                category=listing.get("category"),
+                time_limit=listing.get("time_limit", 300),
+                passing_score=passing_score
+            )
+            db.add(quiz)
+        return quiz.id
+    except IntegrityError:
+        # Another request created it first
+        return (await db.execute(query)).scalar_one()
+
+def _attempt_item(quiz_id: str, row: Any) -> Dict[str, Any]:
     return {
+        "attempt_id": row.id,
         "quiz_id": quiz_id,
-        "attempts": mock_results,
-        "best_score": max(result["score"] for result in mock_results) if mock_results else 0,
-        "total_attempts": len(mock_results)
+        "score": row.score,
+        "passed": row.passed,
+        "completed_at": row.completed_at.isoformat(),
+        "time_taken": row.time_taken
     }
 
 def _get_explanation(quiz_id: str, question_id: int, is_correct: bool) -> str:
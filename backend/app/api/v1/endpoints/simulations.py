@@ -1,18 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
+from sqlalchemy import select
 from typing import List, Optional, Dict, Any
+import asyncio
+import math
+import time
 import structlog
 from datetime import datetime
 
-from app.core.database import get_db
+from app.core.catalog import PRIVATE_CACHE_CONTROL, catalog
+from app.core.database import get_async_db
+from app.core.pagination import fetch_keyset_page
 from app.core.deps import get_current_user
+from app.services.impermanent_loss import impermanent_loss_profile
+from app.services.lending import LendingBook, LendingPosition, rescore_borrow_positions
+from app.services.simulation_engine import (
+    BASE_APY,
+    GAS_UNITS,
+    TOKEN_PRICES_USD,
+    request_seed,
+    simulation_engine,
+)
+from app.services.simulation_store import simulation_writer
+from app.models.simulation import UserSimulation
 from app.models.user import User
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
+HIGH_PRICE_IMPACT = 0.01  # warn when a swap moves the pool price more than this
+
 # Request/Response models
 class SimulationRequest(BaseModel):
     type: str  # swap, lend, borrow, stake, provide_liquidity
@@ -21,7 +40,10 @@ class SimulationRequest(BaseModel):
     token_b: Optional[str] = None
     amount: str
     slippage: Optional[float] = 0.5
-    gas_price: Optional[str] = None
+    gas_price: Optional[str] = None  # gwei
+    seed: Optional[int] = None  # Monte Carlo seed; derived from the request when omitted
+    range_pct: Optional[float] = None  # provide_liquidity: ±% price range; full range when omitted
+    collateral: Optional[Dict[str, str]] = None  # borrow: token -> amount; token_b at the default LTV when omitted
 
 class SimulationResult(BaseModel):
     simulation_id: str
@@ -34,11 +56,11 @@ class SimulationResult(BaseModel):
     warnings: List[str]
     recommendations: List[str]
     transaction_data: Dict[str, Any]
+    outcomes: Optional[Dict[str, Any]] = None  # Monte Carlo percentiles and probabilities
     created_at: datetime
 
-@router.get("/")
-async def get_available_simulations(current_user: User = Depends(get_current_user)):
-    """Get available simulation types and protocols"""
+@catalog.register("simulations:catalog", PRIVATE_CACHE_CONTROL)
+def _simulation_catalog_payload() -> Dict[str, Any]:
     return {
         "simulation_types": [
             {
@@ -109,11 +131,15 @@ async def get_available_simulations(current_user: User = Depends(get_current_use
         ]
     }
 
+@router.get("/")
+async def get_available_simulations(request: Request, current_user: User = Depends(get_current_user)):
+    """Get available simulation types and protocols"""
+    return catalog.respond("simulations:catalog", request)
+
 @router.post("/run", response_model=SimulationResult)
 async def run_simulation(
     simulation_request: SimulationRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """Run a DeFi transaction simulation"""
     try:
@@ -124,26 +150,37 @@ async def run_simulation(
                 detail="Invalid simulation type"
             )
         
+        if simulation_request.type in ("swap", "provide_liquidity") and not simulation_request.token_b:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="token_b is required for this simulation type"
+            )
+        
+        collateral_tokens = tuple(simulation_request.collateral or {})
+        for token in (simulation_request.token_a, simulation_request.token_b, *collateral_tokens):
+            if token and token.upper() not in TOKEN_PRICES_USD:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported token: {token}"
+                )
+        
+        _validate_amount(simulation_request.amount)
+        _validate_slippage(simulation_request.slippage)
+        _validate_collateral(simulation_request.collateral)
+        _validate_range_pct(simulation_request.range_pct)
+        
         # Generate simulation ID
         import uuid
         simulation_id = str(uuid.uuid4())
         
         # Run simulation based on type
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
         result = await _execute_simulation(simulation_request, simulation_id)
+        execution_time = int((time.perf_counter() - started) * 1000)
+        completed_at = datetime.utcnow()
         
-        # Update user progress
-        current_user.update_progress(simulation_completed=True)
-        db.commit()
-        
-        logger.info(
-            "Simulation completed",
-            user_id=current_user.id,
-            simulation_id=simulation_id,
-            type=simulation_request.type,
-            protocol=simulation_request.protocol
-        )
-        
-        return SimulationResult(
+        simulation_result = SimulationResult(
             simulation_id=simulation_id,
             type=simulation_request.type,
             protocol=simulation_request.protocol,
@@ -154,9 +191,35 @@ async def run_simulation(
             warnings=result["warnings"],
             recommendations=result["recommendations"],
             transaction_data=result["transaction_data"],
-            created_at=datetime.utcnow()
+            outcomes=result.get("outcomes"),
+            created_at=completed_at
+        )
+        
+        # Persisted, and counted towards the user's progress, in batches off the request path
+        simulation_writer.submit({
+            "run_id": simulation_id,
+            "user_id": current_user.id,
+            "type": simulation_request.type,
+            "protocol": simulation_request.protocol,
+            "input_params": simulation_request.model_dump(),
+            "result_data": simulation_result.model_dump(mode="json"),
+            "status": result["status"],
+            "execution_time": execution_time,
+            "gas_estimate": result["estimated_gas"],
+            "started_at": started_at,
+            "completed_at": completed_at,
+        })
+        
+        logger.info(
+            "Simulation completed",
+            user_id=current_user.id,
+            simulation_id=simulation_id,
+            type=simulation_request.type,
+            protocol=simulation_request.protocol
         )
         
+        return simulation_result
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -174,129 +237,282 @@ async def run_simulation(
 @router.get("/history")
 async def get_simulation_history(
     current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 10,
-    offset: int = 0
+    cursor: Optional[str] = None
 ):
-    """Get user's simulation history"""
-    # Mock simulation history - in production, this would come from database
-    mock_history = [
-        {
-            "simulation_id": "sim_001",
-            "type": "swap",
-            "protocol": "uniswap",
-            "status": "success",
-            "tokens": "ETH → USDC",
-            "amount": "1.0 ETH",
-            "result": "1,850 USDC",
-            "created_at": "2024-01-15T10:30:00Z"
-        },
-        {
-            "simulation_id": "sim_002",
-            "type": "lend",
-            "protocol": "aave",
-            "status": "success",
-            "tokens": "USDC",
-            "amount": "1000 USDC",
-            "result": "3.5% APY",
-            "created_at": "2024-01-14T15:20:00Z"
+    """Get user's simulation history, newest first; pass ``next_cursor`` back for the next page"""
+    try:
+        query = select(
+            UserSimulation.id,
+            UserSimulation.run_id,
+            UserSimulation.input_params,
+            UserSimulation.result_data,
+            UserSimulation.status,
+            UserSimulation.started_at,
+            UserSimulation.completed_at
+        ).where(UserSimulation.user_id == current_user.id)
+        page = await fetch_keyset_page(db, query, UserSimulation, "simulations", limit, cursor)
+        
+        return {
+            "simulations": [_history_item(row) for row in page.rows],
+            "has_more": page.has_more,
+            "next_cursor": page.next_cursor
         }
-    ]
-    
-    return {
-        "simulations": mock_history[offset:offset + limit],
-        "total": len(mock_history),
-        "has_more": offset + limit < len(mock_history)
-    }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to get simulation history", user_id=current_user.id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get simulation history"
+        )
+
+@router.get("/positions/health")
+async def get_borrow_position_health(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Health factor, liquidation prices and time to liquidation of the user's simulated borrows"""
+    try:
+        positions = await rescore_borrow_positions(db, user_id=current_user.id)
+        return {
+            "positions": positions,
+            "total": len(positions)
+        }
+        
+    except Exception as e:
+        logger.error("Borrow position scoring failed", user_id=current_user.id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to score borrow positions"
+        )
+
+@router.get("/impermanent-loss")
+async def get_impermanent_loss(
+    protocol: str,
+    token_a: str,
+    token_b: str,
+    range_pct: Optional[float] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Impermanent loss curve and break-even fee APY grid for a pool and price range"""
+    try:
+        for token in (token_a, token_b):
+            if token.upper() not in TOKEN_PRICES_USD:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported token: {token}"
+                )
+        _validate_range_pct(range_pct)
+        
+        profile = await asyncio.to_thread(impermanent_loss_profile, protocol, token_a, token_b, range_pct)
+        return profile.to_dict()
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Impermanent loss profile failed", protocol=protocol, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to compute impermanent loss"
+        )
 
 @router.get("/{simulation_id}")
 async def get_simulation_details(
     simulation_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed simulation results"""
-    # Mock simulation details
+    try:
+        # Runs still in the write-behind buffer are served from it
+        pending = simulation_writer.get_pending(simulation_id)
+        if pending is not None and pending["user_id"] == current_user.id:
+            return _simulation_details(simulation_id, pending)
+        
+        row = (await db.execute(
+            select(UserSimulation).where(
+                UserSimulation.run_id == simulation_id,
+                UserSimulation.user_id == current_user.id
+            )
+        )).scalar_one_or_none()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Simulation not found"
+            )
+        
+        return _simulation_details(simulation_id, {
+            column: getattr(row, column)
+            for column in (
+                "input_params", "result_data", "status", "execution_time",
+                "gas_estimate", "started_at", "completed_at"
+            )
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Failed to get simulation details", simulation_id=simulation_id, error=str(e))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get simulation details"
+        )
+
+def _simulation_details(simulation_id: str, run: Dict[str, Any]) -> Dict[str, Any]:
+    result = run["result_data"] or {}
     return {
         "simulation_id": simulation_id,
-        "type": "swap",
-        "protocol": "uniswap",
-        "status": "success",
-        "input": {
-            "token_a": "ETH",
-            "token_b": "USDC",
-            "amount": "1.0",
-            "slippage": 0.5
-        },
-        "output": {
-            "estimated_gas": "150000",
-            "gas_cost_usd": "$12.50",
-            "expected_output": "1,850 USDC",
-            "price_impact": "0.1%",
-            "minimum_received": "1,840.75 USDC"
-        },
-        "steps": [
-            "1. Approve ETH spending",
-            "2. Execute swap on Uniswap V3",
-            "3. Receive USDC tokens",
-            "4. Transaction confirmation"
-        ],
-        "warnings": [
-            "Always check slippage tolerance",
-            "Verify token addresses before swapping"
-        ],
-        "educational_notes": [
-            "This is a basic AMM swap using Uniswap's constant product formula",
-            "Price impact occurs when your trade affects the pool's token ratio",
-            "Gas fees vary based on network congestion"
-        ],
-        "created_at": "2024-01-15T10:30:00Z"
+        "type": run["input_params"]["type"],
+        "protocol": run["input_params"]["protocol"],
+        "status": run["status"],
+        "input": run["input_params"],
+        "output": result,
+        "warnings": result.get("warnings", []),
+        "execution_time_ms": run["execution_time"],
+        "estimated_gas": run["gas_estimate"],
+        "created_at": run["started_at"].isoformat(),
+        "completed_at": run["completed_at"].isoformat() if run["completed_at"] else None
+    }
+
+def _history_item(row: Any) -> Dict[str, Any]:
+    params = row.input_params
+    tokens = params["token_a"] if not params.get("token_b") else f"{params['token_a']} → {params['token_b']}"
+    return {
+        "simulation_id": row.run_id,
+        "type": params["type"],
+        "protocol": params["protocol"],
+        "status": row.status,
+        "tokens": tokens,
+        "amount": f"{params['amount']} {params['token_a']}",
+        "result": (row.result_data or {}).get("expected_output"),
+        "created_at": row.started_at.isoformat(),
+        "completed_at": row.completed_at.isoformat()
     }
 
+def _validate_amount(amount: str):
+    try:
+        valid = math.isfinite(float(amount)) and float(amount) > 0
+    except ValueError:
+        valid = False
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="amount must be a positive number"
+        )
+
+def _validate_slippage(slippage: Optional[float]):
+    if slippage is not None and not 0 <= slippage < 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="slippage must be between 0 and 100"
+        )
+
+def _validate_collateral(collateral: Optional[Dict[str, str]]):
+    for token, amount in (collateral or {}).items():
+        try:
+            valid = math.isfinite(float(amount)) and float(amount) > 0
+        except ValueError:
+            valid = False
+        if not valid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid collateral amount for {token}"
+            )
+
+def _validate_range_pct(range_pct: Optional[float]):
+    if range_pct is not None and not 0 < range_pct < 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="range_pct must be between 0 and 100"
+        )
+
+def _gas_price_gwei(request: SimulationRequest) -> Optional[float]:
+    try:
+        return float(request.gas_price) if request.gas_price else None
+    except ValueError:
+        return None
+
+def _run_monte_carlo(request: SimulationRequest, seed: int) -> Dict[str, Any]:
+    """Run the engine for ``request``; CPU-bound, so called off the event loop"""
+    amount = float(request.amount)
+    gas_price = _gas_price_gwei(request)
+    
+    if request.type == "swap":
+        return simulation_engine.swap(
+            request.token_a, request.token_b, amount, request.slippage or 0.5, seed, gas_price, request.protocol
+        )
+    if request.type == "lend":
+        return simulation_engine.lend(request.token_a, amount, seed, gas_price)
+    if request.type == "borrow":
+        # The paths follow the largest collateral, at the position's overall LTV
+        position = LendingPosition.from_params(request.model_dump())
+        values = {token: held * TOKEN_PRICES_USD[token] for token, held in position.collateral.items()}
+        collateral = max(values, key=values.get)
+        ltv = amount * TOKEN_PRICES_USD[request.token_a.upper()] / sum(values.values())
+        return simulation_engine.borrow(request.token_a, collateral, amount, seed, gas_price, ltv)
+    if request.type == "stake":
+        return simulation_engine.stake(request.token_a, amount, seed, gas_price)
+    return simulation_engine.provide_liquidity(
+        request.token_a, request.token_b, amount, seed, gas_price, request.protocol, request.range_pct
+    )
+
 async def _execute_simulation(request: SimulationRequest, simulation_id: str) -> Dict[str, Any]:
     """Execute the actual simulation logic"""
+    if request.type not in GAS_UNITS:
+        raise ValueError(f"Unsupported simulation type: {request.type}")
     
-    # Base gas estimates
-    gas_estimates = {
-        "swap": 150000,
-        "lend": 180000,
-        "borrow": 220000,
-        "stake": 160000,
-        "provide_liquidity": 280000
-    }
+    estimated_gas = str(GAS_UNITS[request.type])
     
-    base_gas = gas_estimates.get(request.type, 150000)
-    estimated_gas = str(base_gas)
+    # Identical requests reuse a seed, so their results are reproducible
+    seed = request.seed
+    if seed is None:
+        seed = request_seed(
+            request.type, request.protocol, request.token_a, request.token_b or "",
+            request.amount, request.slippage, request.gas_price or "", request.range_pct or ""
+        )
+    outcomes = await asyncio.to_thread(_run_monte_carlo, request, seed)
     
     # Simulation logic based on type
     if request.type == "swap":
-        return await _simulate_swap(request, estimated_gas)
+        result = await _simulate_swap(request, estimated_gas, outcomes)
     elif request.type == "lend":
-        return await _simulate_lend(request, estimated_gas)
+        result = await _simulate_lend(request, estimated_gas, outcomes)
     elif request.type == "borrow":
-        return await _simulate_borrow(request, estimated_gas)
+        result = await _simulate_borrow(request, estimated_gas, outcomes)
     elif request.type == "stake":
-        return await _simulate_stake(request, estimated_gas)
-    elif request.type == "provide_liquidity":
-        return await _simulate_provide_liquidity(request, estimated_gas)
+        result = await _simulate_stake(request, estimated_gas, outcomes)
     else:
-        raise ValueError(f"Unsupported simulation type: {request.type}")
+        result = await _simulate_provide_liquidity(request, estimated_gas, outcomes)
+    
+    return {**result, "outcomes": outcomes}
 
-async def _simulate_swap(request: SimulationRequest, gas: str) -> Dict[str, Any]:
+async def _simulate_swap(request: SimulationRequest, gas: str, outcomes: Dict[str, Any]) -> Dict[str, Any]:
     """Simulate token swap"""
-    amount_num = float(request.amount)
-    # Mock exchange rate with slippage
-    exchange_rate = 1850.0  # ETH to USDC rate
-    slippage_factor = 1 - (request.slippage or 0.5) / 100
-    expected_output = amount_num * exchange_rate * slippage_factor
+    # Every path reverts when the price always lands below the slippage floor
+    executes = outcomes["outcome"]["p50"] is not None
+    expected_output = outcomes["outcome"]["p50"] if executes else 0.0
+    warnings = [
+        "Check slippage tolerance",
+        "Verify token addresses"
+    ]
+    if outcomes["revert_probability"] > 0.01:
+        warnings.append(
+            f"{outcomes['revert_probability'] * 100:.1f}% chance the price moves past your slippage tolerance and the swap reverts"
+        )
+    if outcomes["price_impact"] > HIGH_PRICE_IMPACT:
+        warnings.append(
+            f"High price impact: this trade moves the pool price by {outcomes['price_impact'] * 100:.2f}%"
+        )
     
     return {
-        "status": "success",
+        "status": "success" if executes else "failed",
         "estimated_gas": gas,
         "expected_output": f"{expected_output:.2f} {request.token_b}",
-        "price_impact": f"{(1 - slippage_factor) * 100:.2f}%",
-        "warnings": [
-            "Check slippage tolerance",
-            "Verify token addresses"
-        ],
+        "price_impact": f"{outcomes['price_impact'] * 100:.2f}%",
+        "warnings": warnings,
         "recommendations": [
             "Start with small amounts",
             "Use reputable DEXs"
@@ -306,15 +522,16 @@ async def _simulate_swap(request: SimulationRequest, gas: str) -> Dict[str, Any]
             "to_token": request.token_b,
             "amount_in": request.amount,
             "amount_out": f"{expected_output:.2f}",
+            "minimum_received": f"{outcomes['minimum_received']:.2f}",
+            "pool_fee": outcomes["pool_fee"],
+            "quote_ladder": outcomes["quote_ladder"],
             "protocol": request.protocol
         }
     }
 
-async def _simulate_lend(request: SimulationRequest, gas: str) -> Dict[str, Any]:
+async def _simulate_lend(request: SimulationRequest, gas: str, outcomes: Dict[str, Any]) -> Dict[str, Any]:
     """Simulate lending"""
-    amount_num = float(request.amount)
-    apy = 3.5  # Mock APY
-    daily_earnings = amount_num * apy / 365 / 100
+    daily_earnings = outcomes["outcome"]["p50"] / outcomes["horizon_days"]
     
     return {
         "status": "success",
@@ -331,26 +548,33 @@ async def _simulate_lend(request: SimulationRequest, gas: str) -> Dict[str, Any]
         "transaction_data": {
             "token": request.token_a,
             "amount": request.amount,
-            "apy": apy,
+            "apy": BASE_APY["lend"],
             "protocol": request.protocol
         }
     }
 
-async def _simulate_borrow(request: SimulationRequest, gas: str) -> Dict[str, Any]:
+async def _simulate_borrow(request: SimulationRequest, gas: str, outcomes: Dict[str, Any]) -> Dict[str, Any]:
     """Simulate borrowing"""
-    amount_num = float(request.amount)
-    borrow_apy = 5.2  # Mock borrow APY
-    daily_interest = amount_num * borrow_apy / 365 / 100
+    daily_interest = outcomes["interest"]["p50"] / outcomes["horizon_days"]
+    position = LendingPosition.from_params(request.model_dump())
+    health = LendingBook([position]).assess().position(0)
+    warnings = [
+        f"Liquidated if your collateral falls {health['collateral_drop_pct']:.1f}% in value",
+        "Risk of liquidation",
+        "Interest rates can increase",
+        "Maintain healthy collateral ratio"
+    ]
+    if outcomes["liquidation_probability"] > 0:
+        warnings.insert(0, (
+            f"{outcomes['liquidation_probability'] * 100:.1f}% chance of liquidation "
+            f"within {outcomes['horizon_days']} days"
+        ))
     
     return {
         "status": "success",
         "estimated_gas": gas,
         "expected_output": f"{daily_interest:.6f} {request.token_a} daily interest",
-        "warnings": [
-            "Risk of liquidation",
-            "Interest rates can increase",
-            "Maintain healthy collateral ratio"
-        ],
+        "warnings": warnings,
         "recommendations": [
             "Monitor liquidation threshold",
             "Keep extra collateral"
@@ -358,16 +582,20 @@ async def _simulate_borrow(request: SimulationRequest, gas: str) -> Dict[str, An
         "transaction_data": {
             "token": request.token_a,
             "amount": request.amount,
-            "borrow_apy": borrow_apy,
+            "collateral": position.collateral,
+            "collateral_token": outcomes["collateral_token"],
+            "health_factor": health["health_factor"],
+            "liquidation_prices": health["liquidation_prices"],
+            "collateral_drop_pct": health["collateral_drop_pct"],
+            "time_to_liquidation_days": health["time_to_liquidation_days"],
+            "borrow_apy": BASE_APY["borrow"],
             "protocol": request.protocol
         }
     }
 
-async def _simulate_stake(request: SimulationRequest, gas: str) -> Dict[str, Any]:
+async def _simulate_stake(request: SimulationRequest, gas: str, outcomes: Dict[str, Any]) -> Dict[str, Any]:
     """Simulate staking"""
-    amount_num = float(request.amount)
-    staking_apy = 8.5  # Mock staking APY
-    daily_rewards = amount_num * staking_apy / 365 / 100
+    daily_rewards = outcomes["outcome"]["p50"] / outcomes["horizon_days"]
     
     return {
         "status": "success",
@@ -384,16 +612,20 @@ async def _simulate_stake(request: SimulationRequest, gas: str) -> Dict[str, Any
         "transaction_data": {
             "token": request.token_a,
             "amount": request.amount,
-            "staking_apy": staking_apy,
+            "staking_apy": BASE_APY["stake"],
             "protocol": request.protocol
         }
     }
 
-async def _simulate_provide_liquidity(request: SimulationRequest, gas: str) -> Dict[str, Any]:
+async def _simulate_provide_liquidity(request: SimulationRequest, gas: str, outcomes: Dict[str, Any]) -> Dict[str, Any]:
     """Simulate liquidity provision"""
-    amount_num = float(request.amount)
-    lp_apy = 12.3  # Mock LP APY
-    daily_fees = amount_num * lp_apy / 365 / 100
+    daily_fees = outcomes["fees_usd"]["p50"] / outcomes["horizon_days"]
+    profile = await asyncio.to_thread(
+        impermanent_loss_profile,
+        request.protocol, request.token_a, request.token_b, request.range_pct, outcomes["horizon_days"]
+    )
+    impermanent_loss = profile.at_moves()
+    quarter_move = next(point for point in impermanent_loss["points"] if point["price_move_pct"] == 25.0)
     
     return {
         "status": "success",
@@ -401,7 +633,12 @@ async def _simulate_provide_liquidity(request: SimulationRequest, gas: str) -> D
         "expected_output": f"{daily_fees:.6f} USD daily fees",
         "warnings": [
             "Impermanent loss risk",
-            "Requires equal value of both tokens"
+            f"Requires {outcomes['amount_b']:.6f} {request.token_b} alongside your {request.token_a}",
+            f"{outcomes['probability_below_hodl'] * 100:.0f}% chance of ending below simply holding the tokens",
+            (
+                f"A 25% price move needs {quarter_move['break_even_fee_apy']:.1f}% APY in fees "
+                f"over {impermanent_loss['horizon_days']} days to match holding"
+            )
         ],
         "recommendations": [
             "Understand impermanent loss",
@@ -411,7 +648,12 @@ async def _simulate_provide_liquidity(request: SimulationRequest, gas: str) -> D
             "token_a": request.token_a,
             "token_b": request.token_b,
             "amount": request.amount,
-            "lp_apy": lp_apy,
+            "amount_b": f"{outcomes['amount_b']:.6f}",
+            "pool_fee": outcomes["pool_fee"],
+            "pool_share": outcomes["pool_share"],
+            "range_pct": request.range_pct,
+            "impermanent_loss": impermanent_loss,
+            "lp_apy": BASE_APY["provide_liquidity"],
             "protocol": request.protocol
         }
     }
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 import structlog
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.database import get_async_db
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.services.user_cache import invalidate_cached_user
 from app.models.user import User
 
 logger = structlog.get_logger()
@@ -68,18 +70,20 @@ async def get_user_profile(current_user: User = Depends(get_current_user)):
 @router.put("/profile", response_model=UserProfileResponse)
 async def update_user_profile(
     update_data: UserUpdateRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile"""
     try:
         # Update fields if provided
         if update_data.username is not None:
             # Check if username is already taken
-            existing_user = db.query(User).filter(
-                User.username == update_data.username,
-                User.id != current_user.id
-            ).first()
+            existing_user = (await db.execute(
+                select(User).where(
+                    User.username == update_data.username,
+                    User.id != current_user.id
+                )
+            )).scalar_one_or_none()
             if existing_user:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -118,8 +122,9 @@ async def update_user_profile(
         if update_data.timezone is not None:
             current_user.timezone = update_data.timezone
         
-        db.commit()
-        db.refresh(current_user)
+        await db.commit()
+        await db.refresh(current_user)
+        await invalidate_cached_user(current_user.wallet_address)
         
         logger.info("User profile updated", user_id=current_user.id)
         
@@ -211,13 +216,14 @@ def _get_recommendations(user: User) -> list:
 
 @router.delete("/account")
 async def delete_user_account(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_update),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete user account (soft delete)"""
     try:
         current_user.is_active = False
-        db.commit()
+        await db.commit()
+        await invalidate_cached_user(current_user.wallet_address)
         
         logger.info("User account deactivated", user_id=current_user.id)
         
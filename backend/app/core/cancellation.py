@@ -0,0 +1,46 @@
+import asyncio
+from typing import Awaitable, TypeVar
+from fastapi import HTTPException, Request
+import structlog
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Non-standard status used by nginx for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Block until the ASGI server reports that the client went away"""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+async def run_until_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await ``awaitable`` but cancel it as soon as the HTTP client disconnects.
+
+    Long-running upstream calls (LLM completions) should not keep burning
+    tokens and connection slots for a response nobody will read.
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(wait_for_disconnect(request))
+
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        work.cancel()
+        raise
+    finally:
+        watcher.cancel()
+
+    if work.done():
+        return work.result()
+
+    work.cancel()
+    logger.info("Client disconnected, request cancelled", path=request.url.path)
+    raise HTTPException(
+        status_code=CLIENT_CLOSED_REQUEST,
+        detail="Client closed request"
+    )
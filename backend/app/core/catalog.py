@@ -0,0 +1,134 @@
+import gzip
+import hashlib
+import json
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import Response
+import structlog
+
+from app.core.local_cache import LocalTTLCache
+
+logger = structlog.get_logger()
+
+# Revalidate on every use; the ETag makes unchanged responses a bodiless 304
+PUBLIC_CACHE_CONTROL = "public, no-cache"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Same floor as Starlette's GZipMiddleware; smaller bodies grow when gzipped
+GZIP_MIN_SIZE = 500
+
+# Keyed variants (e.g. filtered pages) kept per process, least recently used first out
+VARIANT_CACHE_SIZE = 1024
+
+class PrecompiledResponse:
+    """
+    A JSON payload encoded once, with its gzip variant and a content-hash ETag.
+
+    The encoding matches FastAPI's default ``JSONResponse``, so switching an
+    endpoint to a precompiled response does not change its body.
+    """
+
+    def __init__(self, payload: Any, cache_control: str = PUBLIC_CACHE_CONTROL):
+        self.body = json.dumps(
+            jsonable_encoder(payload),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.cache_control = cache_control
+        # mtime=0 keeps the gzip bytes identical across workers and deploys
+        self.gzipped = gzip.compress(self.body, mtime=0) if len(self.body) >= GZIP_MIN_SIZE else None
+
+    def not_modified(self, request: Request) -> bool:
+        """Whether the client's ``If-None-Match`` already names this body"""
+        header = request.headers.get("if-none-match")
+        if not header:
+            return False
+        for tag in header.split(","):
+            tag = tag.strip()
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            if tag == "*" or tag.removeprefix("W/") == self.etag:
+                return True
+        return False
+
+    def respond(self, request: Request) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(request):
+            return Response(status_code=304, headers=headers)
+
+        if self.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(self.gzipped, media_type="application/json", headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+class ResponseCatalog:
+    """
+    Precompiled responses for payloads that only change on deploy.
+
+    Endpoints register a builder under a name and are compiled together at
+    startup (``compile_all``) and kept for the life of the process. Keyed
+    variants, such as a filtered listing, are compiled on first request and
+    kept in a bounded LRU, since their keys come from query parameters.
+    """
+
+    def __init__(self, variant_maxsize: int = VARIANT_CACHE_SIZE):
+        self._builders: Dict[Hashable, Tuple[Callable[[], Any], str]] = {}
+        self._compiled: Dict[Hashable, PrecompiledResponse] = {}
+        self._variants: LocalTTLCache[PrecompiledResponse] = LocalTTLCache(variant_maxsize, ttl=float("inf"))
+
+    def register(self, name: Hashable, cache_control: str = PUBLIC_CACHE_CONTROL):
+        """Decorator registering a payload builder under ``name``"""
+        def decorator(builder: Callable[[], Any]) -> Callable[[], Any]:
+            self._builders[name] = (builder, cache_control)
+            self._compiled.pop(name, None)
+            return builder
+        return decorator
+
+    def compile_all(self) -> int:
+        """Build every registered payload now rather than on first request"""
+        for name in self._builders:
+            self.get(name)
+        logger.info("Response catalog compiled", entries=len(self._compiled))
+        return len(self._compiled)
+
+    def get(
+        self,
+        key: Hashable,
+        build: Optional[Callable[[], Any]] = None,
+        cache_control: str = PUBLIC_CACHE_CONTROL
+    ) -> PrecompiledResponse:
+        """The compiled response for ``key``, building it with ``build`` (or its registered builder) once"""
+        if build is None:
+            compiled = self._compiled.get(key)
+            if compiled is None:
+                build, cache_control = self._builders[key]
+                compiled = self._compiled[key] = PrecompiledResponse(build(), cache_control)
+            return compiled
+
+        compiled = self._variants.get(key)
+        if compiled is None:
+            compiled = PrecompiledResponse(build(), cache_control)
+            self._variants.set(key, compiled)
+        return compiled
+
+    def respond(
+        self,
+        key: Hashable,
+        request: Request,
+        build: Optional[Callable[[], Any]] = None,
+        cache_control: str = PUBLIC_CACHE_CONTROL
+    ) -> Response:
+        return self.get(key, build, cache_control).respond(request)
+
+    def clear(self):
+        self._compiled.clear()
+        self._variants.clear()
+
+catalog = ResponseCatalog()
@@ -23,12 +23,18 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_CACHE_TTL: int = 3600  # 1 hour
+    USER_CACHE_TTL: int = 60  # authenticated user snapshots
     
     # External APIs
     GROQ_API_KEY: Optional[str] = None
     ALCHEMY_API_KEY: Optional[str] = None
     COINGECKO_API_KEY: Optional[str] = None
     DEFILLAMA_API_URL: str = "https://api.llama.fi"
+    DEFILLAMA_YIELDS_URL: str = "https://yields.llama.fi"
+    PROTOCOL_METRICS_ENABLED: bool = True
+    PROTOCOL_METRICS_INTERVAL: int = 300  # seconds between ingestion runs
+    PROTOCOL_METRICS_RETENTION_DAYS: int = 30
+    GROQ_API_URL: str = "https://api.groq.com"
     
     # Blockchain
     ETHEREUM_RPC_URL: str = "https://eth-mainnet.alchemyapi.io/v2/demo"
@@ -38,18 +44,48 @@ class Settings(BaseSettings):
     MAX_TOKENS: int = 1000
     TEMPERATURE: float = 0.7
     MODEL_NAME: str = "llama-3.1-70b-versatile"
-    
+    LLM_TIMEOUT: float = 30.0  # seconds per completion call
+    LLM_MAX_RETRIES: int = 2
+    LLM_MAX_CONNECTIONS: int = 200
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    LLM_KEEPALIVE_EXPIRY: float = 60.0  # seconds an idle connection is kept
+    AI_EXPLAIN_CACHE_TTL: int = 3600  # 1 hour
+    AI_QUIZ_CACHE_TTL: int = 7200  # 2 hours
+    AI_LOCAL_CACHE_SIZE: int = 2048  # entries per worker
+    AI_LOCAL_CACHE_TTL: int = 300  # 5 minutes
+    AI_SEMANTIC_CACHE_THRESHOLD: float = 0.85  # cosine similarity to reuse an answer
+    AI_SEMANTIC_INDEX_SIZE: int = 5000  # concepts per (level, example) scope
+    AI_SINGLE_FLIGHT_LOCK_TTL: int = 45  # seconds; must outlive LLM_TIMEOUT
+    AI_SINGLE_FLIGHT_WAIT: float = 35.0  # seconds to wait on another worker's call
+    LLM_PROMPT_COST_PER_1K_TOKENS: float = 0.00059  # USD
+    LLM_COMPLETION_COST_PER_1K_TOKENS: float = 0.00079  # USD
+
     # Risk Assessment
     RISK_CACHE_TTL: int = 300  # 5 minutes
+    RISK_CACHE_STALE_TTL: int = 600  # seconds an expired assessment is still served while it refreshes
+    RISK_BATCH_MAX_ITEMS: int = 100
+    RISK_BATCH_CONCURRENCY: int = 8  # assessments evaluated at once per batch
     MAX_RISK_SCORE: int = 100
     
+    # Simulations
+    SIMULATION_PATHS: int = 100_000  # Monte Carlo paths per simulation
+    SIMULATION_HORIZON_DAYS: int = 30
+    SIMULATION_WRITE_BATCH_SIZE: int = 100  # runs inserted per commit
+    SIMULATION_WRITE_INTERVAL: float = 1.0  # seconds a run may wait before its batch is written
+    SIMULATION_WRITE_MAX_PENDING: int = 10_000  # runs buffered before new ones are dropped
+    
     # Rate Limiting
+    RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 10
+    AI_RATE_LIMIT_PER_MINUTE: int = 10
+    AI_RATE_LIMIT_BURST: int = 3
     
     # Monitoring
     ENABLE_METRICS: bool = True
     METRICS_PORT: int = 9090
+    TRACING_ENABLED: bool = True
+    TRACE_SLOW_REQUEST_MS: float = 1000.0  # requests slower than this log their span breakdown
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -1,11 +1,14 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import asyncio
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from app.core.config import settings
+from app.core.tracing import instrument_engine, tracer
 
 # Create database engine
 engine = create_engine(
@@ -19,16 +22,68 @@ engine = create_engine(
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async drivers for the sync URLs used in configuration
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver, e.g. psycopg2 -> asyncpg"""
+    parsed = make_url(url)
+    async_driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if async_driver is None or parsed.drivername.endswith(("+asyncpg", "+aiosqlite")):
+        return url
+    return parsed.set(drivername=async_driver).render_as_string(hide_password=False)
+
+def _async_pool_options(url: str) -> dict:
+    """aiosqlite runs without a connection pool, so it takes no pool sizing"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+    }
+
+# Async engine for request handlers, so DB round trips never block the event loop
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    echo=settings.DEBUG,
+    **_async_pool_options(ASYNC_DATABASE_URL),
+)
+
+# Objects stay readable after commit; request handlers still return them
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Every statement becomes a db.query span under the request's trace
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
+
 # Create base class for models
 Base = declarative_base()
 
 def get_db() -> Generator:
     """Dependency to get database session"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    # Set up and torn down in different threadpool calls, so never activated
+    with tracer.span("db.session", {"db.engine": "sync"}, activate=False):
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get an async database session"""
+    with tracer.span("db.session", {"db.engine": "async"}, activate=False):
+        async with AsyncSessionLocal() as db:
+            yield db
 
 async def create_tables():
     """Create all database tables"""
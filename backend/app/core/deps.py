@@ -1,46 +1,60 @@
 from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.models.user import User
+from app.services.ai_service import AIService
+from app.services.user_cache import cache_user, get_cached_user
 
 # Security scheme
 security = HTTPBearer()
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
-    """
-    Get current authenticated user from JWT token
-    """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def _get_user_by_wallet(db: AsyncSession, wallet_address: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.wallet_address == wallet_address))
+    return result.scalar_one_or_none()
+
+def _token_subject(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """Return the wallet address a bearer token was issued for, if it is valid"""
+    if not credentials:
+        return None
     
     try:
-        # Decode JWT token
         payload = jwt.decode(
             credentials.credentials, 
             settings.SECRET_KEY, 
             algorithms=["HS256"]
         )
-        wallet_address: str = payload.get("sub")
-        if wallet_address is None:
-            raise credentials_exception
     except JWTError:
+        return None
+    return payload.get("sub")
+
+async def _resolve_user(
+    db: AsyncSession,
+    credentials: HTTPAuthorizationCredentials,
+    use_cache: bool
+) -> User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    wallet_address = _token_subject(credentials)
+    if wallet_address is None:
         raise credentials_exception
     
-    # Get user from database
-    user = db.query(User).filter(User.wallet_address == wallet_address).first()
+    # Serve the short-lived snapshot when possible, otherwise hit the database
+    user = await get_cached_user(wallet_address) if use_cache else None
     if user is None:
-        raise credentials_exception
+        user = await _get_user_by_wallet(db, wallet_address)
+        if user is None:
+            raise credentials_exception
+        await cache_user(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -50,6 +64,29 @@ def get_current_user(
     
     return user
 
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Get current authenticated user from JWT token.
+    
+    Usually served from a cached snapshot without touching the database; the
+    returned user is read-only. Use ``get_current_user_for_update`` in
+    handlers that modify the user.
+    """
+    return await _resolve_user(db, credentials, use_cache=True)
+
+async def get_current_user_for_update(
+    db: AsyncSession = Depends(get_async_db),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """
+    Get current authenticated user loaded into the request's session, so
+    changes are written on ``db.commit()``
+    """
+    return await _resolve_user(db, credentials, use_cache=False)
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -90,27 +127,32 @@ def get_current_premium_user(
     return current_user
 
 # Optional user dependency (for public endpoints that can work with or without auth)
-def get_current_user_optional(
-    db: Session = Depends(get_db),
+async def get_current_user_optional(
+    db: AsyncSession = Depends(get_async_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[User]:
     """
     Get current user if authenticated, None otherwise
     """
-    if not credentials:
+    wallet_address = _token_subject(credentials)
+    if wallet_address is None:
         return None
     
-    try:
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.SECRET_KEY,
-            algorithms=["HS256"]
+    user = await get_cached_user(wallet_address)
+    if user is None:
+        user = await _get_user_by_wallet(db, wallet_address)
+        if user is not None:
+            await cache_user(user)
+    return user if user and user.is_active else None
+
+def get_ai_service(request: Request) -> AIService:
+    """
+    Get the process-wide AI service created in the application lifespan
+    """
+    ai_service = getattr(request.app.state, "ai_service", None)
+    if ai_service is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI service unavailable"
         )
-        wallet_address: str = payload.get("sub")
-        if wallet_address is None:
-            return None
-        
-        user = db.query(User).filter(User.wallet_address == wallet_address).first()
-        return user if user and user.is_active else None
-    except JWTError:
-        return None
+    return ai_service
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Iterator
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import structlog
+
+logger = structlog.get_logger()
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "aya_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "aya_http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["method", "route"]
+)
+
+# Database
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "aya_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "aya_db_pool_checked_out",
+    "Database connections currently checked out",
+    ["engine"]
+)
+
+# Redis
+REDIS_COMMAND_DURATION = Histogram(
+    "aya_redis_command_duration_seconds",
+    "Redis command round-trip latency",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+REDIS_COMMAND_ERRORS = Counter(
+    "aya_redis_command_errors_total",
+    "Redis commands that raised",
+    ["command"]
+)
+
+# LLM
+LLM_REQUEST_DURATION = Histogram(
+    "aya_llm_request_duration_seconds",
+    "Upstream LLM completion latency",
+    ["operation", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+LLM_TOKENS = Counter(
+    "aya_llm_tokens_total",
+    "Tokens sent to and received from the LLM",
+    ["type"]
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+def route_template(scope: Scope) -> str:
+    """The template of the route ``scope`` is dispatched to, e.g. ``/lessons/{lesson_id}``"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    partial = UNMATCHED_ROUTE
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if match == Match.PARTIAL and partial == UNMATCHED_ROUTE:
+            # Path matched but the method did not (a 405)
+            partial = getattr(route, "path", UNMATCHED_ROUTE)
+    return partial
+
+@contextmanager
+def observe_redis(command: str) -> Iterator[None]:
+    """Time one Redis round trip, counting failures separately"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        REDIS_COMMAND_ERRORS.labels(command).inc()
+        raise
+    finally:
+        REDIS_COMMAND_DURATION.labels(command).observe(time.perf_counter() - started)
+
+@contextmanager
+def observe_llm(operation: str) -> Iterator[None]:
+    """Time one upstream LLM call, labelled by how it ended"""
+    started = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except (asyncio.TimeoutError, TimeoutError):
+        outcome = "timeout"
+        raise
+    except (asyncio.CancelledError, GeneratorExit):
+        outcome = "cancelled"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        LLM_REQUEST_DURATION.labels(operation, outcome).observe(time.perf_counter() - started)
+
+def record_llm_tokens(prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.labels("prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels("completion").inc(completion_tokens)
+
+def instrument_pool(engine, name: str):
+    """
+    Export checkout wait time and checked-out connections for ``engine``'s pool.
+
+    SQLAlchemy only emits pool events once a connection has been handed out,
+    so the wait is measured by wrapping the pool's internal ``_do_get``.
+    """
+    from sqlalchemy import event
+
+    pool = engine.pool
+    do_get = pool._do_get
+    wait = DB_POOL_CHECKOUT_WAIT.labels(name)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+
+    @wraps(do_get)
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            wait.observe(time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+    event.listen(pool, "checkout", lambda *args: checked_out.inc())
+    event.listen(pool, "checkin", lambda *args: checked_out.dec())
+
+def start_metrics_server(port: int) -> bool:
+    """Serve /metrics on ``port``; False if the port is taken (e.g. another worker)"""
+    try:
+        start_http_server(port)
+    except OSError as e:
+        logger.warning("Metrics server not started", port=port, error=str(e))
+        return False
+
+    logger.info("Metrics server started", port=port)
+    return True
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency and in-flight requests per route.
+
+    Requests are labelled with the matched route template (e.g.
+    ``/api/v1/lessons/{lesson_id}``) rather than the raw path, so label
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method, route)
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
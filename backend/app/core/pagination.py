@@ -0,0 +1,72 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MAX_HISTORY_PAGE = 100
+
+@dataclass(frozen=True)
+class KeysetPage:
+    """One page of a history query and the cursor for the next"""
+    rows: List[Any]
+    has_more: bool
+    next_cursor: Optional[str]
+
+def validate_page_limit(limit: int):
+    if not 1 <= limit <= MAX_HISTORY_PAGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_HISTORY_PAGE}"
+        )
+
+def encode_cursor(scope: str, completed_at: datetime, row_id: int) -> str:
+    """An opaque cursor for the row after (``completed_at``, ``row_id``)"""
+    position = json.dumps([scope, completed_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def decode_cursor(scope: str, cursor: str) -> Tuple[datetime, int]:
+    """The position in ``cursor``; 400 if it is malformed or from another endpoint"""
+    try:
+        cursor_scope, completed_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_scope != scope:
+            raise ValueError("cursor belongs to another listing")
+        return datetime.fromisoformat(completed_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    scope: str,
+    limit: int,
+    cursor: Optional[str] = None
+) -> KeysetPage:
+    """
+    Page ``query`` newest first by keyset on (``completed_at``, ``id``).
+
+    ``query`` should already filter on ``user_id`` and select ``model``'s
+    ``completed_at`` and ``id`` columns, so together with a
+    ``(user_id, ..., completed_at, id)`` index each page is an index range
+    scan starting after the cursor, however deep the client has paged.
+    Unfinished rows (no ``completed_at``) are not listed.
+    """
+    validate_page_limit(limit)
+    query = query.where(model.completed_at.is_not(None))
+    if cursor:
+        completed_at, row_id = decode_cursor(scope, cursor)
+        query = query.where(tuple_(model.completed_at, model.id) < tuple_(completed_at, row_id))
+    query = query.order_by(model.completed_at.desc(), model.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    page = rows[:limit]
+    has_more = len(rows) > limit
+    next_cursor = encode_cursor(scope, page[-1].completed_at, page[-1].id) if has_more else None
+    return KeysetPage(rows=page, has_more=has_more, next_cursor=next_cursor)
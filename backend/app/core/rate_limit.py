@@ -0,0 +1,180 @@
+import json
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+from jose import JWTError, jwt
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import structlog
+
+from app.core.config import settings
+from app.core.local_cache import LocalTTLCache
+from app.core.redis import redis_client
+
+logger = structlog.get_logger()
+
+# Paths that are never limited (probes, docs)
+EXEMPT_PATHS = {"/", "/health", "/docs", "/redoc", "/openapi.json"}
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Token bucket for every path under ``prefix``: ``per_minute`` sustained, ``burst`` at once"""
+    name: str
+    prefix: str
+    per_minute: int
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        """Refill rate in tokens per second"""
+        return self.per_minute / 60
+
+    def matches(self, path: str) -> bool:
+        """Whether ``path`` is ``prefix`` or below it; ``/api/v1/ai`` does not cover ``/api/v1/aiX``"""
+        return path == self.prefix or path.startswith(self.prefix.rstrip("/") + "/")
+
+def default_rate_limit_rules() -> List[RateLimitRule]:
+    """Rules from settings; AI endpoints call a paid upstream and get a tighter budget"""
+    return [
+        RateLimitRule(
+            "ai",
+            f"{settings.API_V1_STR}/ai",
+            settings.AI_RATE_LIMIT_PER_MINUTE,
+            settings.AI_RATE_LIMIT_BURST
+        ),
+        RateLimitRule(
+            "default",
+            "/",
+            settings.RATE_LIMIT_PER_MINUTE,
+            settings.RATE_LIMIT_BURST
+        ),
+    ]
+
+class LocalTokenBucket:
+    """
+    In-process token buckets used while Redis is unavailable.
+
+    Limits then apply per worker rather than globally, which is looser but
+    keeps a single client from monopolising any one worker.
+    """
+
+    def __init__(self, maxsize: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        # Idle buckets refill completely, so forgetting them is harmless
+        self._buckets: LocalTTLCache[Tuple[float, float]] = LocalTTLCache(maxsize, ttl=3600, clock=clock)
+
+    def acquire(self, key: str, rate: float, capacity: int) -> Tuple[bool, float, float]:
+        """Same contract as ``RedisClient.rate_limit_acquire``"""
+        now = self._clock()
+        tokens, ts = self._buckets.get(key) or (float(capacity), now)
+        tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+
+        if tokens >= 1:
+            tokens -= 1
+            allowed, retry_after = True, 0.0
+        else:
+            allowed, retry_after = False, (1 - tokens) / rate
+
+        self._buckets.set(key, (tokens, now), ttl=capacity / rate + 1)
+        return allowed, tokens, retry_after
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-route token buckets.
+
+    Each request costs one atomic Redis script call, falling back to
+    ``LocalTokenBucket`` when Redis is down. Clients are identified by the
+    subject of a valid bearer token, otherwise by remote address. Rejected
+    requests get a 429 with ``Retry-After``; every limited response carries
+    ``X-RateLimit-Limit`` and ``X-RateLimit-Remaining``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rules: Optional[Sequence[RateLimitRule]] = None,
+        enabled: Optional[bool] = None
+    ):
+        self.app = app
+        rules = default_rate_limit_rules() if rules is None else rules
+        # Longest prefix wins
+        self.rules = sorted(rules, key=lambda rule: len(rule.prefix), reverse=True)
+        self.enabled = settings.RATE_LIMIT_ENABLED if enabled is None else enabled
+        self.local = LocalTokenBucket()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if not self.enabled or scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        rule = self._match(scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{rule.name}:{self._identity(scope)}"
+        decision = await redis_client.rate_limit_acquire(key, rule.rate, rule.burst)
+        if decision is None:
+            decision = self.local.acquire(key, rule.rate, rule.burst)
+        allowed, tokens, retry_after = decision
+
+        headers = [
+            (b"x-ratelimit-limit", str(rule.per_minute).encode()),
+            (b"x-ratelimit-remaining", str(int(tokens)).encode()),
+        ]
+
+        if not allowed:
+            logger.warning("Rate limit exceeded", rule=rule.name, path=scope["path"])
+            await self._reject(send, headers, retry_after)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    def _match(self, path: str) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.matches(path):
+                return rule
+        return None
+
+    def _identity(self, scope: Scope) -> str:
+        """Token subject for authenticated calls, else the client address"""
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() == "bearer" and token:
+                    try:
+                        subject = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"]).get("sub")
+                    except JWTError:
+                        # Forged or expired tokens share their caller's address bucket
+                        subject = None
+                    if subject:
+                        return f"user:{subject}"
+                break
+
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def _reject(self, send: Send, headers: List[Tuple[bytes, bytes]], retry_after: float):
+        body = json.dumps({
+            "error": {
+                "code": "HTTP_429",
+                "message": "Rate limit exceeded",
+                "type": "http_error"
+            }
+        }).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
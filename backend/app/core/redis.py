@@ -1,21 +1,72 @@
 import redis.asyncio as redis
-from typing import Optional, Any
+from contextlib import contextmanager
+from typing import AsyncIterator, Iterator, Optional, Any, Tuple
+import asyncio
 import json
 import structlog
 from app.core.config import settings
+from app.core.metrics import observe_redis
+from app.core.tracing import tracer
 
 logger = structlog.get_logger()
 
+# Delete a lock only if the caller still owns it, so an expired lock that was
+# re-acquired by another worker is not released by the original holder
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Token bucket refilled at ARGV[1] tokens/second up to ARGV[2] tokens. The
+# check, refill and decrement happen atomically in one round trip, using the
+# Redis clock so workers with skewed clocks share one notion of time. Floats
+# are returned as strings because Lua numbers are truncated to integers.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+@contextmanager
+def _observe(command: str) -> Iterator[None]:
+    """Trace and time one Redis round trip"""
+    with tracer.span(f"redis.{command}", {"db.system": "redis", "db.operation": command}):
+        with observe_redis(command):
+            yield
+
 class RedisClient:
     """Redis client wrapper with async support"""
     
     def __init__(self):
         self.redis: Optional[redis.Redis] = None
         self.connected = False
+        self._token_bucket = None  # registered lazily, bound to self.redis
     
     async def connect(self):
         """Connect to Redis"""
         try:
+            self._token_bucket = None
             self.redis = redis.from_url(
                 settings.REDIS_URL,
                 encoding="utf-8",
@@ -49,7 +100,8 @@ class RedisClient:
             return None
         
         try:
-            return await self.redis.get(key)
+            with _observe("GET"):
+                return await self.redis.get(key)
         except Exception as e:
             logger.error("Redis GET error", key=key, error=str(e))
             return None
@@ -65,7 +117,8 @@ class RedisClient:
             return False
         
         try:
-            await self.redis.set(key, value, ex=ex)
+            with _observe("SET"):
+                await self.redis.set(key, value, ex=ex)
             return True
         except Exception as e:
             logger.error("Redis SET error", key=key, error=str(e))
@@ -81,7 +134,8 @@ class RedisClient:
             return False
         
         try:
-            await self.redis.delete(key)
+            with _observe("DEL"):
+                await self.redis.delete(key)
             return True
         except Exception as e:
             logger.error("Redis DELETE error", key=key, error=str(e))
@@ -93,7 +147,8 @@ class RedisClient:
             return False
         
         try:
-            result = await self.redis.exists(key)
+            with _observe("EXISTS"):
+                result = await self.redis.exists(key)
             return bool(result)
         except Exception as e:
             logger.error("Redis EXISTS error", key=key, error=str(e))
@@ -105,7 +160,8 @@ class RedisClient:
             return False
         
         try:
-            await self.redis.ping()
+            with _observe("PING"):
+                await self.redis.ping()
             return True
         except Exception as e:
             logger.error("Redis PING error", error=str(e))
@@ -161,36 +217,107 @@ class RedisClient:
         """Delete cached value"""
         return await self.delete(f"cache:{key}")
     
+    # Pub/sub helpers
+    async def publish(self, channel: str, message: str) -> bool:
+        """Publish a message to a channel"""
+        if not self.connected or not self.redis:
+            return False
+        
+        try:
+            with _observe("PUBLISH"):
+                await self.redis.publish(channel, message)
+            return True
+        except Exception as e:
+            logger.error("Redis PUBLISH error", channel=channel, error=str(e))
+            return False
+    
+    async def listen(
+        self, 
+        channel: str, 
+        retry_interval: float = 5.0
+    ) -> AsyncIterator[str]:
+        """
+        Yield messages published to a channel, resubscribing after errors.
+        
+        Runs until cancelled; yields nothing while Redis is unavailable.
+        """
+        while True:
+            if not self.connected or not self.redis:
+                await asyncio.sleep(retry_interval)
+                continue
+            
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        yield message["data"]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Redis SUBSCRIBE error", channel=channel, error=str(e))
+                await asyncio.sleep(retry_interval)
+            finally:
+                await pubsub.aclose()
+    
+    # Distributed lock helpers
+    async def acquire_lock(self, key: str, token: str, ttl: float) -> bool:
+        """
+        Try to take ``key`` for ``ttl`` seconds, tagged with ``token``.
+        
+        Returns True when Redis is unavailable so callers degrade to
+        per-process behaviour instead of blocking.
+        """
+        if not self.connected or not self.redis:
+            return True
+        
+        try:
+            with _observe("SET"):
+                return bool(await self.redis.set(key, token, px=int(ttl * 1000), nx=True))
+        except Exception as e:
+            logger.error("Redis lock acquire error", key=key, error=str(e))
+            return True
+    
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release ``key`` only if it is still held by ``token``"""
+        if not self.connected or not self.redis:
+            return False
+        
+        try:
+            with _observe("EVAL"):
+                return bool(await self.redis.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.error("Redis lock release error", key=key, error=str(e))
+            return False
+    
     # Rate limiting helpers
-    async def rate_limit_check(
+    async def rate_limit_acquire(
         self, 
         key: str, 
-        limit: int, 
-        window: int
-    ) -> tuple[bool, int]:
+        rate: float, 
+        capacity: int
+    ) -> Optional[Tuple[bool, float, float]]:
         """
-        Check rate limit for a key
-        Returns (allowed, remaining_requests)
+        Take one token from the bucket at ``key`` in a single round trip.
+        
+        Returns ``(allowed, tokens_left, retry_after_seconds)``, or None when
+        Redis is unavailable so the caller can fall back to a local bucket.
         """
         if not self.connected or not self.redis:
-            return True, limit
+            return None
         
         try:
-            current = await self.redis.get(f"rate_limit:{key}")
-            if current is None:
-                await self.redis.setex(f"rate_limit:{key}", window, 1)
-                return True, limit - 1
-            
-            current_count = int(current)
-            if current_count >= limit:
-                return False, 0
-            
-            await self.redis.incr(f"rate_limit:{key}")
-            return True, limit - current_count - 1
-            
+            if self._token_bucket is None:
+                self._token_bucket = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+            with _observe("EVALSHA"):
+                allowed, tokens, retry_after = await self._token_bucket(
+                    keys=[f"rate_limit:{key}"], 
+                    args=[rate, capacity]
+                )
+            return bool(int(allowed)), float(tokens), float(retry_after)
         except Exception as e:
             logger.error("Rate limit check error", key=key, error=str(e))
-            return True, limit  # Allow on error
+            return None
     
     # Session helpers
     async def set_session(
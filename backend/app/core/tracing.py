@@ -0,0 +1,334 @@
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Union
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import structlog
+
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = structlog.get_logger()
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# W3C trace context: version-trace_id-parent_id-flags
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+REQUEST_ID_RE = re.compile(r"^[\w.:-]{1,128}$")
+
+# Statements are parameterised, so truncating them only drops long IN lists
+MAX_STATEMENT_LENGTH = 300
+
+AttributeValue = Union[str, int, float, bool]
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+class Span:
+    """
+    One timed operation, using OpenTelemetry's field names and id formats.
+
+    Spans of the same request share a ``trace_id`` and point at their parent
+    through ``parent_span_id``; the request's root span also keeps a per-name
+    breakdown of its descendants so one log line shows where the time went.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent: Optional["Span"] = None,
+        parent_span_id: Optional[str] = None,
+        attributes: Optional[Dict[str, AttributeValue]] = None
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_span_id = parent.span_id if parent else parent_span_id
+        self.root = parent.root if parent else self
+        self.attributes: Dict[str, AttributeValue] = dict(attributes or {})
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano: Optional[int] = None
+        self._started = time.perf_counter_ns()
+        self.breakdown: Dict[str, Dict[str, float]] = {}
+
+    @property
+    def is_recording(self) -> bool:
+        return self.end_time_unix_nano is None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time_unix_nano or self.start_time_unix_nano + time.perf_counter_ns() - self._started
+        return (end - self.start_time_unix_nano) / 1e6
+
+    def set_attribute(self, key: str, value: AttributeValue):
+        self.attributes[key] = value
+
+    def set_status(self, status: str, message: Optional[str] = None):
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException):
+        self.set_status("ERROR", str(exc) or type(exc).__name__)
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self):
+        """Stop the clock; further calls are ignored"""
+        if not self.is_recording:
+            return
+        self.end_time_unix_nano = self.start_time_unix_nano + time.perf_counter_ns() - self._started
+        if self.root is not self:
+            entry = self.root.breakdown.setdefault(self.name, {"count": 0, "ms": 0.0})
+            entry["count"] += 1
+            entry["ms"] = round(entry["ms"] + self.duration_ms, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+        }
+
+class NonRecordingSpan:
+    """Stand-in handed out while tracing is disabled"""
+    is_recording = False
+
+    def set_attribute(self, key: str, value: AttributeValue):
+        pass
+
+    def set_status(self, status: str, message: Optional[str] = None):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+NON_RECORDING_SPAN = NonRecordingSpan()
+
+class SpanExporter(Protocol):
+    def export(self, span: Span) -> None:
+        ...
+
+class InMemorySpanExporter:
+    """Keeps finished spans in a list, for tests"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_finished_spans(self) -> List[Span]:
+        return list(self.spans)
+
+    def clear(self):
+        self.spans.clear()
+
+class LogSpanExporter:
+    """Writes every finished span as a debug log line"""
+
+    def export(self, span: Span):
+        logger.debug("Span finished", **span.to_dict())
+
+class Tracer:
+    """Creates spans, tracks the active one per task and hands finished spans to exporters"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.exporters: List[SpanExporter] = []
+
+    def add_exporter(self, exporter: SpanExporter):
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: SpanExporter):
+        if exporter in self.exporters:
+            self.exporters.remove(exporter)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+        traceparent: Optional[str] = None
+    ) -> Union[Span, NonRecordingSpan]:
+        """
+        Start a span under the active one without activating it.
+
+        A span with no active parent starts a new trace, continuing the
+        caller's trace when a valid W3C ``traceparent`` is given.
+        """
+        if not self.enabled:
+            return NON_RECORDING_SPAN
+
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent=parent, attributes=attributes)
+
+        match = TRACEPARENT_RE.match(traceparent or "")
+        if match:
+            return Span(name, match.group(1), parent_span_id=match.group(2), attributes=attributes)
+        return Span(name, _new_trace_id(), attributes=attributes)
+
+    def finish(self, span: Union[Span, NonRecordingSpan]):
+        """End ``span`` and export it"""
+        if not span.is_recording:
+            return
+        span.end()
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.warning("Span export failed", exporter=type(exporter).__name__, error=str(e))
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, AttributeValue]] = None,
+        activate: bool = True,
+        traceparent: Optional[str] = None
+    ) -> Iterator[Union[Span, NonRecordingSpan]]:
+        """
+        Time the enclosed block as a span, recording any exception on it.
+
+        With ``activate`` the span becomes the parent of spans started inside
+        the block. Pass ``activate=False`` where the block is suspended and
+        resumed in another context, such as a generator dependency run in the
+        threadpool or an async generator consumed by a response.
+        """
+        span = self.start_span(name, attributes, traceparent)
+        token = _current_span.set(span) if activate and span.is_recording else None
+        try:
+            yield span
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            if token is not None:
+                _current_span.reset(token)
+            self.finish(span)
+
+tracer = Tracer(enabled=settings.TRACING_ENABLED)
+
+def instrument_engine(engine, name: str):
+    """Trace every statement ``engine`` executes as a ``db.query`` span"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query(conn, cursor, statement, parameters, context, executemany):
+        context._trace_span = tracer.start_span("db.query", {
+            "db.system": engine.dialect.name,
+            "db.engine": name,
+            "db.statement": statement[:MAX_STATEMENT_LENGTH],
+        })
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_query(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            tracer.finish(span)
+
+    @event.listens_for(engine, "handle_error")
+    def fail_query(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            tracer.finish(span)
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of each request.
+
+    The request id (taken from ``X-Request-ID`` or generated) and the trace id
+    are bound into structlog's context, so every log line written while the
+    request is handled carries both, and the id is echoed in the response.
+    When the request finishes, one log line summarises its span breakdown;
+    requests slower than ``TRACE_SLOW_REQUEST_MS`` log it at warning level.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_ms: Optional[float] = None):
+        self.app = app
+        self.slow_request_ms = settings.TRACE_SLOW_REQUEST_MS if slow_request_ms is None else slow_request_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, REQUEST_ID_HEADER.encode())
+        if not request_id or not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        method = scope["method"]
+        route = route_template(scope)
+        attributes = {
+            "http.method": method,
+            "http.route": route,
+            "http.target": scope["path"],
+            "http.request_id": request_id,
+        }
+        status_code = 500
+
+        async def send_with_request_id(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]
+                }
+            await send(message)
+
+        with tracer.span(
+            f"{method} {route}",
+            attributes,
+            traceparent=_header(scope, b"traceparent")
+        ) as span:
+            trace_id = getattr(span, "trace_id", None)
+            with structlog.contextvars.bound_contextvars(request_id=request_id, trace_id=trace_id):
+                try:
+                    await self.app(scope, receive, send_with_request_id)
+                finally:
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status("ERROR")
+
+        if not isinstance(span, Span):
+            return
+        log = logger.warning if span.duration_ms >= self.slow_request_ms else logger.debug
+        log(
+            "Request traced",
+            request_id=request_id,
+            trace_id=span.trace_id,
+            route=route,
+            status=status_code,
+            duration_ms=round(span.duration_ms, 3),
+            breakdown=span.breakdown
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -51,6 +51,15 @@ class QuizQuestion(Base):
 
 class UserQuizAttempt(Base):
     __tablename__ = "user_quiz_attempts"
+    __table_args__ = (
+        # A user's attempts at a quiz, newest first, paged by keyset on (completed_at, id);
+        # the included columns let Postgres serve a results page from the index alone
+        Index(
+            "ix_user_quiz_attempts_user_id_quiz_id_completed_at_id",
+            "user_id", "quiz_id", "completed_at", "id",
+            postgresql_include=["score", "passed", "time_taken"]
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
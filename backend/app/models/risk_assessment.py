@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 class RiskAssessment(Base):
     __tablename__ = "risk_assessments"
+    __table_args__ = (
+        # Newest unexpired assessment for a (type, target)
+        Index("ix_risk_assessments_type_target_expires_at", "type", "target", "expires_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     assessment_id = Column(String(100), unique=True, index=True, nullable=False)
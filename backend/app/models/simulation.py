@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, Float, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -33,8 +33,13 @@ class Simulation(Base):
 
 class UserSimulation(Base):
     __tablename__ = "user_simulations"
+    __table_args__ = (
+        # A user's history, newest first, paged by keyset on (completed_at, id)
+        Index("ix_user_simulations_user_id_completed_at_id", "user_id", "completed_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String(100), unique=True, index=True, nullable=True)  # simulation_id returned by /run
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     simulation_id = Column(Integer, ForeignKey("simulations.id"), nullable=False)
     
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import unicodedata
+import weakref
+from typing import Any, Dict, Generic, List, Optional, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+import structlog
+
+from app.core.local_cache import LocalTTLCache
+from app.core.redis import redis_client
+
+logger = structlog.get_logger()
+
+# Bump when the shape of any cached AI payload changes; old entries are then
+# simply never read again and expire on their own TTL.
+AI_CACHE_SCHEMA_VERSION = 1
+
+# Pub/sub channel used to evict entries from every worker's local tier
+AI_CACHE_INVALIDATION_CHANNEL = "ai-cache:invalidate"
+
+# Cached payload schemas
+class ExplanationResult(BaseModel):
+    text: str
+    examples: List[str]
+    next_steps: List[str]
+
+class QuizResult(BaseModel):
+    topic: str
+    difficulty: str
+    questions: List[Dict[str, Any]]
+    total_questions: int
+
+T = TypeVar("T", bound=BaseModel)
+
+def normalize_text(value: str) -> str:
+    """Normalize free text so trivially different spellings share a cache key"""
+    return " ".join(unicodedata.normalize("NFKC", value).casefold().split())
+
+def hash_key_parts(*parts: Any) -> str:
+    """Hash normalized key parts into a fixed-length, Redis-safe digest"""
+    raw = "\x1f".join(
+        normalize_text(part) if isinstance(part, str) else str(part)
+        for part in parts
+    )
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+class AICache(Generic[T]):
+    """
+    Two-tier JSON cache for AI results: an optional in-process LRU in front
+    of Redis.
+
+    Keys look like ``ai:<namespace>:v<schema>:<digest>``. Values are validated
+    against ``schema`` when read from Redis, so a payload that no longer
+    matches is treated as a miss instead of leaking a malformed dict to
+    callers. Local entries are evicted on every worker through Redis pub/sub
+    (see ``invalidate`` and ``listen_for_invalidations``) and otherwise live
+    for ``local_ttl`` seconds.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        schema: Type[T],
+        ttl: int,
+        version: int = AI_CACHE_SCHEMA_VERSION,
+        local_maxsize: int = 0,
+        local_ttl: float = 300.0
+    ):
+        self.namespace = namespace
+        self.schema = schema
+        self.ttl = ttl
+        self.version = version
+        self.local: LocalTTLCache[T] = LocalTTLCache(local_maxsize, min(local_ttl, ttl))
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        _registry.add(self)
+
+    def key(self, *parts: Any) -> str:
+        """Build the versioned cache key for ``parts``"""
+        return f"ai:{self.namespace}:v{self.version}:{hash_key_parts(*parts)}"
+
+    async def get(self, *parts: Any) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for ``parts``, or None on a miss"""
+        key = self.key(*parts)
+        
+        local_value = self.local.get(key)
+        if local_value is not None:
+            self.local_hits += 1
+            return local_value.model_dump()
+        
+        model = await self._read_redis(key)
+        if model is None:
+            self.misses += 1
+            return None
+
+        self.redis_hits += 1
+        self.local.set(key, model)
+        return model.model_dump()
+
+    async def peek(self, *parts: Any) -> Optional[Dict[str, Any]]:
+        """Like ``get`` but straight from Redis and without touching counters"""
+        model = await self._read_redis(self.key(*parts))
+        return model.model_dump() if model is not None else None
+
+    async def _read_redis(self, key: str) -> Optional[T]:
+        value = await redis_client.get_json(key)
+        if value is None:
+            return None
+
+        try:
+            return self.schema.model_validate(value)
+        except ValidationError as e:
+            logger.warning("Discarding invalid AI cache entry", key=key, error=str(e))
+            return None
+
+    async def set(self, value: Dict[str, Any], *parts: Any) -> bool:
+        """Validate and store ``value`` under ``parts`` in both tiers"""
+        key = self.key(*parts)
+        model = self.schema.model_validate(value)
+        self.local.set(key, model)
+        return await redis_client.set_json(key, model.model_dump(), ex=self.ttl)
+
+    async def invalidate(self, *parts: Any) -> bool:
+        """
+        Drop ``parts`` from Redis and from every worker's local tier.
+        
+        With no ``parts`` the local tier of this namespace is cleared
+        everywhere (Redis entries then age out on their TTL).
+        """
+        key = self.key(*parts) if parts else None
+        if key:
+            self.local.pop(key)
+            await redis_client.delete(key)
+        else:
+            self.local.clear()
+        
+        return await redis_client.publish(
+            AI_CACHE_INVALIDATION_CHANNEL,
+            json.dumps({"namespace": self.namespace, "key": key})
+        )
+
+    def evict_local(self, key: Optional[str] = None):
+        """Evict one key (or everything) from the local tier only"""
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.pop(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and hit ratios per tier"""
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "namespace": self.namespace,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "hits": hits,
+            "misses": self.misses,
+            "local_size": len(self.local),
+            "local_hit_ratio": self.local_hits / lookups if lookups else 0.0,
+            "redis_hit_ratio": self.redis_hits / lookups if lookups else 0.0,
+            "hit_ratio": hits / lookups if lookups else 0.0
+        }
+
+# Every live cache, so invalidation messages can reach their local tiers
+_registry: "weakref.WeakSet[AICache]" = weakref.WeakSet()
+
+def apply_invalidation(message: str):
+    """Apply one invalidation message to the local tiers in this process"""
+    try:
+        payload = json.loads(message)
+        namespace = payload["namespace"]
+        key = payload.get("key")
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring malformed AI cache invalidation", error=str(e))
+        return
+    
+    for cache in list(_registry):
+        if cache.namespace == namespace:
+            cache.evict_local(key)
+
+async def listen_for_invalidations():
+    """Background task: evict local entries invalidated by any worker"""
+    async for message in redis_client.listen(AI_CACHE_INVALIDATION_CHANNEL):
+        apply_invalidation(message)
@@ -1,24 +1,218 @@
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+import httpx
 import structlog
-from groq import Groq
+from groq import AsyncGroq
 
 from app.core.config import settings
-from app.core.redis import redis_client
+from app.core.metrics import observe_llm, record_llm_tokens
+from app.core.tracing import tracer
+from app.services.ai_cache import AICache, ExplanationResult, QuizResult, hash_key_parts
+from app.services.llm_usage import LLMUsageMeter
+from app.services.semantic_cache import SemanticIndex, normalize_concept
+from app.services.single_flight import SingleFlight
 
 logger = structlog.get_logger()
 
+EXPLAIN_SYSTEM_PROMPT = "You are Aya, a friendly and knowledgeable DeFi educator. Your goal is to make complex DeFi concepts accessible and understandable for everyone."
+CHAT_SYSTEM_PROMPT = "You are Aya, a friendly DeFi assistant focused on education and safety."
+
+# Rough English average, used when the upstream does not report token usage
+CHARS_PER_TOKEN = 4
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
 class AIService:
     """AI service for DeFi education and assistance"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY is required")
         
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        # One keep-alive pool per service instance; create the service once per
+        # process (see main.lifespan) so TLS sessions are reused across requests
+        self.http_client = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY
+            ),
+            timeout=settings.LLM_TIMEOUT
+        )
+        self.client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            base_url=settings.GROQ_API_URL,
+            timeout=settings.LLM_TIMEOUT,
+            max_retries=settings.LLM_MAX_RETRIES,
+            http_client=self.http_client
+        )
         self.model = settings.MODEL_NAME
         self.max_tokens = settings.MAX_TOKENS
         self.temperature = settings.TEMPERATURE
+        self.timeout = settings.LLM_TIMEOUT
+        
+        # Explanations are read far more often than quizzes, so they also get a
+        # per-worker LRU tier in front of Redis
+        self.explain_cache = AICache(
+            "explain",
+            ExplanationResult,
+            settings.AI_EXPLAIN_CACHE_TTL,
+            local_maxsize=settings.AI_LOCAL_CACHE_SIZE,
+            local_ttl=settings.AI_LOCAL_CACHE_TTL
+        )
+        self.quiz_cache = AICache("quiz", QuizResult, settings.AI_QUIZ_CACHE_TTL)
+        
+        # Fallback for explanations whose normalized concept misses exactly
+        self.concept_index = SemanticIndex(
+            threshold=settings.AI_SEMANTIC_CACHE_THRESHOLD,
+            maxsize=settings.AI_SEMANTIC_INDEX_SIZE
+        )
+        # Coalesce identical in-flight generations within and across workers
+        self.explain_flight = SingleFlight(
+            "explain",
+            lock_ttl=settings.AI_SINGLE_FLIGHT_LOCK_TTL,
+            wait_timeout=settings.AI_SINGLE_FLIGHT_WAIT
+        )
+        self.quiz_flight = SingleFlight(
+            "quiz",
+            lock_ttl=settings.AI_SINGLE_FLIGHT_LOCK_TTL,
+            wait_timeout=settings.AI_SINGLE_FLIGHT_WAIT
+        )
+        self.usage = LLMUsageMeter(
+            prompt_cost_per_1k=settings.LLM_PROMPT_COST_PER_1K_TOKENS,
+            completion_cost_per_1k=settings.LLM_COMPLETION_COST_PER_1K_TOKENS
+        )
+    
+    def cache_stats(self) -> List[Dict[str, Any]]:
+        """Hit/miss counters for every AI result cache"""
+        return [
+            self.explain_cache.stats(),
+            self.concept_index.stats(),
+            self.quiz_cache.stats()
+        ]
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """Upstream LLM calls, tokens and estimated spend over the last hour"""
+        return {
+            **self.usage.stats(),
+            "single_flight": [self.explain_flight.stats(), self.quiz_flight.stats()]
+        }
+    
+    async def close(self):
+        """Close pooled upstream connections"""
+        await self.client.close()
+    
+    async def _complete(
+        self,
+        system_prompt: str,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        Run a single chat completion without blocking the event loop.
+        
+        The call is bounded by ``timeout`` (defaults to ``LLM_TIMEOUT``) across
+        retries, and is cancelled cleanly if the awaiting task is cancelled.
+        """
+        with tracer.span("llm.complete", {"llm.model": self.model}) as span:
+            with observe_llm("complete"):
+                completion = await asyncio.wait_for(
+                    self.client.chat.completions.create(
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": system_prompt
+                            },
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        model=self.model,
+                        temperature=self.temperature if temperature is None else temperature,
+                        max_tokens=max_tokens or self.max_tokens
+                    ),
+                    timeout=timeout or self.timeout
+                )
+            text = completion.choices[0].message.content
+            
+            usage = getattr(completion, "usage", None)
+            if usage is not None and isinstance(usage.prompt_tokens, int):
+                self._record_usage(usage.prompt_tokens, usage.completion_tokens or 0, span)
+            else:
+                self._record_usage(
+                    _estimate_tokens(system_prompt + prompt), _estimate_tokens(text), span
+                )
+        return text
+    
+    def _record_usage(self, prompt_tokens: int, completion_tokens: int, span):
+        self.usage.record(prompt_tokens, completion_tokens)
+        record_llm_tokens(prompt_tokens, completion_tokens)
+        span.set_attribute("llm.prompt_tokens", prompt_tokens)
+        span.set_attribute("llm.completion_tokens", completion_tokens)
+    
+    async def _stream_complete(
+        self,
+        system_prompt: str,
+        prompt: str,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+        
+        ``timeout`` (defaults to ``LLM_TIMEOUT``) bounds the wait for the first
+        chunk and for each chunk after it, not the whole stream, so long
+        answers and slow consumers are not cut off; closing the generator
+        early (e.g. on client disconnect) releases the upstream connection.
+        """
+        budget = timeout or self.timeout
+        # Not activated: the generator is suspended between chunks, and spans
+        # started by the consumer meanwhile are not part of this call
+        with tracer.span("llm.stream", {"llm.model": self.model}, activate=False) as span:
+            with observe_llm("stream"):
+                async with asyncio.timeout(budget):
+                    stream = await self.client.chat.completions.create(
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": system_prompt
+                            },
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        model=self.model,
+                        temperature=self.temperature if temperature is None else temperature,
+                        max_tokens=max_tokens or self.max_tokens,
+                        stream=True
+                    )
+                completion_chars = 0
+                chunks = stream.__aiter__()
+                try:
+                    while True:
+                        # Only the upstream read is timed, never the consumer holding a yield
+                        async with asyncio.timeout(budget):
+                            chunk = await anext(chunks, None)
+                        if chunk is None:
+                            break
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            completion_chars += len(delta)
+                            yield delta
+                finally:
+                    await stream.close()
+                    # Stream chunks carry no usage block, so estimate spend
+                    self._record_usage(
+                        _estimate_tokens(system_prompt + prompt),
+                        completion_chars // CHARS_PER_TOKEN,
+                        span
+                    )
     
     async def explain_concept(
         self, 
@@ -29,70 +223,19 @@ class AIService:
         """Explain a DeFi concept in simple terms"""
         
         # Check cache first
-        cache_key = f"explain:{concept}:{user_level}:{include_example}"
-        cached_result = await redis_client.get(cache_key)
+        cached_result = await self._cached_explanation(concept, user_level, include_example)
         if cached_result:
-            return eval(cached_result)  # Note: In production, use json.loads
-        
-        level_prompts = {
-            "beginner": "Explain this like I'm completely new to DeFi and crypto. Use simple language and avoid jargon.",
-            "intermediate": "Explain this assuming I understand basic crypto concepts but am new to DeFi.",
-            "advanced": "Provide a detailed technical explanation with nuances and edge cases."
-        }
-        
-        prompt = f"""
-You are Aya, an expert DeFi educator helping users understand complex concepts simply.
-
-Task: Explain "{concept}" for a {user_level} user.
-
-Guidelines:
-- {level_prompts[user_level]}
-- Use analogies to real-world concepts when helpful
-- Break down complex ideas into digestible parts
-- {f'Include a practical example' if include_example else 'Focus on conceptual understanding'}
-- Highlight any risks or important considerations
-- Keep the explanation engaging and encouraging
-
-Format your response with:
-1. Simple Definition
-2. How It Works
-3. {'Practical Example' if include_example else 'Key Benefits'}
-4. Important Considerations/Risks
-5. Next Steps for Learning
-
-Concept to explain: {concept}
-"""
+            return cached_result
         
+        # Concurrent misses for the same concept share one upstream call
+        key = normalize_concept(concept)
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are Aya, a friendly and knowledgeable DeFi educator. Your goal is to make complex DeFi concepts accessible and understandable for everyone."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
+            return await self.explain_flight.do(
+                hash_key_parts(key, user_level, include_example),
+                lambda: self._generate_explanation(concept, user_level, include_example),
+                lambda: self.explain_cache.peek(key, user_level, include_example)
             )
             
-            explanation_text = completion.choices[0].message.content
-            
-            result = {
-                "text": explanation_text,
-                "examples": self._extract_examples(explanation_text) if include_example else [],
-                "next_steps": self._extract_next_steps(explanation_text)
-            }
-            
-            # Cache the result
-            await redis_client.setex(cache_key, 3600, str(result))  # Cache for 1 hour
-            
-            return result
-            
         except Exception as e:
             logger.error("Failed to explain concept", concept=concept, error=str(e))
             return {
@@ -101,6 +244,63 @@ Concept to explain: {concept}
                 "next_steps": ["Try asking about a different concept", "Check our lesson library"]
             }
     
+    async def _generate_explanation(
+        self,
+        concept: str,
+        user_level: str,
+        include_example: bool
+    ) -> Dict[str, Any]:
+        """Call the LLM for an explanation and cache the result"""
+        prompt = self._build_explain_prompt(concept, user_level, include_example)
+        explanation_text = await self._complete(EXPLAIN_SYSTEM_PROMPT, prompt)
+        result = self._explanation_result(explanation_text, include_example)
+        
+        # Cache the result
+        await self._store_explanation(result, concept, user_level, include_example)
+        
+        return result
+    
+    async def stream_explain_concept(
+        self,
+        concept: str,
+        user_level: str = "beginner",
+        include_example: bool = True
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream an explanation as ``("token", {...})`` events followed by a
+        trailing ``("done", {...})`` event carrying examples and next steps
+        """
+        cached_result = await self._cached_explanation(concept, user_level, include_example)
+        if cached_result:
+            yield "token", {"text": cached_result["text"]}
+            yield "done", {
+                "examples": cached_result["examples"],
+                "next_steps": cached_result["next_steps"]
+            }
+            return
+        
+        prompt = self._build_explain_prompt(concept, user_level, include_example)
+        parts: List[str] = []
+        
+        try:
+            async for delta in self._stream_complete(EXPLAIN_SYSTEM_PROMPT, prompt):
+                parts.append(delta)
+                yield "token", {"text": delta}
+        except Exception as e:
+            logger.error("Failed to stream explanation", concept=concept, error=str(e))
+            yield "error", {
+                "message": f"I apologize, but I'm having trouble explaining '{concept}' right now. Please try again in a moment."
+            }
+            return
+        
+        result = self._explanation_result("".join(parts), include_example)
+        await self._store_explanation(result, concept, user_level, include_example)
+        
+        yield "done", {
+            "examples": result["examples"],
+            "next_steps": result["next_steps"]
+        }
+    
     async def generate_quiz(
         self, 
         topic: str, 
@@ -109,11 +309,28 @@ Concept to explain: {concept}
     ) -> Dict[str, Any]:
         """Generate an interactive quiz on a DeFi topic"""
         
-        cache_key = f"quiz:{topic}:{difficulty}:{question_count}"
-        cached_result = await redis_client.get(cache_key)
+        cached_result = await self.quiz_cache.get(topic, difficulty, question_count)
         if cached_result:
-            return eval(cached_result)
+            return cached_result
         
+        try:
+            return await self.quiz_flight.do(
+                hash_key_parts(topic, difficulty, question_count),
+                lambda: self._generate_quiz(topic, difficulty, question_count),
+                lambda: self.quiz_cache.peek(topic, difficulty, question_count)
+            )
+            
+        except Exception as e:
+            logger.error("Failed to generate quiz", topic=topic, error=str(e))
+            return self._get_fallback_quiz(topic, difficulty, question_count)
+    
+    async def _generate_quiz(
+        self,
+        topic: str,
+        difficulty: str,
+        question_count: int
+    ) -> Dict[str, Any]:
+        """Call the LLM for a quiz and cache the result"""
         prompt = f"""
 Create a {difficulty} level quiz about "{topic}" in DeFi with exactly {question_count} multiple choice questions.
 
@@ -140,86 +357,39 @@ Number of questions: {question_count}
 Return only valid JSON array of questions.
 """
         
-        try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert DeFi educator creating educational quizzes. Focus on practical knowledge that helps users make better decisions. Return only valid JSON."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            quiz_text = completion.choices[0].message.content
-            
-            # Parse the quiz (simplified - in production, use proper JSON parsing)
-            questions = self._parse_quiz_questions(quiz_text, topic, difficulty, question_count)
-            
-            result = {
-                "topic": topic,
-                "difficulty": difficulty,
-                "questions": questions,
-                "total_questions": len(questions)
-            }
-            
-            # Cache the result
-            await redis_client.setex(cache_key, 7200, str(result))  # Cache for 2 hours
-            
-            return result
-            
-        except Exception as e:
-            logger.error("Failed to generate quiz", topic=topic, error=str(e))
-            return self._get_fallback_quiz(topic, difficulty, question_count)
+        quiz_text = await self._complete(
+            "You are an expert DeFi educator creating educational quizzes. Focus on practical knowledge that helps users make better decisions. Return only valid JSON.",
+            prompt,
+            temperature=0.7,
+            max_tokens=2000
+        )
+        
+        # Parse the quiz (simplified - in production, use proper JSON parsing)
+        questions = self._parse_quiz_questions(quiz_text, topic, difficulty, question_count)
+        
+        result = {
+            "topic": topic,
+            "difficulty": difficulty,
+            "questions": questions,
+            "total_questions": len(questions)
+        }
+        
+        # Cache the result
+        await self.quiz_cache.set(result, topic, difficulty, question_count)
+        
+        return result
     
     async def chat(self, message: str, context: str = "") -> Dict[str, Any]:
         """Chat with AI assistant about DeFi topics"""
         
-        prompt = f"""
-You are Aya, a helpful DeFi assistant. The user is asking: "{message}"
-
-Context about the user:
-{context}
-
-Guidelines:
-- Provide helpful, accurate information about DeFi
-- Keep responses conversational and encouraging
-- If the question is about risks, be honest but not discouraging
-- Suggest practical next steps when appropriate
-- If you're unsure, admit it and suggest resources
-
-Respond in a friendly, helpful manner.
-"""
+        prompt = self._build_chat_prompt(message, context)
         
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are Aya, a friendly DeFi assistant focused on education and safety."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens
-            )
-            
-            response_text = completion.choices[0].message.content
+            response_text = await self._complete(CHAT_SYSTEM_PROMPT, prompt)
             
             return {
                 "text": response_text,
-                "suggestions": self._extract_suggestions(response_text),
-                "related_topics": self._extract_related_topics(message)
+                **self._chat_metadata(response_text, message)
             }
             
         except Exception as e:
@@ -230,6 +400,31 @@ Respond in a friendly, helpful manner.
                 "related_topics": []
             }
     
+    async def stream_chat(
+        self,
+        message: str,
+        context: str = ""
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream a chat reply as ``("token", {...})`` events followed by a
+        trailing ``("done", {...})`` event carrying suggestions and topics
+        """
+        prompt = self._build_chat_prompt(message, context)
+        parts: List[str] = []
+        
+        try:
+            async for delta in self._stream_complete(CHAT_SYSTEM_PROMPT, prompt):
+                parts.append(delta)
+                yield "token", {"text": delta}
+        except Exception as e:
+            logger.error("Failed to stream chat", message=message, error=str(e))
+            yield "error", {
+                "message": "I'm having trouble processing your question right now. Please try again in a moment."
+            }
+            return
+        
+        yield "done", self._chat_metadata("".join(parts), message)
+    
     async def generate_learning_path(
         self, 
         user_level: str, 
@@ -299,6 +494,117 @@ Respond in a friendly, helpful manner.
             "educational_notes": ["This is a basic swap transaction", "Gas fees will apply"]
         }
     
+    async def _cached_explanation(
+        self,
+        concept: str,
+        user_level: str,
+        include_example: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up an explanation by normalized concept, falling back to the
+        nearest previously answered concept above the similarity threshold
+        """
+        key = normalize_concept(concept)
+        cached_result = await self.explain_cache.get(key, user_level, include_example)
+        if cached_result:
+            return cached_result
+        
+        scope = (user_level, include_example)
+        match = self.concept_index.nearest(scope, key)
+        if not match:
+            return None
+        
+        neighbour, similarity = match
+        cached_result = await self.explain_cache.get(neighbour, user_level, include_example)
+        if not cached_result:
+            # The neighbour's answer expired; stop offering it
+            self.concept_index.discard(scope, neighbour)
+            return None
+        
+        logger.info(
+            "Semantic cache hit",
+            concept=key,
+            neighbour=neighbour,
+            similarity=round(similarity, 3)
+        )
+        return cached_result
+    
+    async def _store_explanation(
+        self,
+        result: Dict[str, Any],
+        concept: str,
+        user_level: str,
+        include_example: bool
+    ):
+        """Cache an explanation and index its concept for similarity lookups"""
+        key = normalize_concept(concept)
+        await self.explain_cache.set(result, key, user_level, include_example)
+        self.concept_index.add((user_level, include_example), key)
+    
+    def _build_explain_prompt(self, concept: str, user_level: str, include_example: bool) -> str:
+        """Build the user prompt for a concept explanation"""
+        level_prompts = {
+            "beginner": "Explain this like I'm completely new to DeFi and crypto. Use simple language and avoid jargon.",
+            "intermediate": "Explain this assuming I understand basic crypto concepts but am new to DeFi.",
+            "advanced": "Provide a detailed technical explanation with nuances and edge cases."
+        }
+        
+        return f"""
+You are Aya, an expert DeFi educator helping users understand complex concepts simply.
+
+Task: Explain "{concept}" for a {user_level} user.
+
+Guidelines:
+- {level_prompts[user_level]}
+- Use analogies to real-world concepts when helpful
+- Break down complex ideas into digestible parts
+- {f'Include a practical example' if include_example else 'Focus on conceptual understanding'}
+- Highlight any risks or important considerations
+- Keep the explanation engaging and encouraging
+
+Format your response with:
+1. Simple Definition
+2. How It Works
+3. {'Practical Example' if include_example else 'Key Benefits'}
+4. Important Considerations/Risks
+5. Next Steps for Learning
+
+Concept to explain: {concept}
+"""
+    
+    def _build_chat_prompt(self, message: str, context: str) -> str:
+        """Build the user prompt for a chat message"""
+        return f"""
+You are Aya, a helpful DeFi assistant. The user is asking: "{message}"
+
+Context about the user:
+{context}
+
+Guidelines:
+- Provide helpful, accurate information about DeFi
+- Keep responses conversational and encouraging
+- If the question is about risks, be honest but not discouraging
+- Suggest practical next steps when appropriate
+- If you're unsure, admit it and suggest resources
+
+Respond in a friendly, helpful manner.
+"""
+    
+    def _explanation_result(self, text: str, include_example: bool) -> Dict[str, Any]:
+        """Assemble an explanation result from the completion text"""
+        return {
+            "text": text,
+            "examples": self._extract_examples(text) if include_example else [],
+            "next_steps": self._extract_next_steps(text)
+        }
+    
+    def _chat_metadata(self, text: str, message: str) -> Dict[str, Any]:
+        """Derive suggestions and related topics for a chat reply"""
+        return {
+            "suggestions": self._extract_suggestions(text),
+            "related_topics": self._extract_related_topics(message)
+        }
+    
     def _extract_examples(self, text: str) -> List[str]:
         """Extract examples from explanation text"""
         # Simplified extraction - in production, use NLP
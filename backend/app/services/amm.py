@@ -0,0 +1,276 @@
+import math
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+TICK_BASE = 1.0001
+MIN_TICK = -887272
+MAX_TICK = 887272
+
+# Reference pools, keyed by token pair: (TVL in USD, fee tier). Other pairs
+# get a thin default pool so size still moves the price.
+REFERENCE_POOLS = {
+    frozenset({"ETH", "USDC"}): (450e6, 0.0005),
+    frozenset({"USDC", "USDT"}): (320e6, 0.0001),
+    frozenset({"ETH", "WBTC"}): (280e6, 0.003),
+}
+DEFAULT_POOL = (5e6, 0.003)
+TOKEN_ALIASES = {"WETH": "ETH"}
+
+# Concentrated pools: (lower/spot, upper/spot, share of TVL); None is full range
+LIQUIDITY_PROFILE = (
+    (0.95, 1.05, 0.5),
+    (0.80, 1.25, 0.3),
+    (None, None, 0.2),
+)
+TICK_SPACINGS = {0.0001: 1, 0.0005: 10, 0.003: 60, 0.01: 200}
+
+def tick_to_sqrt_price(tick: ArrayLike) -> np.ndarray:
+    return np.power(TICK_BASE, np.asarray(tick, dtype=float) / 2)
+
+def price_to_tick(price: float, spacing: int = 1) -> int:
+    """The initialisable tick at or below ``price``"""
+    tick = math.floor(math.log(price) / math.log(TICK_BASE))
+    return max(MIN_TICK, min(MAX_TICK, tick // spacing * spacing))
+
+def amounts_for_liquidity(sqrt_price: float, sqrt_lower: float, sqrt_upper: float, liquidity: float) -> Tuple[float, float]:
+    """Token0 and token1 held by ``liquidity`` over [lower, upper] at ``sqrt_price``"""
+    current = min(max(sqrt_price, sqrt_lower), sqrt_upper)
+    amount0 = liquidity * (1 / current - 1 / sqrt_upper)
+    amount1 = liquidity * (current - sqrt_lower)
+    return amount0, amount1
+
+def liquidity_for_amount0(sqrt_price: float, sqrt_lower: float, sqrt_upper: float, amount0: float) -> float:
+    """Liquidity a deposit of ``amount0`` token0 provides; the range must reach above the price"""
+    current = max(sqrt_price, sqrt_lower)
+    return amount0 / (1 / current - 1 / sqrt_upper)
+
+def range_sqrt_bounds(width_pct: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """sqrt-price bounds of a ``±width_pct`` range, relative to the current price; NaN is full range"""
+    width = np.asarray(width_pct, dtype=float) / 100
+    full = np.isnan(width)
+    lower = np.where(full, 0.0, np.sqrt(np.clip(1 - width, 0.0, None)))
+    upper = np.where(full, np.inf, np.sqrt(1 + width))
+    return lower, upper
+
+def position_value(price_ratio: ArrayLike, sqrt_lower: ArrayLike, sqrt_upper: ArrayLike) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Value of a range position, and of holding its deposit instead, after the
+    price moves by ``price_ratio``.
+
+    Bounds are relative sqrt prices (see ``range_sqrt_bounds``) and both
+    values are per unit of initial value, in token1. Inputs broadcast, so a
+    grid of ranges by price moves is one call.
+    """
+    price_ratio = np.asarray(price_ratio, dtype=float)
+    sqrt_lower = np.asarray(sqrt_lower, dtype=float)
+    sqrt_upper = np.asarray(sqrt_upper, dtype=float)
+    current = np.clip(np.sqrt(price_ratio), sqrt_lower, sqrt_upper)
+    amount0, amount1 = 1 - 1 / sqrt_upper, 1 - sqrt_lower
+    initial = amount0 + amount1
+    value = ((1 / current - 1 / sqrt_upper) * price_ratio + current - sqrt_lower) / initial
+    hold = (amount0 * price_ratio + amount1) / initial
+    return value, hold
+
+@dataclass(frozen=True)
+class SwapQuote:
+    """Quotes for a batch of input amounts; every field is an array of the batch's shape"""
+    amount_in: np.ndarray
+    filled: np.ndarray  # input actually consumed; less than amount_in when liquidity runs out
+    amount_out: np.ndarray
+    spot_price: float  # output per input before the trade
+    fee: float
+
+    @property
+    def execution_price(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.filled > 0, self.amount_out / self.filled, self.spot_price)
+
+    @property
+    def price_impact(self) -> np.ndarray:
+        """Shortfall against the spot price, excluding the pool fee"""
+        return 1 - self.execution_price / (self.spot_price * (1 - self.fee))
+
+    def minimum_received(self, slippage_pct: float) -> np.ndarray:
+        return self.amount_out * (1 - slippage_pct / 100)
+
+class ConstantProductPool:
+    """Uniswap V2-style ``x * y = k`` pool of token0/token1 reserves"""
+
+    def __init__(self, reserve0: float, reserve1: float, fee: float = 0.003):
+        self.reserve0 = reserve0
+        self.reserve1 = reserve1
+        self.fee = fee
+
+    @property
+    def spot_price(self) -> float:
+        """Token1 per token0"""
+        return self.reserve1 / self.reserve0
+
+    @property
+    def active_liquidity(self) -> float:
+        """``sqrt(x * y)``, comparable with a concentrated pool's in-range liquidity"""
+        return math.sqrt(self.reserve0 * self.reserve1)
+
+    def quote(self, amount_in: ArrayLike, zero_for_one: bool = True) -> SwapQuote:
+        amount_in = np.asarray(amount_in, dtype=float)
+        reserve_in, reserve_out = (self.reserve0, self.reserve1) if zero_for_one else (self.reserve1, self.reserve0)
+        effective = amount_in * (1 - self.fee)
+        return SwapQuote(
+            amount_in=amount_in,
+            filled=amount_in,
+            amount_out=effective * reserve_out / (reserve_in + effective),
+            spot_price=reserve_out / reserve_in,
+            fee=self.fee,
+        )
+
+class ConcentratedLiquidityPool:
+    """
+    Uniswap V3-style pool: liquidity positions over tick ranges.
+
+    Positions are flattened once into price segments of constant active
+    liquidity. Within a segment the swap math is closed-form (``dx = L *
+    d(1/sqrt P)``, ``dy = L * d(sqrt P)``), so a quote is a ``searchsorted``
+    over the cumulative input needed to reach each initialised tick plus
+    one partial segment. Quoting any number of amounts is a single
+    vectorised call.
+    """
+
+    def __init__(self, sqrt_price: float, positions: Sequence[Tuple[int, int, float]], fee: float = 0.003):
+        self.sqrt_price = sqrt_price
+        self.fee = fee
+        ticks = sorted({tick for lower, upper, _ in positions for tick in (lower, upper)})
+        self.boundaries = tick_to_sqrt_price(ticks)
+        # liquidity[i] is active between boundaries[i] and boundaries[i + 1]
+        net = np.zeros(len(ticks))
+        index = {tick: i for i, tick in enumerate(ticks)}
+        for lower, upper, liquidity in positions:
+            net[index[lower]] += liquidity
+            net[index[upper]] -= liquidity
+        self.liquidity = np.cumsum(net)[:-1]
+        self._downward = self._segments(zero_for_one=True)
+        self._upward = self._segments(zero_for_one=False)
+
+    @property
+    def spot_price(self) -> float:
+        """Token1 per token0"""
+        return self.sqrt_price ** 2
+
+    @property
+    def active_liquidity(self) -> float:
+        position = np.searchsorted(self.boundaries, self.sqrt_price, side="right") - 1
+        if 0 <= position < len(self.liquidity):
+            return float(self.liquidity[position])
+        return 0.0
+
+    def _segments(self, zero_for_one: bool) -> Tuple[np.ndarray, ...]:
+        """Start price, liquidity and cumulative input/output at the start of each segment the price crosses"""
+        if zero_for_one:
+            # Price falls from the current price through each boundary below it
+            below = self.boundaries[self.boundaries < self.sqrt_price][::-1]
+            starts = np.concatenate(([self.sqrt_price], below))
+            ends = np.concatenate((below, [self.boundaries[0]]))
+            liquidity = self._liquidity_between(ends, starts)
+            step_in = liquidity * (1 / ends - 1 / starts)
+            step_out = liquidity * (starts - ends)
+        else:
+            above = self.boundaries[self.boundaries > self.sqrt_price]
+            starts = np.concatenate(([self.sqrt_price], above))
+            ends = np.concatenate((above, [self.boundaries[-1]]))
+            liquidity = self._liquidity_between(starts, ends)
+            step_in = liquidity * (ends - starts)
+            step_out = liquidity * (1 / starts - 1 / ends)
+        cumulative_in = np.concatenate(([0.0], np.cumsum(step_in)))
+        cumulative_out = np.concatenate(([0.0], np.cumsum(step_out)))
+        return starts, liquidity, cumulative_in, cumulative_out
+
+    def _liquidity_between(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Active liquidity on each (low, high) interval of sqrt prices"""
+        midpoints = (low + high) / 2
+        position = np.searchsorted(self.boundaries, midpoints, side="right") - 1
+        valid = (position >= 0) & (position < len(self.liquidity)) & (high > low)
+        return np.where(valid, self.liquidity[np.clip(position, 0, len(self.liquidity) - 1)], 0.0)
+
+    def quote(self, amount_in: ArrayLike, zero_for_one: bool = True) -> SwapQuote:
+        amount_in = np.asarray(amount_in, dtype=float)
+        starts, liquidity, cumulative_in, cumulative_out = self._downward if zero_for_one else self._upward
+        effective = amount_in * (1 - self.fee)
+        capacity = cumulative_in[-1]
+
+        capped = np.minimum(effective, capacity)
+        # Skip empty segments (gaps between positions cost no input)
+        segment = np.clip(np.searchsorted(cumulative_in, capped, side="right") - 1, 0, len(starts) - 1)
+        remaining = capped - cumulative_in[segment]
+        active = liquidity[segment]
+        start = starts[segment]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if zero_for_one:
+                end = 1 / (1 / start + remaining / active)
+                partial = active * (start - end)
+            else:
+                end = start + remaining / active
+                partial = active * (1 / start - 1 / end)
+        partial = np.where(active > 0, partial, 0.0)
+        amount_out = cumulative_out[segment] + partial
+
+        return SwapQuote(
+            amount_in=amount_in,
+            filled=np.where(effective > capacity, capacity / (1 - self.fee), amount_in),
+            amount_out=amount_out,
+            spot_price=self.spot_price if zero_for_one else 1 / self.spot_price,
+            fee=self.fee,
+        )
+
+    @classmethod
+    def from_tvl(
+        cls,
+        price: float,
+        tvl_token1: float,
+        fee: float = 0.003,
+        profile: Sequence[Tuple[Optional[float], Optional[float], float]] = LIQUIDITY_PROFILE
+    ) -> "ConcentratedLiquidityPool":
+        """
+        A pool at ``price`` (token1 per token0) holding ``tvl_token1`` of value,
+        spread over ranges given as multiples of the price.
+        """
+        spacing = TICK_SPACINGS.get(fee, 60)
+        sqrt_price = math.sqrt(price)
+        positions = []
+        for low, high, share in profile:
+            lower = price_to_tick(price * low, spacing) if low else MIN_TICK // spacing * spacing
+            upper = price_to_tick(price * high, spacing) + spacing if high else MAX_TICK // spacing * spacing
+            sqrt_lower, sqrt_upper = float(tick_to_sqrt_price(lower)), float(tick_to_sqrt_price(upper))
+            amount0, amount1 = amounts_for_liquidity(sqrt_price, sqrt_lower, sqrt_upper, 1.0)
+            positions.append((lower, upper, share * tvl_token1 / (amount0 * price + amount1)))
+        return cls(sqrt_price, positions, fee)
+
+def quote_ladder(
+    pool: Union[ConstantProductPool, ConcentratedLiquidityPool],
+    max_amount: float,
+    steps: int = 200,
+    zero_for_one: bool = True
+) -> SwapQuote:
+    """Quotes for ``steps`` evenly spaced sizes up to ``max_amount``, in one call"""
+    return pool.quote(np.linspace(max_amount / steps, max_amount, steps), zero_for_one)
+
+def reference_pool(
+    protocol: str,
+    token_in: str,
+    token_out: str,
+    price_in_usd: float,
+    price_out_usd: float
+) -> Union[ConstantProductPool, ConcentratedLiquidityPool]:
+    """
+    A pool with ``token_in`` as token0, sized from ``REFERENCE_POOLS``.
+
+    Uniswap pools concentrate liquidity around the price per
+    ``LIQUIDITY_PROFILE``; other protocols get a constant-product pool.
+    """
+    pair = frozenset(TOKEN_ALIASES.get(token.upper(), token.upper()) for token in (token_in, token_out))
+    tvl_usd, fee = REFERENCE_POOLS.get(pair, DEFAULT_POOL)
+    price = price_in_usd / price_out_usd
+    if protocol.lower() == "uniswap":
+        return ConcentratedLiquidityPool.from_tvl(price, tvl_usd / price_out_usd, fee)
+    return ConstantProductPool(tvl_usd / 2 / price_in_usd, tvl_usd / 2 / price_out_usd, fee)
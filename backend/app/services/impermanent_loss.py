@@ -0,0 +1,141 @@
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+from app.core.config import settings
+from app.services.amm import position_value, range_sqrt_bounds, reference_pool
+from app.services.simulation_engine import token_price
+
+# Price moves of token_a against token_b covered by the curve, log-spaced
+PRICE_RATIO_BOUNDS = (0.1, 10.0)
+CURVE_POINTS = 801
+
+# Break-even grid: ``±%`` range widths (None is full range) by price moves (%)
+GRID_RANGES_PCT = (None, 50.0, 25.0, 10.0, 5.0, 2.0)
+GRID_PRICE_MOVES_PCT = (-50.0, -25.0, -10.0, -5.0, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+DAYS_PER_YEAR = 365
+
+@dataclass(frozen=True)
+class ImpermanentLossProfile:
+    """Impermanent loss and break-even fee APY for one pool and range"""
+    protocol: str
+    token_a: str
+    token_b: str
+    range_pct: Optional[float]
+    pool_fee: float
+    spot_price: float  # token_b per token_a
+    horizon_days: int
+    price_ratio: np.ndarray
+    impermanent_loss: np.ndarray  # position value vs holding, as a fraction
+    break_even_fee_apy: np.ndarray  # percent, to earn back the loss over the horizon
+    move_impermanent_loss: np.ndarray  # at GRID_PRICE_MOVES_PCT
+    move_break_even_fee_apy: np.ndarray
+    grid_impermanent_loss: np.ndarray  # GRID_RANGES_PCT x GRID_PRICE_MOVES_PCT
+    grid_break_even_fee_apy: np.ndarray
+
+    def at_moves(self) -> Dict[str, Any]:
+        """This range at the grid's price moves, for the simulation result"""
+        return {
+            "range_pct": self.range_pct,
+            "horizon_days": self.horizon_days,
+            "points": [
+                {
+                    "price_move_pct": move,
+                    "impermanent_loss_pct": round(float(loss) * 100, 4),
+                    "break_even_fee_apy": round(float(apy), 4),
+                }
+                for move, loss, apy in zip(
+                    GRID_PRICE_MOVES_PCT, self.move_impermanent_loss, self.move_break_even_fee_apy
+                )
+            ],
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "protocol": self.protocol,
+            "token_a": self.token_a,
+            "token_b": self.token_b,
+            "range_pct": self.range_pct,
+            "pool_fee": self.pool_fee,
+            "spot_price": self.spot_price,
+            "horizon_days": self.horizon_days,
+            "curve": {
+                "price_ratio": np.round(self.price_ratio, 6).tolist(),
+                "price": np.round(self.price_ratio * self.spot_price, 6).tolist(),
+                "impermanent_loss_pct": np.round(self.impermanent_loss * 100, 4).tolist(),
+                "break_even_fee_apy": np.round(self.break_even_fee_apy, 4).tolist(),
+            },
+            "grid": {
+                "ranges_pct": list(GRID_RANGES_PCT),
+                "price_moves_pct": list(GRID_PRICE_MOVES_PCT),
+                "impermanent_loss_pct": np.round(self.grid_impermanent_loss * 100, 4).tolist(),
+                "break_even_fee_apy": np.round(self.grid_break_even_fee_apy, 4).tolist(),
+            },
+        }
+
+def impermanent_loss_surface(
+    ranges_pct: np.ndarray,
+    price_ratios: np.ndarray,
+    horizon_days: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Impermanent loss and break-even fee APY for every range by every price ratio.
+
+    ``ranges_pct`` uses NaN for full range. The break-even APY is the fee
+    income, as a yearly percentage of the deposit, that makes the position
+    worth as much as holding after ``horizon_days``.
+    """
+    sqrt_lower, sqrt_upper = range_sqrt_bounds(np.asarray(ranges_pct, dtype=float)[:, None])
+    value, hold = position_value(np.asarray(price_ratios, dtype=float)[None, :], sqrt_lower, sqrt_upper)
+    loss = value / hold - 1
+    break_even = (hold - value) * DAYS_PER_YEAR / horizon_days * 100
+    return loss, break_even
+
+@lru_cache(maxsize=256)
+def _profile(protocol: str, token_a: str, token_b: str, range_pct: Optional[float], horizon_days: int) -> ImpermanentLossProfile:
+    pool = reference_pool(protocol, token_a, token_b, token_price(token_a), token_price(token_b))
+    curve_ratios = np.geomspace(*PRICE_RATIO_BOUNDS, CURVE_POINTS)
+    grid_ratios = 1 + np.asarray(GRID_PRICE_MOVES_PCT) / 100
+    ranges = [math.nan if width is None else width for width in (range_pct, *GRID_RANGES_PCT)]
+
+    # One broadcast over every range and both sets of price ratios
+    loss, break_even = impermanent_loss_surface(
+        np.asarray(ranges), np.concatenate((curve_ratios, grid_ratios)), horizon_days
+    )
+    for array in (curve_ratios, loss, break_even):
+        array.setflags(write=False)
+    return ImpermanentLossProfile(
+        protocol=protocol,
+        token_a=token_a,
+        token_b=token_b,
+        range_pct=range_pct,
+        pool_fee=pool.fee,
+        spot_price=pool.spot_price,
+        horizon_days=horizon_days,
+        price_ratio=curve_ratios,
+        impermanent_loss=loss[0, :CURVE_POINTS],
+        break_even_fee_apy=break_even[0, :CURVE_POINTS],
+        move_impermanent_loss=loss[0, CURVE_POINTS:],
+        move_break_even_fee_apy=break_even[0, CURVE_POINTS:],
+        grid_impermanent_loss=loss[1:, CURVE_POINTS:],
+        grid_break_even_fee_apy=break_even[1:, CURVE_POINTS:],
+    )
+
+def impermanent_loss_profile(
+    protocol: str,
+    token_a: str,
+    token_b: str,
+    range_pct: Optional[float] = None,
+    horizon_days: Optional[int] = None
+) -> ImpermanentLossProfile:
+    """The profile for a pool and range, cached by ``(pool, range, horizon)``; ValueError for unknown tokens"""
+    return _profile(
+        protocol.lower(),
+        token_a.upper(),
+        token_b.upper(),
+        None if range_pct is None else float(range_pct),
+        horizon_days or settings.SIMULATION_HORIZON_DAYS,
+    )
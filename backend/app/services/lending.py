@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import structlog
+
+from app.models.simulation import Simulation, UserSimulation
+from app.services.simulation_engine import BORROW_LTV, default_collateral, token_price
+
+logger = structlog.get_logger()
+
+# Aave V3-style reserves: (max LTV, liquidation threshold, liquidation bonus,
+# supply APY %, borrow APY %)
+RESERVE_PARAMS = {
+    "ETH": (0.80, 0.825, 0.05, 2.0, 2.8),
+    "WETH": (0.80, 0.825, 0.05, 2.0, 2.8),
+    "STETH": (0.69, 0.795, 0.07, 0.1, 0.5),
+    "BTC": (0.70, 0.75, 0.065, 0.1, 0.6),
+    "WBTC": (0.70, 0.75, 0.065, 0.1, 0.6),
+    "USDC": (0.77, 0.80, 0.045, 3.5, 5.2),
+    "USDT": (0.74, 0.76, 0.045, 3.4, 5.0),
+    "DAI": (0.75, 0.77, 0.05, 3.3, 5.0),
+    "AAVE": (0.66, 0.73, 0.075, 0.0, 0.0),
+    "UNI": (0.65, 0.77, 0.10, 0.1, 1.0),
+    "COMP": (0.55, 0.65, 0.08, 0.2, 2.0),
+    "CRV": (0.35, 0.41, 0.083, 0.5, 8.0),
+    "LDO": (0.40, 0.50, 0.09, 0.0, 0.0),
+    "MKR": (0.65, 0.70, 0.085, 0.0, 0.5),
+}
+UNKNOWN_RESERVE = (0.0, 0.0, 0.10, 0.0, 0.0)  # not accepted as collateral
+
+BORROW_RATE_DRIFT = 2.0  # percentage points a year the borrow APY is assumed to rise
+DAYS_PER_YEAR = 365
+
+@dataclass(frozen=True)
+class LendingPosition:
+    """Token amounts supplied as collateral and borrowed"""
+    collateral: Dict[str, float]
+    debt: Dict[str, float]
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, Any]) -> "LendingPosition":
+        """
+        A position from borrow simulation parameters.
+
+        Accepts run requests (``token_a``/``amount`` borrowed, optional
+        ``collateral`` mapping or ``token_b`` collateral) and the catalog's
+        ``borrow_token``/``collateral_token`` defaults. Collateral without an
+        amount is sized at ``BORROW_LTV``, as in the Monte Carlo run.
+        """
+        debt_token = (params.get("borrow_token") or params.get("token_a") or "").upper()
+        debt_amount = float(params.get("borrow_amount") or params.get("amount") or 0)
+        if not debt_token or debt_amount <= 0:
+            raise ValueError("Borrow position needs a token and a positive amount")
+        debt = {debt_token: debt_amount}
+
+        collateral = {token.upper(): float(amount) for token, amount in (params.get("collateral") or {}).items()}
+        if not collateral:
+            collateral_token = (
+                params.get("collateral_token") or params.get("token_b") or default_collateral(debt_token)
+            ).upper()
+            amount = params.get("collateral_amount")
+            if amount is None:
+                amount = debt_amount * token_price(debt_token) / BORROW_LTV / token_price(collateral_token)
+            collateral = {collateral_token: float(amount)}
+        for token in (*collateral, *debt):
+            token_price(token)
+        return cls(collateral=collateral, debt=debt)
+
+@dataclass(frozen=True)
+class LendingAssessment:
+    """Per-position risk for a book; arrays are per position, or positions x assets"""
+    assets: Tuple[str, ...]
+    collateral_usd: np.ndarray
+    debt_usd: np.ndarray
+    health_factor: np.ndarray
+    liquidation_price: np.ndarray  # price of each asset, others fixed, at which HF hits 1; NaN if none
+    collateral_drop_pct: np.ndarray  # fall in all collateral prices that liquidates
+    time_to_liquidation_days: np.ndarray  # at current prices, with interest and rate drift; inf if never
+
+    def position(self, index: int) -> Dict[str, Any]:
+        time_to_liquidation = float(self.time_to_liquidation_days[index])
+        return {
+            "collateral_usd": round(float(self.collateral_usd[index]), 2),
+            "debt_usd": round(float(self.debt_usd[index]), 2),
+            "health_factor": round(float(self.health_factor[index]), 4),
+            "liquidation_prices": {
+                asset: round(float(price), 6)
+                for asset, price in zip(self.assets, self.liquidation_price[index])
+                if not np.isnan(price)
+            },
+            "collateral_drop_pct": round(float(self.collateral_drop_pct[index]), 4),
+            "time_to_liquidation_days": None if np.isinf(time_to_liquidation) else round(time_to_liquidation, 1),
+        }
+
+class LendingBook:
+    """
+    A batch of lending positions as positions x assets amount matrices.
+
+    Every metric is a matrix product or an elementwise expression over the
+    whole book, so re-scoring thousands of positions after a price move is
+    one ``assess`` call, and ``health_factors`` scores many price scenarios
+    at once.
+    """
+
+    def __init__(self, positions: Sequence[LendingPosition]):
+        self.assets = tuple(sorted({
+            token for position in positions for token in (*position.collateral, *position.debt)
+        }))
+        index = {asset: i for i, asset in enumerate(self.assets)}
+        self.collateral = np.zeros((len(positions), len(self.assets)))
+        self.debt = np.zeros((len(positions), len(self.assets)))
+        for row, position in enumerate(positions):
+            for token, amount in position.collateral.items():
+                self.collateral[row, index[token]] = amount
+            for token, amount in position.debt.items():
+                self.debt[row, index[token]] = amount
+
+        params = np.array([RESERVE_PARAMS.get(asset, UNKNOWN_RESERVE) for asset in self.assets]).reshape(-1, 5)
+        self.threshold = params[:, 1]
+        self.supply_rate = params[:, 3] / 100
+        self.borrow_rate = params[:, 4] / 100
+
+    def __len__(self) -> int:
+        return len(self.collateral)
+
+    def prices(self, overrides: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Reference prices for the book's assets, with ``overrides`` applied"""
+        overrides = {token.upper(): price for token, price in (overrides or {}).items()}
+        return np.array([overrides.get(asset) or token_price(asset) for asset in self.assets])
+
+    def health_factors(self, price_scenarios: np.ndarray) -> np.ndarray:
+        """Health factor of every position under every row of ``price_scenarios`` (scenarios x assets)"""
+        scenarios = np.atleast_2d(price_scenarios)
+        with np.errstate(divide="ignore"):
+            return ((scenarios * self.threshold) @ self.collateral.T) / (scenarios @ self.debt.T)
+
+    def assess(
+        self,
+        prices: Optional[Mapping[str, float]] = None,
+        rate_drift: float = BORROW_RATE_DRIFT
+    ) -> LendingAssessment:
+        price = self.prices(prices)
+        collateral_value = self.collateral * price
+        weighted = collateral_value @ self.threshold
+        debt_value = self.debt * price
+        debt_usd = debt_value.sum(axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            health = weighted / debt_usd
+            # HF = 1 where sum(net_i * p_i) = 0; solve for one price at a time
+            net = self.collateral * self.threshold - self.debt
+            margin = weighted - debt_usd
+            liquidation_price = price - margin[:, None] / net
+            liquidation_price[(net == 0) | (liquidation_price <= 0)] = np.nan
+            drop = np.clip(1 - 1 / health, 0, 1) * 100
+
+            # ln HF(t) = ln HF0 - b t - a t^2: supply interest on collateral,
+            # borrow interest on debt, and the borrow rate rising by rate_drift
+            growth = (collateral_value * self.threshold) @ self.supply_rate / weighted
+            cost = debt_value @ self.borrow_rate / debt_usd
+            a = np.where(debt_usd > 0, rate_drift / 100 / 2, 0.0)
+            b = cost - growth
+            c = -np.log(health)
+            root = np.sqrt(b * b - 4 * a * c)
+            denominator = b + root
+            years = np.where(denominator > 0, -2 * c / denominator, np.inf)
+        years = np.where(np.isnan(years) | (years < 0), np.inf, years)
+        years = np.where(health <= 1, 0.0, years)
+
+        return LendingAssessment(
+            assets=self.assets,
+            collateral_usd=collateral_value.sum(axis=1),
+            debt_usd=debt_usd,
+            health_factor=health,
+            liquidation_price=liquidation_price,
+            collateral_drop_pct=np.nan_to_num(drop, nan=0.0),
+            time_to_liquidation_days=years * DAYS_PER_YEAR,
+        )
+
+async def rescore_borrow_positions(
+    db: AsyncSession,
+    prices: Optional[Mapping[str, float]] = None,
+    user_id: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Re-score every successful borrow simulation (or one user's) at ``prices`` in one pass"""
+    query = (
+        select(UserSimulation.id, UserSimulation.user_id, UserSimulation.input_params)
+        .join(Simulation, UserSimulation.simulation_id == Simulation.id)
+        .where(Simulation.type == "borrow", UserSimulation.status == "success")
+    )
+    if user_id is not None:
+        query = query.where(UserSimulation.user_id == user_id)
+    rows = (await db.execute(query)).all()
+
+    scored, positions = [], []
+    for row in rows:
+        try:
+            positions.append(LendingPosition.from_params(row.input_params or {}))
+        except (ValueError, TypeError) as e:
+            logger.warning("Skipping unreadable borrow position", user_simulation_id=row.id, error=str(e))
+            continue
+        scored.append(row)
+    if not positions:
+        return []
+
+    assessment = LendingBook(positions).assess(prices)
+    return [
+        {"user_simulation_id": row.id, "user_id": row.user_id, **assessment.position(i)}
+        for i, row in enumerate(scored)
+    ]
@@ -0,0 +1,62 @@
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+class LLMUsageMeter:
+    """
+    Rolling token and spend counters for upstream LLM calls.
+
+    Keeps one ``(timestamp, prompt_tokens, completion_tokens)`` sample per
+    call for the last ``window`` seconds, plus lifetime totals.
+    """
+
+    def __init__(
+        self,
+        prompt_cost_per_1k: float,
+        completion_cost_per_1k: float,
+        window: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.prompt_cost_per_1k = prompt_cost_per_1k
+        self.completion_cost_per_1k = completion_cost_per_1k
+        self.window = window
+        self._clock = clock
+        self._samples: Deque[Tuple[float, int, int]] = deque()
+        self.total_calls = 0
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost of a call"""
+        return (
+            prompt_tokens * self.prompt_cost_per_1k
+            + completion_tokens * self.completion_cost_per_1k
+        ) / 1000
+
+    def record(self, prompt_tokens: int, completion_tokens: int):
+        """Record one completed upstream call"""
+        self._samples.append((self._clock(), prompt_tokens, completion_tokens))
+        self.total_calls += 1
+        self.total_prompt_tokens += prompt_tokens
+        self.total_completion_tokens += completion_tokens
+        self._prune()
+
+    def _prune(self):
+        cutoff = self._clock() - self.window
+        while self._samples and self._samples[0][0] <= cutoff:
+            self._samples.popleft()
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls, tokens and estimated spend over the window and overall"""
+        self._prune()
+        prompt_tokens = sum(sample[1] for sample in self._samples)
+        completion_tokens = sum(sample[2] for sample in self._samples)
+        return {
+            "window_seconds": self.window,
+            "calls": len(self._samples),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cost_usd": self.cost(prompt_tokens, completion_tokens),
+            "total_calls": self.total_calls,
+            "total_cost_usd": self.cost(self.total_prompt_tokens, self.total_completion_tokens)
+        }
@@ -0,0 +1,236 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# symbol -> (annualised volatility, loading on the crypto market factor, liquidity 0-100)
+ASSET_PROFILES = {
+    "BTC": (0.60, 0.85, 95),
+    "WBTC": (0.60, 0.85, 85),
+    "ETH": (0.75, 0.90, 95),
+    "WETH": (0.75, 0.90, 95),
+    "STETH": (0.75, 0.90, 80),
+    "USDC": (0.01, 0.0, 98),
+    "USDT": (0.01, 0.0, 98),
+    "DAI": (0.02, 0.0, 95),
+    "AAVE": (1.00, 0.75, 75),
+    "UNI": (1.00, 0.75, 80),
+    "COMP": (1.10, 0.70, 65),
+    "CRV": (1.20, 0.70, 65),
+    "LDO": (1.20, 0.70, 65),
+    "MKR": (0.95, 0.65, 65),
+}
+UNKNOWN_ASSET_PROFILE = (1.50, 0.60, 40)
+
+PERIODS_PER_YEAR = 365  # daily returns; crypto trades every day
+RETURN_SAMPLES = 1000
+VAR_CONFIDENCE = 0.95
+
+# Larger portfolios report statistics only; the matrix grows as assets squared
+MAX_CORRELATION_ASSETS = 50
+
+# Horizontal-merger HHI bands (1500 / 2500 on the 0-10000 scale)
+CONCENTRATION_BANDS = ((0.15, "low"), (0.25, "medium"))
+
+@dataclass(frozen=True)
+class PortfolioRiskMetrics:
+    """Risk statistics for one weight vector over a return history"""
+    hhi: float
+    effective_assets: float
+    diversification_ratio: float
+    average_correlation: float
+    volatility: float  # annualised
+    value_at_risk: float  # one-period loss at ``confidence``, as a fraction of value
+    conditional_var: float  # mean loss beyond the VaR
+    confidence: float
+
+    @property
+    def concentration_risk(self) -> str:
+        for ceiling, level in CONCENTRATION_BANDS:
+            if self.hhi <= ceiling:
+                return level
+        return "high"
+
+    @property
+    def diversification_score(self) -> int:
+        """
+        0-100, half from how evenly value is spread (1 - HHI) and half from how
+        much of the risk diversifies away (1 - 1/DR², DR being the ratio of the
+        weighted asset volatilities to the portfolio's). Equal weights in
+        perfectly correlated assets therefore score no better than 50.
+        """
+        spread = 1 - self.hhi
+        risk_spread = 1 - 1 / self.diversification_ratio ** 2
+        return int(round(50 * spread + 50 * risk_spread))
+
+    @property
+    def volatility_score(self) -> int:
+        """Annualised volatility in percent, capped at 100"""
+        return int(min(100, round(self.volatility * 100)))
+
+def normalize_weights(values: Sequence[float]) -> np.ndarray:
+    weights = np.asarray(values, dtype=float)
+    total = weights.sum()
+    if weights.ndim != 1 or not len(weights) or total <= 0 or (weights < 0).any():
+        raise ValueError("Weights must be a non-empty, non-negative vector with a positive sum")
+    return weights / total
+
+def correlation_matrix(returns: np.ndarray) -> np.ndarray:
+    """Pairwise correlation of the columns of a (samples, assets) return matrix"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        correlation = np.corrcoef(returns, rowvar=False)
+    # Constant series (e.g. a perfectly pegged stablecoin) correlate with nothing
+    return np.nan_to_num(np.atleast_2d(correlation))
+
+def analyze_portfolio(
+    weights: Sequence[float],
+    returns: np.ndarray,
+    confidence: float = VAR_CONFIDENCE,
+    periods_per_year: int = PERIODS_PER_YEAR
+) -> PortfolioRiskMetrics:
+    """
+    Risk metrics for ``weights`` over a (samples, assets) matrix of simple returns.
+
+    Everything is O(samples x assets): the portfolio series is one
+    matrix-vector product and the average correlation comes from the
+    variance identity, so no covariance matrix is formed.
+    """
+    w = normalize_weights(weights)
+    returns = np.asarray(returns, dtype=float)
+    if returns.ndim != 2 or returns.shape[1] != len(w) or len(returns) < 2:
+        raise ValueError("Returns must be a (samples, assets) matrix matching the weights")
+
+    portfolio = returns @ w
+    asset_vol = returns.std(axis=0, ddof=1)
+    portfolio_vol = portfolio.std(ddof=1)
+
+    hhi = float(w @ w)
+    weighted_vol = float(w @ asset_vol)
+    # sigma_p^2 = sum (w_i s_i)^2 + rho_bar * sum_{i != j} w_i s_i w_j s_j
+    own = float(((w * asset_vol) ** 2).sum())
+    cross = weighted_vol ** 2 - own
+    average_correlation = (portfolio_vol ** 2 - own) / cross if cross > 1e-18 else 1.0
+
+    threshold = np.quantile(portfolio, 1 - confidence)
+    tail = portfolio[portfolio <= threshold]
+
+    return PortfolioRiskMetrics(
+        hhi=hhi,
+        effective_assets=1 / hhi,
+        diversification_ratio=weighted_vol / portfolio_vol if portfolio_vol > 0 else 1.0,
+        average_correlation=float(np.clip(average_correlation, -1.0, 1.0)),
+        volatility=float(portfolio_vol * np.sqrt(periods_per_year)),
+        value_at_risk=float(max(0.0, -threshold)),
+        conditional_var=float(max(0.0, -tail.mean())),
+        confidence=confidence,
+    )
+
+@lru_cache(maxsize=256)
+def modeled_returns(symbols: Tuple[str, ...], samples: int = RETURN_SAMPLES, seed: int = 7) -> np.ndarray:
+    """
+    Daily returns for ``symbols`` from a one-factor model of ``ASSET_PROFILES``.
+
+    Stands in for price history until wallets are priced from market data:
+    each asset loads on a shared crypto factor plus its own noise, with
+    Student-t (4 dof) shocks for fat tails. Seeded, so a given asset set
+    always produces the same history; the result is read-only and cached.
+    """
+    profiles = np.array([ASSET_PROFILES.get(symbol.upper(), UNKNOWN_ASSET_PROFILE)[:2] for symbol in symbols])
+    daily_vol, loading = profiles[:, 0] / np.sqrt(PERIODS_PER_YEAR), profiles[:, 1]
+
+    rng = np.random.default_rng(seed)
+    unit_t = np.sqrt(2.0)  # the variance of a t(4) draw is 2
+    market = rng.standard_t(4, size=(samples, 1)) / unit_t
+    own = rng.standard_t(4, size=(samples, len(symbols))) / unit_t
+    returns = daily_vol * (loading * market + np.sqrt(1 - loading ** 2) * own)
+    returns.setflags(write=False)
+    return returns
+
+def portfolio_risk_report(
+    assets: List[Dict[str, Any]],
+    defi_value_usd: float = 0.0,
+    returns: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    The ``PortfolioRisk`` scores for holdings of ``{"token", "value_usd"}``.
+
+    ``returns`` defaults to ``modeled_returns`` for the held tokens.
+    """
+    symbols = tuple(asset["token"] for asset in assets)
+    values = np.array([float(asset["value_usd"]) for asset in assets])
+    total_value = float(values.sum())
+    if returns is None:
+        returns = modeled_returns(symbols)
+
+    metrics = analyze_portfolio(values, returns)
+    weights = values / total_value
+    liquidity = np.array([ASSET_PROFILES.get(s.upper(), UNKNOWN_ASSET_PROFILE)[2] for s in symbols])
+    liquidity_score = int(round(float(weights @ liquidity)))
+    defi_exposure = round(100 * defi_value_usd / total_value, 1) if total_value else 0.0
+
+    overall = 0.5 * metrics.volatility_score + 0.3 * (100 - metrics.diversification_score) + 0.2 * min(defi_exposure, 100)
+    overall_risk_score = int(round(overall))
+    risk_level = "low" if overall_risk_score < 30 else "medium" if overall_risk_score < 60 else "high"
+
+    risk_factors, recommendations = [], []
+    top = int(np.argmax(weights))
+    if weights[top] > 0.5:
+        share = int(round(weights[top] * 100))
+        risk_factors.append({
+            "factor": f"High {symbols[top]} concentration",
+            "impact": "high" if weights[top] >= 0.75 else "medium",
+            "description": f"{share}% of portfolio in {symbols[top]} increases volatility risk"
+        })
+        recommendations.append(f"Consider reducing {symbols[top]} concentration below 50%")
+    if metrics.average_correlation > 0.6 and len(symbols) > 1:
+        risk_factors.append({
+            "factor": "Correlated holdings",
+            "impact": "medium",
+            "description": f"Holdings move together (average correlation {metrics.average_correlation:.2f})"
+        })
+    if metrics.volatility_score >= 40:
+        recommendations.append("Diversify into more stablecoins for lower volatility")
+    if defi_exposure > 30:
+        risk_factors.append({
+            "factor": "DeFi protocol risk",
+            "impact": "medium",
+            "description": f"{defi_exposure:.0f}% exposure to DeFi protocols adds smart contract risk"
+        })
+        recommendations.append("Monitor DeFi protocol health regularly")
+    if liquidity_score >= 80:
+        risk_factors.append({
+            "factor": "Good liquidity",
+            "impact": "positive",
+            "description": "Most assets are highly liquid"
+        })
+    recommendations.append("Set up automated alerts for large price movements")
+
+    return {
+        "total_value_usd": total_value,
+        "asset_count": len(symbols),
+        "defi_exposure_percentage": defi_exposure,
+        "overall_risk_score": overall_risk_score,
+        "risk_level": risk_level,
+        "diversification_score": metrics.diversification_score,
+        "concentration_risk": metrics.concentration_risk,
+        "volatility_score": metrics.volatility_score,
+        "liquidity_score": liquidity_score,
+        "statistics": {
+            "hhi": round(metrics.hhi, 4),
+            "effective_assets": round(metrics.effective_assets, 2),
+            "diversification_ratio": round(metrics.diversification_ratio, 3),
+            "average_correlation": round(metrics.average_correlation, 3),
+            "annualized_volatility": round(metrics.volatility, 4),
+            "value_at_risk_1d": round(metrics.value_at_risk, 4),
+            "conditional_var_1d": round(metrics.conditional_var, 4),
+            "value_at_risk_1d_usd": round(metrics.value_at_risk * total_value, 2),
+            "conditional_var_1d_usd": round(metrics.conditional_var * total_value, 2),
+            "confidence": metrics.confidence,
+        },
+        "correlation": {
+            "assets": list(symbols),
+            "matrix": np.round(correlation_matrix(returns), 3).tolist(),
+        } if len(symbols) <= MAX_CORRELATION_ASSETS else None,
+        "risk_factors": risk_factors,
+        "recommendations": recommendations,
+    }
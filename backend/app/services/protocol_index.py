@@ -0,0 +1,133 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Facet name -> protocol field; list-valued fields index every element
+FACETS = {
+    "category": "category",
+    "network": "supported_networks",
+    "risk_level": "risk_level",
+}
+SORT_KEYS = ("tvl", "apy")
+
+USD_SUFFIXES = {"": 1, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+USD_RE = re.compile(r"^\$?\s*([\d,.]+)\s*([KMBT]?)$", re.IGNORECASE)
+PERCENT_RE = re.compile(r"[\d.]+")
+
+def parse_usd(value: Any) -> float:
+    """``"$4.2B"`` -> 4.2e9; numbers pass through and anything unparseable is 0"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = USD_RE.match(str(value or "").strip())
+    if not match:
+        return 0.0
+    return float(match.group(1).replace(",", "")) * USD_SUFFIXES[match.group(2).upper()]
+
+def parse_apy(value: Any) -> float:
+    """The upper bound of an APY range such as ``"5-25%"``, in percent"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    bounds = [float(number) for number in PERCENT_RE.findall(str(value or ""))]
+    return max(bounds) if bounds else 0.0
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits of ``mask``, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class ProtocolIndex:
+    """
+    Immutable in-memory index over the protocol catalog.
+
+    Every facet value maps to a bitset (a Python int, bit ``i`` set when
+    protocol ``i`` has the value), so a multi-facet filter is a few integer
+    ANDs and a facet count is a popcount. Sort orders by TVL and APY are
+    precomputed once, and unfiltered facet counts are stored at build time.
+    Rebuild the index, rather than mutating it, when the catalog changes.
+    """
+
+    def __init__(self, protocols: Sequence[Dict[str, Any]], version: int = 0):
+        self.protocols = list(protocols)
+        self.version = version
+        self.all = (1 << len(self.protocols)) - 1
+
+        self.postings: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        for i, protocol in enumerate(self.protocols):
+            for facet, field in FACETS.items():
+                values = protocol.get(field)
+                for value in values if isinstance(values, list) else [values]:
+                    if value is not None:
+                        postings = self.postings[facet]
+                        postings[value] = postings.get(value, 0) | (1 << i)
+
+        self.facet_values = {facet: sorted(postings) for facet, postings in self.postings.items()}
+        self.facet_counts = {
+            facet: {value: postings[value].bit_count() for value in self.facet_values[facet]}
+            for facet, postings in self.postings.items()
+        }
+
+        sort_values = {
+            "tvl": [parse_usd(p.get("tvl_usd", p.get("tvl"))) for p in self.protocols],
+            "apy": [parse_apy(p.get("apy", p.get("apy_range"))) for p in self.protocols],
+        }
+        # Both directions keep ties in catalog order, so pages are stable
+        self.orders: Dict[Tuple[str, bool], List[int]] = {}
+        for key, values in sort_values.items():
+            self.orders[key, False] = sorted(range(len(values)), key=lambda i, values=values: (values[i], i))
+            self.orders[key, True] = sorted(range(len(values)), key=lambda i, values=values: (-values[i], i))
+
+    def __len__(self) -> int:
+        return len(self.protocols)
+
+    def mask(self, filters: Dict[str, Optional[str]], exclude: Optional[str] = None) -> int:
+        """Bitset of protocols matching every given filter except ``exclude``"""
+        mask = self.all
+        for facet, value in filters.items():
+            if value is not None and facet != exclude:
+                mask &= self.postings[facet].get(value, 0)
+        return mask
+
+    def facets(self, filters: Dict[str, Optional[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        Per-value counts for each facet, under the filters on the other facets.
+
+        Selecting a category therefore still reports how many protocols every
+        other category would match, as a faceted search sidebar expects.
+        """
+        if not any(value is not None for value in filters.values()):
+            return self.facet_counts
+        counts = {}
+        for facet, postings in self.postings.items():
+            others = self.mask(filters, exclude=facet)
+            counts[facet] = {value: (postings[value] & others).bit_count() for value in self.facet_values[facet]}
+        return counts
+
+    def search(
+        self,
+        filters: Dict[str, Optional[str]],
+        sort_by: Optional[str] = None,
+        descending: bool = True,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """Total matches and the requested page, in catalog order unless ``sort_by`` is given"""
+        mask = self.mask(filters)
+        total = mask.bit_count()
+        end = total if limit is None else min(total, offset + limit)
+        if offset >= end:
+            return total, []
+
+        if sort_by is None:
+            positions: Iterator[int] = _bits(mask)
+        else:
+            order = self.orders[sort_by, descending]
+            positions = (i for i in order if mask >> i & 1)
+
+        page = []
+        for n, i in enumerate(positions):
+            if n >= end:
+                break
+            if n >= offset:
+                page.append(self.protocols[i])
+        return total, page
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import math
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import httpx
+import numpy as np
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Our protocol names -> DefiLlama slugs (also the yields API's ``project``)
+PROTOCOL_SLUGS = {
+    "uniswap": "uniswap-v3",
+    "aave": "aave-v3",
+    "compound": "compound-v3",
+    "curve": "curve-dex",
+    "lido": "lido",
+    "makerdao": "makerdao",
+}
+
+METRIC_FIELDS = ("tvl_usd", "volume_24h_usd", "apy_pct")
+
+TIMEFRAMES = {"24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400}
+
+# Longer windows are thinned to about this many points per series
+MAX_HISTORY_POINTS = 200
+
+def format_usd(value: Optional[float]) -> Optional[str]:
+    """4.2e9 -> ``"$4.2B"``, in the style of the catalog's TVL strings"""
+    if value is None:
+        return None
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"${value / threshold:.1f}{suffix}"
+    return f"${value:.0f}"
+
+def _finite(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+class MetricsRingBuffer:
+    """
+    Fixed-size time series of ``(timestamp, tvl, volume, apy)`` samples.
+
+    Backed by one preallocated float64 array, so memory stays constant
+    (32 bytes per sample) and appends never allocate. Missing metrics are
+    stored as NaN, so the history shows the gap, while ``current`` keeps
+    the last finite value of each metric.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._data = np.full((capacity, 1 + len(METRIC_FIELDS)), np.nan)
+        self._current = np.full(len(METRIC_FIELDS), np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, tvl: float, volume: float, apy: float):
+        self._data[self._next] = (timestamp, tvl, volume, apy)
+        values = self._data[self._next, 1:]
+        np.copyto(self._current, values, where=~np.isnan(values))
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def rows(self) -> np.ndarray:
+        """All samples, oldest first"""
+        if self._size < self.capacity:
+            return self._data[:self._size]
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+    def window(self, since: float) -> np.ndarray:
+        rows = self.rows()
+        # Timestamps are appended in order, so the window is a suffix
+        return rows[np.searchsorted(rows[:, 0], since):]
+
+    def latest(self) -> Optional[np.ndarray]:
+        if not self._size:
+            return None
+        return self._data[self._next - 1]
+
+    def current(self) -> np.ndarray:
+        """The most recent finite value of each metric, NaN if there has been none"""
+        return self._current
+
+class ProtocolMetricsStore:
+    """Per-protocol ring buffers holding ``retention`` seconds of ingested samples"""
+
+    def __init__(self, retention: float, interval: float):
+        self.capacity = max(1, int(retention // interval) + 1)
+        self._series: Dict[str, MetricsRingBuffer] = {}
+
+    def record(self, timestamp: float, samples: Dict[str, Tuple[float, float, float]]):
+        for protocol, values in samples.items():
+            series = self._series.get(protocol)
+            if series is None:
+                series = self._series[protocol] = MetricsRingBuffer(self.capacity)
+            series.append(timestamp, *values)
+
+    def snapshot(self, protocol: str, timeframe: float, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest values plus the history over ``timeframe`` seconds; None before the first ingest"""
+        series = self._series.get(protocol)
+        latest = series.latest() if series is not None else None
+        if latest is None:
+            return None
+
+        now = time.time() if now is None else now
+        rows = series.window(now - timeframe)
+        if len(rows) > MAX_HISTORY_POINTS:
+            # Thin evenly but always keep the newest sample
+            rows = rows[::-math.ceil(len(rows) / MAX_HISTORY_POINTS)][::-1]
+
+        current = dict(zip(METRIC_FIELDS, (_finite(value) for value in series.current())))
+        return {
+            "current": {
+                **current,
+                "tvl": format_usd(current["tvl_usd"]),
+                "volume_24h": format_usd(current["volume_24h_usd"]),
+                "apy": None if current["apy_pct"] is None else f"{current['apy_pct']:.2f}%",
+            },
+            "history": {
+                "timestamps": [float(ts) for ts in rows[:, 0]],
+                **{
+                    field: [_finite(value) for value in rows[:, column]]
+                    for column, field in enumerate(METRIC_FIELDS, start=1)
+                },
+            },
+            "last_updated": float(latest[0]),
+        }
+
+def _slug(item: Dict[str, Any]) -> Optional[str]:
+    slug = item.get("slug") or item.get("project")
+    if slug:
+        return slug
+    name = item.get("name")
+    return name.lower().replace(" ", "-") if name else None
+
+def _reduce_tvl(protocols: List[Dict[str, Any]]) -> Dict[str, float]:
+    return {_slug(item): float(item["tvl"]) for item in protocols if item.get("tvl") is not None}
+
+def _reduce_volume(overview: Dict[str, Any]) -> Dict[str, float]:
+    return {
+        _slug(item): float(item["total24h"])
+        for item in overview.get("protocols", []) if item.get("total24h") is not None
+    }
+
+class ProtocolMetricsIngester:
+    """
+    Periodically pull TVL, DEX volume and pool APYs from DefiLlama in bulk.
+
+    Each run makes three requests, one per metric, covering every protocol at
+    once; a failed request only leaves a gap in its own metric's history,
+    and the last good value is still served as current. Reads
+    never wait on the upstream: requests are answered from ``store``.
+    """
+
+    def __init__(
+        self,
+        store: ProtocolMetricsStore,
+        interval: float,
+        api_url: str,
+        yields_url: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        slugs: Optional[Dict[str, str]] = None
+    ):
+        self.store = store
+        self.interval = interval
+        self.api_url = api_url.rstrip("/")
+        self.yields_url = yields_url.rstrip("/")
+        self.client = http_client or httpx.AsyncClient(timeout=30.0)
+        self.slugs = PROTOCOL_SLUGS if slugs is None else slugs
+        self._projects = set(self.slugs.values())
+        self.runs = 0
+        self.failures = 0
+
+    async def _get(self, url: str, reduce: Callable[[Any], Dict[str, float]], **params) -> Dict[str, float]:
+        response = await self.client.get(url, params=params or None)
+        response.raise_for_status()
+        # Bulk payloads run to megabytes: decode and reduce them off the event loop
+        return await asyncio.to_thread(lambda: reduce(json.loads(response.content)))
+
+    async def _fetch_tvl(self) -> Dict[str, float]:
+        return await self._get(f"{self.api_url}/protocols", _reduce_tvl)
+
+    async def _fetch_volume(self) -> Dict[str, float]:
+        return await self._get(
+            f"{self.api_url}/overview/dexs",
+            _reduce_volume,
+            excludeTotalDataChart="true",
+            excludeTotalDataChartBreakdown="true"
+        )
+
+    async def _fetch_apy(self) -> Dict[str, float]:
+        return await self._get(f"{self.yields_url}/pools", self._reduce_apy)
+
+    def _reduce_apy(self, payload: Dict[str, Any]) -> Dict[str, float]:
+        """TVL-weighted mean APY over each project's pools"""
+        weighted: Dict[str, float] = defaultdict(float)
+        tvl: Dict[str, float] = defaultdict(float)
+        for pool in payload.get("data", []):
+            project, apy, pool_tvl = pool.get("project"), pool.get("apy"), pool.get("tvlUsd") or 0
+            if project in self._projects and apy is not None and pool_tvl > 0:
+                weighted[project] += apy * pool_tvl
+                tvl[project] += pool_tvl
+        return {project: weighted[project] / tvl[project] for project in tvl}
+
+    async def ingest_once(self, now: Optional[float] = None) -> int:
+        """Fetch every metric and append one sample per protocol; returns protocols recorded"""
+        results = await asyncio.gather(
+            self._fetch_tvl(), self._fetch_volume(), self._fetch_apy(), return_exceptions=True
+        )
+        by_metric: List[Dict[str, float]] = []
+        for field, result in zip(METRIC_FIELDS, results):
+            if isinstance(result, Exception):
+                logger.warning("Protocol metric fetch failed", metric=field, error=str(result))
+                result = {}
+            by_metric.append(result)
+
+        samples = {}
+        for protocol, slug in self.slugs.items():
+            values = tuple(metric.get(slug, math.nan) for metric in by_metric)
+            if not all(math.isnan(value) for value in values):
+                samples[protocol] = values
+
+        self.runs += 1
+        if samples:
+            self.store.record(time.time() if now is None else now, samples)
+        else:
+            self.failures += 1
+        return len(samples)
+
+    async def run(self):
+        """Ingest every ``interval`` seconds until cancelled"""
+        while True:
+            started = time.monotonic()
+            try:
+                recorded = await self.ingest_once()
+                logger.info("Protocol metrics ingested", protocols=recorded)
+            except Exception as e:
+                self.failures += 1
+                logger.error("Protocol metrics ingestion failed", error=str(e))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def close(self):
+        await self.client.aclose()
+
+protocol_metrics_store = ProtocolMetricsStore(
+    retention=settings.PROTOCOL_METRICS_RETENTION_DAYS * 86400,
+    interval=settings.PROTOCOL_METRICS_INTERVAL
+)
@@ -0,0 +1,233 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy import delete, select
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis import redis_client
+from app.models.risk_assessment import RiskAssessment
+from app.services.ai_cache import hash_key_parts
+from app.services.single_flight import SingleFlight
+
+logger = structlog.get_logger()
+
+# Bump when the cached record shape changes so old entries are ignored
+RISK_CACHE_VERSION = 1
+
+# RiskScore field -> RiskAssessment column
+SCORE_COLUMNS = {
+    "overall": "overall_risk_score",
+    "smart_contract": "smart_contract_risk",
+    "liquidity": "liquidity_risk",
+    "volatility": "volatility_risk",
+    "regulatory": "regulatory_risk",
+    "team": "team_risk",
+}
+
+def _utc(timestamp: float) -> datetime:
+    """Naive UTC, like the ``datetime.utcnow()`` values stored elsewhere"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def record_from_row(row: RiskAssessment) -> Dict[str, Any]:
+    return {
+        "assessment_id": row.assessment_id,
+        "type": row.type,
+        "target": row.target,
+        "risk_score": {field: getattr(row, column) for field, column in SCORE_COLUMNS.items()},
+        "risk_level": row.risk_level,
+        "warnings": row.warnings or [],
+        "recommendations": row.recommendations or [],
+        "details": row.details or {},
+        "created_at": _epoch(row.created_at),
+        "expires_at": _epoch(row.expires_at),
+    }
+
+class RiskAssessmentCache:
+    """
+    Risk assessments cached by ``(type, target)``.
+
+    Redis holds the hot copy and every computed assessment is also written to
+    ``risk_assessments``, which answers when Redis misses (restart, eviction
+    or outage). An entry is fresh until its ``expires_at`` (``ttl`` seconds
+    after it was computed); for ``stale_ttl`` seconds after that it is still
+    served, while a single background task recomputes it. Concurrent misses
+    share one computation through ``SingleFlight``, across workers too.
+    """
+
+    def __init__(self, ttl: int, stale_ttl: int, clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self.flight: SingleFlight[Dict[str, Any]] = SingleFlight("risk", lock_ttl=30, wait_timeout=5)
+        self._refreshing: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def key(self, assessment_type: str, target: str) -> str:
+        return f"risk:v{RISK_CACHE_VERSION}:{assessment_type}:{hash_key_parts(target)}"
+
+    async def get_or_compute(
+        self,
+        assessment_type: str,
+        target: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        user_id: int
+    ) -> Dict[str, Any]:
+        """
+        The cached record for ``(assessment_type, target)``, computing it on a miss.
+
+        ``compute`` returns the assessment fields (``risk_score``,
+        ``risk_level``, ``warnings``, ``recommendations``, ``details``);
+        the record adds its id and ``created_at``/``expires_at`` epochs.
+        """
+        key = self.key(assessment_type, target)
+
+        async def refresh() -> Dict[str, Any]:
+            return await self._compute_and_store(key, assessment_type, target, compute, user_id)
+
+        record = await self._read(key, assessment_type, target)
+        if record is not None:
+            if self._clock() < record["expires_at"]:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._refresh_in_background(key, refresh)
+            return record
+
+        self.misses += 1
+        return await self.flight.do(key, refresh, lambda: self._fresh(key))
+
+    async def _read(self, key: str, assessment_type: str, target: str) -> Optional[Dict[str, Any]]:
+        """The Redis entry, else the newest persisted row still inside the stale window"""
+        record = await redis_client.get_json(key)
+        if record is not None:
+            return record
+
+        record = await self._load_persisted(assessment_type, target)
+        if record is not None:
+            # Re-warm Redis for the rest of the entry's life
+            remaining = int(record["expires_at"] + self.stale_ttl - self._clock())
+            if remaining > 0:
+                await redis_client.set_json(key, record, ex=remaining)
+        return record
+
+    async def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        record = await redis_client.get_json(key)
+        if record is not None and self._clock() < record["expires_at"]:
+            return record
+        return None
+
+    async def _load_persisted(self, assessment_type: str, target: str) -> Optional[Dict[str, Any]]:
+        oldest_servable = _utc(self._clock() - self.stale_ttl)
+        try:
+            async with AsyncSessionLocal() as db:
+                row = (await db.execute(
+                    select(RiskAssessment)
+                    .where(
+                        RiskAssessment.type == assessment_type,
+                        RiskAssessment.target == target,
+                        RiskAssessment.expires_at > oldest_servable
+                    )
+                    .order_by(RiskAssessment.expires_at.desc())
+                    .limit(1)
+                )).scalar_one_or_none()
+        except Exception as e:
+            logger.warning("Risk assessment lookup failed", type=assessment_type, error=str(e))
+            return None
+        return record_from_row(row) if row is not None else None
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        assessment_type: str,
+        target: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        user_id: int
+    ) -> Dict[str, Any]:
+        result = await compute()
+        now = self._clock()
+        record = {
+            "assessment_id": str(uuid.uuid4()),
+            "type": assessment_type,
+            "target": target,
+            "risk_score": result["risk_score"],
+            "risk_level": result["risk_level"],
+            "warnings": result["warnings"],
+            "recommendations": result["recommendations"],
+            "details": result["details"],
+            "created_at": now,
+            "expires_at": now + self.ttl,
+        }
+        await redis_client.set_json(key, record, ex=self.ttl + self.stale_ttl)
+        await self._persist(record, user_id)
+        return record
+
+    async def _persist(self, record: Dict[str, Any], user_id: int):
+        """
+        Write the record to ``risk_assessments``, replacing ``user_id``'s older rows for its key.
+
+        Only the newest row per (type, target) is ever read, so refreshes
+        must not pile up rows; rows belong to a user (``User.risk_assessments``),
+        so other users' rows are left alone. Failures only cost the DB fallback.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    delete(RiskAssessment).where(
+                        RiskAssessment.user_id == user_id,
+                        RiskAssessment.type == record["type"],
+                        RiskAssessment.target == record["target"],
+                        RiskAssessment.expires_at <= _utc(record["expires_at"])
+                    )
+                )
+                db.add(RiskAssessment(
+                    assessment_id=record["assessment_id"],
+                    user_id=user_id,
+                    type=record["type"],
+                    target=record["target"],
+                    risk_level=record["risk_level"],
+                    warnings=record["warnings"],
+                    recommendations=record["recommendations"],
+                    details=record["details"],
+                    created_at=_utc(record["created_at"]),
+                    expires_at=_utc(record["expires_at"]),
+                    **{column: record["risk_score"][field] for field, column in SCORE_COLUMNS.items()}
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.warning("Persisting risk assessment failed", type=record["type"], error=str(e))
+
+    def _refresh_in_background(self, key: str, refresh: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Recompute a stale entry once, detached from the request that noticed it"""
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self.flight.do(key, refresh, lambda: self._fresh(key)))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._refresh_done(key, done))
+
+    def _refresh_done(self, key: str, task: "asyncio.Task[Dict[str, Any]]"):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Risk assessment refresh failed", key=key, error=str(task.exception()))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshing": len(self._refreshing),
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+risk_cache = RiskAssessmentCache(settings.RISK_CACHE_TTL, settings.RISK_CACHE_STALE_TTL)
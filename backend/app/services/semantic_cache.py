@@ -0,0 +1,169 @@
+import re
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+import structlog
+from sklearn.feature_extraction.text import HashingVectorizer
+from scipy.sparse import csr_matrix, vstack
+
+from app.services.ai_cache import normalize_text
+
+logger = structlog.get_logger()
+
+# Question scaffolding that does not change which concept is being asked about
+_LEADING_PHRASES = re.compile(
+    r"^(?:(?:can|could) you |please )?"
+    r"(?:what(?:'s| is| are)|explain|define|describe|tell me about|"
+    r"how (?:does|do)|what does|meaning of|definition of)\s+"
+)
+_TRAILING_PHRASES = re.compile(r"\s+(?:work|works|mean|means|in defi|in crypto)$")
+_PUNCTUATION = re.compile(r"[^\w\s'-]+")
+_ARTICLES = {"a", "an", "the"}
+
+def _singularize(word: str) -> str:
+    """Cheap English plural folding; only needs to be consistent, not correct"""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+def normalize_concept(concept: str) -> str:
+    """
+    Reduce a concept question to its canonical noun phrase.
+
+    "Liquidity Pool", "liquidity pools" and "What is a liquidity pool?" all
+    normalize to ``"liquidity pool"``.
+    """
+    text = _PUNCTUATION.sub(" ", normalize_text(concept))
+    text = " ".join(text.split())
+    text = _LEADING_PHRASES.sub("", text)
+    text = _TRAILING_PHRASES.sub("", text)
+    words = [_singularize(word) for word in text.split() if word not in _ARTICLES]
+    # Never normalize a concept away entirely
+    return " ".join(words) or normalize_text(concept)
+
+class SemanticIndex:
+    """
+    Per-process nearest-neighbour index over normalized concepts.
+
+    Concepts are embedded with a stateless character n-gram hashing
+    vectorizer, so nothing has to be fitted up front and every worker embeds
+    identically. Entries are partitioned by ``scope`` (e.g. user level and
+    example flag) because an answer is only reusable within the same scope.
+    Each scope keeps at most ``maxsize`` concepts, evicting the least
+    recently matched.
+
+    A concept is embedded once, when added. Lookups score the stacked
+    vectors of a scope plus the few added since it was stacked, which are
+    only folded in every ``stack_batch`` additions; discarded and evicted
+    concepts are skipped until then. So a cache miss never re-embeds or
+    restacks the whole scope on the event loop.
+    """
+
+    def __init__(self, threshold: float, maxsize: int = 5000, stack_batch: int = 64):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.stack_batch = stack_batch
+        self.vectorizer = HashingVectorizer(
+            analyzer="char_wb",
+            ngram_range=(2, 4),
+            n_features=2 ** 18,
+            alternate_sign=False,
+            norm="l2"
+        )
+        self._concepts: Dict[Hashable, "OrderedDict[str, csr_matrix]"] = {}
+        self._stacked: Dict[Hashable, Tuple[csr_matrix, List[str]]] = {}
+        self._unstacked: Dict[Hashable, List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, scope: Hashable, concept: str):
+        """Make ``concept`` available as a neighbour within ``scope``"""
+        if self.maxsize <= 0:
+            return
+
+        concepts = self._concepts.setdefault(scope, OrderedDict())
+        if concept in concepts:
+            concepts.move_to_end(concept)
+            return
+
+        concepts[concept] = self.vectorizer.transform([concept])
+        while len(concepts) > self.maxsize:
+            concepts.popitem(last=False)
+        unstacked = self._unstacked.setdefault(scope, [])
+        unstacked.append(concept)
+        if len(unstacked) >= self.stack_batch:
+            self._stack(scope)
+
+    def discard(self, scope: Hashable, concept: str):
+        """Forget ``concept``, e.g. once its cached answer has expired"""
+        concepts = self._concepts.get(scope)
+        if concepts and concept in concepts:
+            del concepts[concept]
+
+    def nearest(self, scope: Hashable, concept: str, k: int = 5) -> Optional[Tuple[str, float]]:
+        """
+        Return the closest known concept and its cosine similarity, or None
+        when nothing in ``scope`` clears the threshold.
+
+        At most ``k`` candidates are considered. Neighbours with a different
+        word count are skipped: an extra word ("liquidity pool fee" vs
+        "liquidity pool") usually narrows the concept rather than rephrasing it.
+        """
+        concepts = self._concepts.get(scope)
+        if not concepts:
+            self.misses += 1
+            return None
+
+        # Rows are L2-normalized, so the dot product is the cosine similarity
+        query = self.vectorizer.transform([concept]).T
+        labels = [label for label in self._unstacked.get(scope, ()) if label in concepts]
+        similarities = [(vstack([concepts[label] for label in labels]) @ query).toarray().ravel()] if labels else []
+        stacked = self._stacked.get(scope)
+        if stacked is not None:
+            matrix, stacked_labels = stacked
+            labels = stacked_labels + labels
+            similarities.insert(0, (matrix @ query).toarray().ravel())
+        similarities = np.concatenate(similarities) if similarities else np.empty(0)
+
+        candidates = np.flatnonzero(similarities >= self.threshold)
+        considered = 0
+        word_count = len(concept.split())
+        for position in candidates[np.argsort(-similarities[candidates], kind="stable")]:
+            candidate = labels[position]
+            if candidate not in concepts:
+                continue
+            considered += 1
+            if considered > k:
+                break
+            if candidate != concept and len(candidate.split()) == word_count:
+                self.hits += 1
+                concepts.move_to_end(candidate)
+                return candidate, float(similarities[position])
+
+        self.misses += 1
+        return None
+
+    def _stack(self, scope: Hashable):
+        """Stack the vectors of every live concept in ``scope``, dropping discarded ones"""
+        concepts = self._concepts[scope]
+        labels = list(concepts)
+        self._unstacked[scope] = []
+        if labels:
+            self._stacked[scope] = (vstack([concepts[label] for label in labels], format="csr"), labels)
+        else:
+            self._stacked.pop(scope, None)
+
+    def stats(self) -> Dict[str, float]:
+        """Lookup counters for the similarity fallback"""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": "semantic",
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": sum(len(concepts) for concepts in self._concepts.values()),
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,379 @@
+import math
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+from app.core.config import settings
+from app.services.ai_cache import hash_key_parts
+from app.services.amm import (
+    amounts_for_liquidity,
+    liquidity_for_amount0,
+    position_value,
+    range_sqrt_bounds,
+    reference_pool,
+)
+from app.services.portfolio_risk import ASSET_PROFILES, PERIODS_PER_YEAR, UNKNOWN_ASSET_PROFILE
+
+# Reference USD prices for simulations until they are read from market data
+TOKEN_PRICES_USD = {
+    "ETH": 1850.0,
+    "WETH": 1850.0,
+    "STETH": 1845.0,
+    "BTC": 43000.0,
+    "WBTC": 43000.0,
+    "USDC": 1.0,
+    "USDT": 1.0,
+    "DAI": 1.0,
+    "AAVE": 90.0,
+    "UNI": 5.87,
+    "COMP": 55.0,
+    "CRV": 0.60,
+    "LDO": 2.50,
+    "MKR": 1500.0,
+}
+
+GAS_UNITS = {
+    "swap": 150000,
+    "lend": 180000,
+    "borrow": 220000,
+    "stake": 160000,
+    "provide_liquidity": 280000,
+}
+GAS_PRICE_GWEI = 30.0  # median when the request does not name one
+GAS_PRICE_SIGMA = 0.4  # log-normal spread of the gas price at inclusion
+
+# Mean yields (percent APY) and the log-normal spread of the realised rate
+BASE_APY = {
+    "lend": 3.5,
+    "borrow": 5.2,
+    "stake": 8.5,
+    "provide_liquidity": 12.3,
+}
+APY_SIGMA = 0.3
+
+# Trade sizes, as multiples of the requested amount, quoted alongside a swap
+QUOTE_LADDER_MULTIPLES = np.array([0.1, 0.5, 1.0, 2.0, 5.0, 10.0])
+QUOTE_LADDER_TRADE = 2  # index of the requested amount
+EXECUTION_DELAY_SECONDS = 60  # quote to inclusion
+BORROW_LTV = 0.6  # debt / collateral value when the position is opened
+LIQUIDATION_THRESHOLD = 0.825
+LIQUIDATION_PENALTY = 0.05
+BORROW_STEP_DAYS = 5  # price observations; crossings in between come from the Brownian bridge
+
+STABLECOINS = {"USDC", "USDT", "DAI"}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+SECONDS_PER_YEAR = 365 * 86400
+
+def token_price(token: str) -> float:
+    try:
+        return TOKEN_PRICES_USD[token.upper()]
+    except KeyError:
+        raise ValueError(f"Unsupported token: {token}") from None
+
+def default_collateral(token: str) -> str:
+    """Stablecoin debt is collateralised with ETH, anything else with USDC"""
+    return "ETH" if token.upper() in STABLECOINS else "USDC"
+
+def _vol_and_loading(token: str) -> Tuple[float, float]:
+    volatility, loading, _ = ASSET_PROFILES.get(token.upper(), UNKNOWN_ASSET_PROFILE)
+    return volatility, loading
+
+def relative_volatility(token_a: str, token_b: str) -> float:
+    """Annualised volatility of the token_a/token_b price under the one-factor model"""
+    vol_a, load_a = _vol_and_loading(token_a)
+    vol_b, load_b = _vol_and_loading(token_b)
+    if token_a.upper() == token_b.upper():
+        return 0.0
+    variance = vol_a ** 2 + vol_b ** 2 - 2 * load_a * load_b * vol_a * vol_b
+    return math.sqrt(max(variance, 0.0))
+
+def request_seed(*parts: Any) -> int:
+    """A stable 64-bit seed for a request, so identical requests give identical results"""
+    return int(hash_key_parts(*parts)[:16], 16)
+
+def summarize(values: np.ndarray, decimals: int = 6) -> Dict[str, Optional[float]]:
+    """Mean and the ``PERCENTILES`` of ``values`` (linear interpolation, as ``np.percentile``); None when empty"""
+    if not len(values):
+        return {"mean": None, **{f"p{p}": None for p in PERCENTILES}}
+    # One sort serves every percentile; np.percentile partitions once per point
+    ordered = np.sort(values)
+    positions = np.array(PERCENTILES) / 100 * (len(ordered) - 1)
+    lower = np.floor(positions).astype(int)
+    upper = np.minimum(lower + 1, len(ordered) - 1)
+    points = ordered[lower] + (ordered[upper] - ordered[lower]) * (positions - lower)
+    return {
+        "mean": round(float(values.mean()), decimals),
+        **{f"p{p}": round(float(v), decimals) for p, v in zip(PERCENTILES, points)},
+    }
+
+class MonteCarloEngine:
+    """
+    Vectorised Monte Carlo over prices, yields and gas for one transaction.
+
+    Prices follow geometric Brownian motion with the volatilities and
+    market-factor loadings of ``ASSET_PROFILES``; realised APYs and gas
+    prices are log-normal around their base values. Every draw for a
+    simulation comes from one ``numpy.random.Generator`` seeded by the
+    caller, so results are reproducible. Only borrowing needs whole paths
+    (liquidation can happen before the horizon); the other types draw
+    terminal values directly.
+    """
+
+    def __init__(self, paths: int, horizon_days: int):
+        self.paths = paths
+        self.horizon_days = horizon_days
+
+    @property
+    def horizon_years(self) -> float:
+        return self.horizon_days / PERIODS_PER_YEAR
+
+    def _gas_cost_usd(self, rng: np.random.Generator, kind: str, gas_price_gwei: Optional[float]) -> np.ndarray:
+        median = gas_price_gwei or GAS_PRICE_GWEI
+        gwei = median * np.exp(GAS_PRICE_SIGMA * rng.standard_normal(self.paths, dtype=np.float32))
+        return GAS_UNITS[kind] * gwei * 1e-9 * TOKEN_PRICES_USD["ETH"]
+
+    def _terminal_return(self, rng: np.random.Generator, volatility: float, years: float) -> np.ndarray:
+        """Gross price returns over ``years`` (zero drift, so the mean is 1)"""
+        if volatility == 0:
+            return np.ones(self.paths)
+        scale = volatility * math.sqrt(years)
+        return np.exp(scale * rng.standard_normal(self.paths) - 0.5 * scale ** 2)
+
+    def _realized_apy(self, rng: np.random.Generator, base_apy: float) -> np.ndarray:
+        return base_apy * np.exp(APY_SIGMA * rng.standard_normal(self.paths) - 0.5 * APY_SIGMA ** 2)
+
+    def _result(self, seed: int, **fields) -> Dict[str, Any]:
+        return {
+            "paths": self.paths,
+            "seed": seed,
+            "horizon_days": self.horizon_days,
+            "liquidation_probability": 0.0,
+            **fields,
+        }
+
+    def swap(
+        self,
+        token_a: str,
+        token_b: str,
+        amount: float,
+        slippage_pct: float,
+        seed: int,
+        gas_price_gwei: Optional[float] = None,
+        protocol: str = "uniswap"
+    ) -> Dict[str, Any]:
+        """
+        Output received after the price moves between quote and inclusion; reverts below the slippage floor.
+
+        The quote comes from the protocol's reference pool, so it carries the
+        pool fee and the trade's own price impact.
+        """
+        rng = np.random.default_rng(seed)
+        pool = reference_pool(protocol, token_a, token_b, token_price(token_a), token_price(token_b))
+        ladder = pool.quote(amount * QUOTE_LADDER_MULTIPLES)
+        quoted = float(ladder.amount_out[QUOTE_LADDER_TRADE])
+        minimum = quoted * (1 - slippage_pct / 100)
+
+        moves = self._terminal_return(
+            rng, relative_volatility(token_a, token_b), EXECUTION_DELAY_SECONDS / SECONDS_PER_YEAR
+        )
+        output = quoted * moves
+        executed = output >= minimum
+        gas = self._gas_cost_usd(rng, "swap", gas_price_gwei)
+
+        return self._result(
+            seed,
+            metric="amount_out",
+            unit=token_b.upper(),
+            quoted=round(quoted, 6),
+            minimum_received=round(minimum, 6),
+            price_impact=round(float(ladder.price_impact[QUOTE_LADDER_TRADE]), 6),
+            pool_fee=pool.fee,
+            quote_ladder=[
+                {
+                    "amount_in": round(float(size), 6),
+                    "amount_out": round(float(out), 6),
+                    "price_impact": round(float(impact), 6),
+                }
+                for size, out, impact in zip(ladder.amount_in, ladder.amount_out, ladder.price_impact)
+            ],
+            outcome=summarize(output[executed]),
+            revert_probability=round(1 - float(executed.mean()), 6),
+            gas_cost_usd=summarize(gas, 2),
+        )
+
+    def _yield_position(
+        self,
+        kind: str,
+        token: str,
+        amount: float,
+        seed: int,
+        gas_price_gwei: Optional[float]
+    ) -> Dict[str, Any]:
+        """Supply-side positions (lend, stake): token earnings and USD value at the horizon"""
+        rng = np.random.default_rng(seed)
+        price = token_price(token)
+        apy = self._realized_apy(rng, BASE_APY[kind])
+        earned = amount * apy / 100 * self.horizon_years
+        price_return = self._terminal_return(rng, _vol_and_loading(token)[0], self.horizon_years)
+        gas = self._gas_cost_usd(rng, kind, gas_price_gwei)
+
+        value_usd = (amount + earned) * price * price_return - gas
+        pnl_usd = value_usd - amount * price
+        return self._result(
+            seed,
+            metric="earned",
+            unit=token.upper(),
+            outcome=summarize(earned),
+            value_usd=summarize(value_usd, 2),
+            probability_of_loss=round(float((pnl_usd < 0).mean()), 6),
+            gas_cost_usd=summarize(gas, 2),
+        )
+
+    def lend(self, token: str, amount: float, seed: int, gas_price_gwei: Optional[float] = None) -> Dict[str, Any]:
+        return self._yield_position("lend", token, amount, seed, gas_price_gwei)
+
+    def stake(self, token: str, amount: float, seed: int, gas_price_gwei: Optional[float] = None) -> Dict[str, Any]:
+        return self._yield_position("stake", token, amount, seed, gas_price_gwei)
+
+    def borrow(
+        self,
+        token: str,
+        collateral_token: str,
+        amount: float,
+        seed: int,
+        gas_price_gwei: Optional[float] = None,
+        ltv: float = BORROW_LTV
+    ) -> Dict[str, Any]:
+        """
+        Borrow ``amount`` of ``token`` against ``collateral_token`` posted at ``ltv``.
+
+        Simulates the collateral/debt price ratio every ``BORROW_STEP_DAYS``;
+        a path is liquidated once the health factor (collateral x threshold /
+        debt, with debt accruing interest) touches 1. Between observations the
+        chance of having touched it comes from the Brownian bridge, so the
+        check is effectively continuous without daily steps. Liquidated paths
+        lose the liquidation penalty on the debt.
+        """
+        rng = np.random.default_rng(seed)
+        debt_usd = amount * token_price(token)
+        collateral_usd = debt_usd / ltv
+        equity_usd = collateral_usd - debt_usd
+        initial_health = collateral_usd * LIQUIDATION_THRESHOLD / debt_usd
+        apy = self._realized_apy(rng, BASE_APY["borrow"])
+
+        steps = max(1, math.ceil(self.horizon_days / BORROW_STEP_DAYS))
+        dt = self.horizon_years / steps
+        variance = relative_volatility(collateral_token, token) ** 2 * dt
+        # Steps x paths in float32, so each step is one contiguous row; everything
+        # below works in place on this buffer and one scratch buffer
+        log_ratio = rng.standard_normal((steps, self.paths), dtype=np.float32)
+        log_ratio *= math.sqrt(variance)
+        log_ratio -= 0.5 * variance
+        for step in range(1, steps):
+            # Row by row beats np.cumsum(axis=0) several times over on wide matrices
+            log_ratio[step] += log_ratio[step - 1]
+        ratio_end = np.exp(log_ratio[-1].astype(np.float64))
+
+        # Log distance of the health factor above 1 at each observation
+        elapsed = (np.arange(1, steps + 1) * dt / 100).astype(np.float32)
+        scratch = np.multiply(elapsed[:, None], apy.astype(np.float32), dtype=np.float32)
+        np.log1p(scratch, out=scratch)
+        distance = log_ratio
+        distance -= scratch
+        distance += math.log(initial_health)
+        if variance > 0:
+            # Chance the bridge between two observations touched 1; exactly 1 once below
+            above = np.maximum(distance, 0, out=distance)
+            previous = scratch
+            previous[0] = math.log(initial_health)
+            previous[1:] = above[:-1]
+            above *= previous
+            above *= -2 / variance
+            touched = np.exp(above, out=above)
+            # Liquidated unless every bridge stayed clear: one draw per path
+            survival = np.subtract(1, touched, out=touched).prod(axis=0)
+            liquidated = rng.random(self.paths) >= survival
+        else:
+            liquidated = (distance <= 0).any(axis=0)
+
+        debt_end = debt_usd * (1 + apy * self.horizon_years / 100)
+        equity_end = collateral_usd * ratio_end - debt_end
+        # At liquidation collateral x threshold = debt; the penalty comes out of the equity
+        at_liquidation = debt_end * (1 / LIQUIDATION_THRESHOLD - 1 - LIQUIDATION_PENALTY)
+        equity_end = np.where(liquidated, at_liquidation, equity_end)
+        gas = self._gas_cost_usd(rng, "borrow", gas_price_gwei)
+
+        return self._result(
+            seed,
+            metric="equity_usd",
+            unit="USD",
+            collateral_token=collateral_token.upper(),
+            collateral_usd=round(collateral_usd, 2),
+            initial_health_factor=round(initial_health, 4),
+            outcome=summarize(equity_end - gas, 2),
+            interest=summarize(amount * apy / 100 * self.horizon_years),
+            probability_of_loss=round(float((equity_end - gas < equity_usd).mean()), 6),
+            liquidation_probability=round(float(liquidated.mean()), 6),
+            gas_cost_usd=summarize(gas, 2),
+        )
+
+    def provide_liquidity(
+        self,
+        token_a: str,
+        token_b: str,
+        amount: float,
+        seed: int,
+        gas_price_gwei: Optional[float] = None,
+        protocol: str = "uniswap",
+        range_pct: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Deposit ``amount`` of ``token_a`` and the matching ``token_b`` over ``±range_pct`` of the price.
+
+        ``None`` is a full-range position, worth ``V0 * sqrt(ra * rb)`` for
+        price returns ra, rb against ``V0 * (ra + rb) / 2`` for holding;
+        narrower ranges are valued with ``position_value``. Fees accrue on top.
+        """
+        rng = np.random.default_rng(seed)
+        price_a, price_b = token_price(token_a), token_price(token_b)
+        amm_pool = reference_pool(protocol, token_a, token_b, price_a, price_b)
+        sqrt_price = math.sqrt(amm_pool.spot_price)
+        relative_lower, relative_upper = range_sqrt_bounds(math.nan if range_pct is None else range_pct)
+        sqrt_lower, sqrt_upper = sqrt_price * float(relative_lower), sqrt_price * float(relative_upper)
+        liquidity = liquidity_for_amount0(sqrt_price, sqrt_lower, sqrt_upper, amount)
+        _, amount_b = amounts_for_liquidity(sqrt_price, sqrt_lower, sqrt_upper, liquidity)
+        deposit_usd = amount * price_a + amount_b * price_b
+
+        vol_a, load_a = _vol_and_loading(token_a)
+        vol_b, load_b = _vol_and_loading(token_b)
+        scale = math.sqrt(self.horizon_years)
+        market = rng.standard_normal(self.paths)
+        log_a = vol_a * scale * (load_a * market + math.sqrt(1 - load_a ** 2) * rng.standard_normal(self.paths))
+        log_b = vol_b * scale * (load_b * market + math.sqrt(1 - load_b ** 2) * rng.standard_normal(self.paths))
+        return_a = np.exp(log_a - 0.5 * (vol_a * scale) ** 2)
+        return_b = np.exp(log_b - 0.5 * (vol_b * scale) ** 2)
+
+        value_ratio, hold_ratio = position_value(return_a / return_b, relative_lower, relative_upper)
+        hodl = deposit_usd * return_b * hold_ratio
+        fees = self._realized_apy(rng, BASE_APY["provide_liquidity"]) / 100 * self.horizon_years
+        pool = deposit_usd * return_b * value_ratio
+        gas = self._gas_cost_usd(rng, "provide_liquidity", gas_price_gwei)
+        value = pool * (1 + fees) - gas
+
+        return self._result(
+            seed,
+            metric="value_usd",
+            unit="USD",
+            deposit_usd=round(deposit_usd, 2),
+            amount_b=round(amount_b, 6),
+            pool_fee=amm_pool.fee,
+            pool_share=round(liquidity / (amm_pool.active_liquidity + liquidity), 8),
+            outcome=summarize(value, 2),
+            impermanent_loss_pct=summarize(100 * (pool / hodl - 1), 4),
+            fees_usd=summarize(pool * fees, 2),
+            probability_of_loss=round(float((value < deposit_usd).mean()), 6),
+            probability_below_hodl=round(float((value < hodl).mean()), 6),
+            gas_cost_usd=summarize(gas, 2),
+        )
+
+simulation_engine = MonteCarloEngine(settings.SIMULATION_PATHS, settings.SIMULATION_HORIZON_DAYS)
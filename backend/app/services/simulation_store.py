@@ -0,0 +1,225 @@
+import asyncio
+from collections import Counter
+from contextlib import suppress
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError, IntegrityError, InterfaceError, OperationalError
+import structlog
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.simulation import Simulation, UserSimulation
+from app.models.user import User
+from app.services.user_cache import invalidate_cached_user
+
+logger = structlog.get_logger()
+
+def _database_unavailable(error: Exception) -> bool:
+    """Whether ``error`` comes from an unreachable or restarting database rather than a bad run"""
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, (OperationalError, InterfaceError, OSError, asyncio.TimeoutError))
+
+class SimulationRunWriter:
+    """
+    Write-behind persistence for simulation runs.
+
+    ``submit`` only buffers the run, so requests never wait on the database.
+    ``run`` writes the buffer every ``flush_interval`` seconds, or as soon as
+    ``batch_size`` runs are waiting, with one commit per batch that also adds
+    the runs to each user's ``total_simulations_completed``. Runs not yet
+    written stay readable through ``get_pending``. A batch whose commit fails
+    goes back to the front of the buffer and is retried, backing off from
+    ``retry_backoff`` seconds. If the database is still unreachable after
+    ``retry_attempts`` tries, the runs stay buffered for the next interval;
+    any other failure has the batch written one run at a time, so only runs
+    that cannot be written on their own are lost. When ``max_pending`` runs
+    are buffered (the database is down or slow) new runs are dropped and
+    logged rather than growing without bound.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        max_pending: int,
+        retry_attempts: int = 3,
+        retry_backoff: float = 0.5
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retry_attempts = retry_attempts
+        self.retry_backoff = retry_backoff
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._batch_ready = asyncio.Event()
+        self._in_flight: Optional["asyncio.Future[None]"] = None
+        self._catalog_ids: Dict[Tuple[str, str], int] = {}
+        self._attempts = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a run for insertion.
+
+        ``record`` holds the ``UserSimulation`` columns plus ``run_id``,
+        ``type`` and ``protocol``. Returns False if the buffer is full.
+        """
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            logger.warning("Simulation run dropped, write buffer full", run_id=record["run_id"])
+            return False
+        self._buffer.append(record)
+        self._pending[record["run_id"]] = record
+        if len(self._buffer) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    def get_pending(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """A submitted run that has not been written yet"""
+        return self._pending.get(run_id)
+
+    async def run(self):
+        """Write batches until cancelled"""
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            self._batch_ready.clear()
+            # Cancelling the loop mid-commit must not lose the batch in flight
+            self._in_flight = asyncio.ensure_future(self.flush())
+            await asyncio.shield(self._in_flight)
+
+    async def close(self):
+        """Finish the batch in flight, then write what is left; call after cancelling ``run``"""
+        if self._in_flight is not None:
+            with suppress(Exception):
+                await self._in_flight
+        await self.flush()
+        if self._buffer:
+            logger.error("Simulation runs not persisted at shutdown, database unavailable", count=len(self._buffer))
+
+    async def flush(self):
+        """Write everything buffered now, ``batch_size`` runs per commit"""
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            error = await self._write(batch)
+            if error is None:
+                self._attempts = 0
+                continue
+
+            self._attempts += 1
+            if self._attempts < self.retry_attempts:
+                self.retried += len(batch)
+                self._buffer[:0] = batch
+                await asyncio.sleep(self.retry_backoff * 2 ** (self._attempts - 1))
+                continue
+
+            self._attempts = 0
+            if _database_unavailable(error):
+                self._buffer[:0] = batch
+                logger.warning("Database unavailable, simulation runs kept for the next flush", pending=len(self._pending))
+                return
+
+            # Still failing: write runs one by one so a bad row cannot sink the rest
+            for position, record in enumerate(batch):
+                error = await self._write([record])
+                if error is None:
+                    continue
+                if _database_unavailable(error):
+                    self._buffer[:0] = batch[position:]
+                    return
+                self.failed += 1
+                self._pending.pop(record["run_id"], None)
+                logger.error("Simulation run could not be persisted", run_id=record["run_id"], error=str(error))
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> Optional[Exception]:
+        """Insert ``batch`` in one commit, returning the error if it fails; runs stay pending unless it succeeds"""
+        try:
+            async with AsyncSessionLocal() as db:
+                rows = []
+                for record in batch:
+                    catalog_id = await self._catalog_id(db, record["type"], record["protocol"])
+                    rows.append(UserSimulation(
+                        run_id=record["run_id"],
+                        user_id=record["user_id"],
+                        simulation_id=catalog_id,
+                        input_params=record["input_params"],
+                        result_data=record["result_data"],
+                        status=record["status"],
+                        execution_time=record["execution_time"],
+                        gas_estimate=record["gas_estimate"],
+                        started_at=record["started_at"],
+                        completed_at=record["completed_at"],
+                    ))
+                db.add_all(rows)
+                wallets = await self._apply_progress(db, Counter(record["user_id"] for record in batch))
+                await db.commit()
+        except Exception as e:
+            # Ids looked up or created in the rolled-back transaction may not exist
+            self._catalog_ids.clear()
+            logger.warning("Persisting simulation runs failed", count=len(batch), error=str(e))
+            return e
+
+        self.written += len(batch)
+        self.batches += 1
+        for record in batch:
+            self._pending.pop(record["run_id"], None)
+        for wallet_address in wallets:
+            await invalidate_cached_user(wallet_address)
+        return None
+
+    async def _apply_progress(self, db, completed: Counter) -> List[str]:
+        """Count each user's runs in the batch towards their progress; returns their wallets"""
+        users = (await db.execute(
+            select(User).where(User.id.in_(completed)).with_for_update()
+        )).scalars().all()
+        for user in users:
+            for _ in range(completed[user.id]):
+                user.update_progress(simulation_completed=True)
+        return [user.wallet_address for user in users]
+
+    async def _catalog_id(self, db, simulation_type: str, protocol: str) -> int:
+        """The ``simulations`` row for a type and protocol, created on first use"""
+        key = (simulation_type, protocol.lower())
+        if key in self._catalog_ids:
+            return self._catalog_ids[key]
+
+        query = select(Simulation.id).where(Simulation.type == key[0], Simulation.protocol == key[1]).limit(1)
+        catalog_id = (await db.execute(query)).scalar_one_or_none()
+        if catalog_id is None:
+            try:
+                async with db.begin_nested():
+                    simulation = Simulation(
+                        simulation_id=f"{key[1]}-{key[0].replace('_', '-')}",
+                        name=f"{key[1].title()} {key[0].replace('_', ' ').title()}",
+                        type=key[0],
+                        protocol=key[1],
+                    )
+                    db.add(simulation)
+                catalog_id = simulation.id
+            except IntegrityError:
+                # Another worker created it first
+                catalog_id = (await db.execute(query)).scalar_one()
+        self._catalog_ids[key] = catalog_id
+        return catalog_id
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retried": self.retried,
+        }
+
+simulation_writer = SimulationRunWriter(
+    settings.SIMULATION_WRITE_BATCH_SIZE,
+    settings.SIMULATION_WRITE_INTERVAL,
+    settings.SIMULATION_WRITE_MAX_PENDING
+)
@@ -0,0 +1,112 @@
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+import structlog
+
+from app.core.redis import redis_client
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesce concurrent identical calls into one execution.
+
+    Within a process, callers with the same key await one shared task. Across
+    workers, the first caller takes a Redis lock and runs the call; the others
+    poll ``cached`` (where the leader stores its result) until it appears,
+    the lock is released or ``wait_timeout`` passes, and only then run the
+    call themselves.
+
+    The shared task is detached from the caller that started it, so a client
+    disconnect cancels that caller's wait but not the upstream call the other
+    callers are waiting on.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        lock_ttl: float,
+        wait_timeout: float,
+        poll_interval: float = 0.1
+    ):
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, "asyncio.Task[T]"] = {}
+        self.leaders = 0
+        self.local_joins = 0
+        self.remote_joins = 0
+
+    async def do(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[Optional[T]]]
+    ) -> T:
+        """Return ``call()``'s result, sharing it with concurrent callers of ``key``"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._lead(key, call, cached))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            # Retrieve the exception even if every waiter has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self.local_joins += 1
+
+        return await asyncio.shield(task)
+
+    async def _lead(
+        self,
+        key: str,
+        call: Callable[[], Awaitable[T]],
+        cached: Callable[[], Awaitable[Optional[T]]]
+    ) -> T:
+        lock_key = f"singleflight:{self.namespace}:{key}"
+        token = uuid.uuid4().hex
+
+        if not await redis_client.acquire_lock(lock_key, token, self.lock_ttl):
+            result = await self._wait_for_remote(lock_key, cached)
+            if result is not None:
+                self.remote_joins += 1
+                return result
+            # The other worker failed or is too slow; try to lead ourselves
+            if not await redis_client.acquire_lock(lock_key, token, self.lock_ttl):
+                logger.warning("Single-flight wait timed out", key=lock_key)
+
+        self.leaders += 1
+        try:
+            return await call()
+        finally:
+            await redis_client.release_lock(lock_key, token)
+
+    async def _wait_for_remote(
+        self,
+        lock_key: str,
+        cached: Callable[[], Awaitable[Optional[T]]]
+    ) -> Optional[T]:
+        """Poll for the lock holder's result; None if it never arrives"""
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result = await cached()
+            if result is not None:
+                return result
+            if not await redis_client.exists(lock_key):
+                # Released without a result, or it expired; one last look
+                return await cached()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """Upstream calls made versus calls served by another caller's result"""
+        return {
+            "namespace": self.namespace,
+            "leaders": self.leaders,
+            "local_joins": self.local_joins,
+            "remote_joins": self.remote_joins,
+            "in_flight": len(self._inflight)
+        }
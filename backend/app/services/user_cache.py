@@ -0,0 +1,68 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import DateTime
+from sqlalchemy.orm import make_transient_to_detached
+import structlog
+
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.models.user import User
+
+logger = structlog.get_logger()
+
+# Bump when User columns change so old snapshots are ignored
+USER_CACHE_VERSION = 1
+
+def _key(wallet_address: str) -> str:
+    return f"user:v{USER_CACHE_VERSION}:{wallet_address}"
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    """Serialize a freshly loaded user's column values to JSON-safe types"""
+    snapshot = {}
+    for column in User.__table__.columns:
+        value = getattr(user, column.key)
+        snapshot[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return snapshot
+
+def user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    """
+    Rebuild a detached, read-only ``User`` from a snapshot.
+
+    The instance is not attached to any session: changes made to it are never
+    flushed, so handlers that write must load the user with
+    ``get_current_user_for_update`` instead.
+    """
+    values = {}
+    for column in User.__table__.columns:
+        value = snapshot.get(column.key)
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        values[column.key] = value
+
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+async def get_cached_user(wallet_address: str) -> Optional[User]:
+    """Return the cached user for a token subject, or None on a miss"""
+    snapshot = await redis_client.get_json(_key(wallet_address))
+    if snapshot is None:
+        return None
+
+    try:
+        return user_from_snapshot(snapshot)
+    except (TypeError, ValueError) as e:
+        logger.warning("Discarding invalid user snapshot", wallet_address=wallet_address, error=str(e))
+        return None
+
+async def cache_user(user: User) -> bool:
+    """Store a snapshot of ``user`` for USER_CACHE_TTL seconds"""
+    return await redis_client.set_json(
+        _key(user.wallet_address),
+        snapshot_user(user),
+        ex=settings.USER_CACHE_TTL
+    )
+
+async def invalidate_cached_user(wallet_address: str) -> bool:
+    """Drop the snapshot after the user row changes"""
+    return await redis_client.delete(_key(wallet_address))
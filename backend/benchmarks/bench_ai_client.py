@@ -0,0 +1,121 @@
+"""
+Compare /ai/explain-concept latency with a per-request AIService versus the
+shared, lifespan-managed instance.
+
+The upstream is the local HTTPS stub from ``benchmarks.stub_llm``, so the
+per-request mode pays a real TCP + TLS handshake and client construction on
+every call while the shared mode reuses keep-alive connections.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_ai_client --requests 300 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from benchmarks.stub_llm import StubLLMServer
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``samples``"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+async def _drive(app, total: int, concurrency: int) -> List[float]:
+    import httpx
+
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver"
+    ) as client:
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/ai/explain-concept",
+                    # Unique concepts so no cache layer short-circuits the call
+                    json={"concept": f"liquidity pools #{i}"}
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+
+        await asyncio.gather(*[one(i) for i in range(total)])
+    return latencies
+
+async def run(total: int, concurrency: int, warmup: int) -> Dict[str, Dict[str, float]]:
+    from main import app
+    from app.core.deps import get_current_user, get_ai_service
+    from app.services.ai_service import AIService
+
+    stub_user = SimpleNamespace(
+        id=1,
+        experience_level="beginner",
+        overall_progress_percentage=0.0,
+        total_lessons_completed=0,
+    )
+    app.dependency_overrides[get_current_user] = lambda: stub_user
+
+    async def per_request_ai_service():
+        service = AIService()
+        try:
+            yield service
+        finally:
+            await service.close()
+
+    shared = AIService()
+    modes: Dict[str, Callable] = {
+        "per-request": per_request_ai_service,
+        "shared": lambda: shared,
+    }
+
+    results = {}
+    try:
+        for name, dependency in modes.items():
+            app.dependency_overrides[get_ai_service] = dependency
+            await _drive(app, warmup, concurrency)
+            latencies = await _drive(app, total, concurrency)
+            results[name] = {
+                "p50_ms": percentile(latencies, 50),
+                "p99_ms": percentile(latencies, 99),
+                "mean_ms": sum(latencies) / len(latencies),
+            }
+    finally:
+        await shared.close()
+        app.dependency_overrides.clear()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--upstream-latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    with StubLLMServer(latency=args.upstream_latency_ms / 1000) as stub, \
+            tempfile.TemporaryDirectory() as tmpdir:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tmpdir}/bench.db")
+        os.environ["GROQ_API_KEY"] = "stub-key"
+        os.environ["GROQ_API_URL"] = stub.url
+        os.environ["SSL_CERT_FILE"] = stub.cert_path
+        # Measure the client, not the per-client request budget
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+
+        results = asyncio.run(run(args.requests, args.concurrency, args.warmup))
+
+    print(f"{'mode':<12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'mean (ms)':>10}")
+    for name, stats in results.items():
+        print(f"{name:<12} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f} {stats['mean_ms']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
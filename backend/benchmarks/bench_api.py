@@ -0,0 +1,295 @@
+"""
+Replay a weighted traffic mix against the v1 API and check it against a baseline.
+
+Runs fully offline: a throwaway SQLite database, fakeredis in place of Redis
+and the plain-HTTP stub from ``benchmarks.stub_llm`` as the LLM upstream.
+Requests go through the real application, middleware included, over an
+in-process ASGI transport, so the numbers measure the API rather than a
+network.
+
+Each scenario reports throughput and p50/p95/p99 latency. The run fails (exit
+status 1) if any request errors, or if a scenario's throughput, p95 or p99 is
+worse than ``benchmarks/baseline.json`` by more than ``--tolerance``. Record
+a new baseline on the machine that runs the check.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.bench_api
+    python -m benchmarks.bench_api --requests 5000 --concurrency 32
+    python -m benchmarks.bench_api --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from benchmarks.bench_ai_client import percentile
+from benchmarks.stub_llm import StubLLMServer
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# (method, path, json body) for one request; the Random is seeded per run
+RequestFactory = Callable[[random.Random], Tuple[str, str, Optional[Dict[str, Any]]]]
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    weight: int
+    build: RequestFactory
+
+CONCEPTS = [
+    "liquidity pools", "impermanent loss", "yield farming", "flash loans",
+    "collateralization ratio", "automated market makers", "staking", "gas fees",
+]
+CHAT_MESSAGES = [
+    "How do I start with DeFi safely?",
+    "What is slippage?",
+    "Is lending on Aave risky?",
+    "How do I avoid scams?",
+]
+SIMULATIONS = [
+    {"type": "swap", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC", "amount": "1.0"},
+    {"type": "lend", "protocol": "aave", "token_a": "USDC", "amount": "1000"},
+    {"type": "borrow", "protocol": "compound", "token_a": "ETH", "token_b": "DAI", "amount": "500"},
+    {"type": "stake", "protocol": "lido", "token_a": "ETH", "amount": "2.0"},
+    {"type": "provide_liquidity", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC", "amount": "1.0"},
+]
+RISK_REQUESTS = [
+    {"type": "protocol", "protocol": "uniswap"},
+    {"type": "protocol", "protocol": "aave"},
+    {"type": "token", "address": "0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48"},
+    {"type": "transaction", "protocol": "compound", "amount": "2500"},
+]
+# defi-basics answer key is [1, 1, 1, 2, 2]; mixes passing and failing attempts
+QUIZ_ANSWERS = [[1, 1, 1, 2, 2], [1, 1, 1, 2, 0], [0, 1, 0, 2, 2], [1, 0, 1, 2, 2]]
+
+SCENARIOS: List[Scenario] = [
+    Scenario("lessons.list", 30, lambda rng: ("GET", "/api/v1/lessons/", None)),
+    Scenario("quizzes.submit", 15, lambda rng: (
+        "POST", "/api/v1/quizzes/defi-basics/submit",
+        {"quiz_id": "defi-basics", "answers": rng.choice(QUIZ_ANSWERS)}
+    )),
+    Scenario("simulations.run", 15, lambda rng: (
+        "POST", "/api/v1/simulations/run", rng.choice(SIMULATIONS)
+    )),
+    Scenario("risk.assess", 20, lambda rng: (
+        "POST", "/api/v1/risk/assess", rng.choice(RISK_REQUESTS)
+    )),
+    # A small concept pool, so repeat questions exercise the AI caches
+    Scenario("ai.explain", 10, lambda rng: (
+        "POST", "/api/v1/ai/explain-concept", {"concept": rng.choice(CONCEPTS)}
+    )),
+    Scenario("ai.chat", 10, lambda rng: (
+        "POST", "/api/v1/ai/chat", {"message": rng.choice(CHAT_MESSAGES)}
+    )),
+]
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    """Throughput and latency percentiles (ms) for one scenario"""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+    min_delta_ms: float = 2.0
+) -> List[str]:
+    """
+    Describe every regression of ``results`` against ``baseline``.
+
+    Latency must grow by more than ``tolerance`` (a fraction) and by more than
+    ``min_delta_ms``, so sub-millisecond jitter on fast routes is not flagged.
+    """
+    regressions = []
+    for name, stats in results.items():
+        if stats["errors"]:
+            regressions.append(f"{name}: {stats['errors']} failed requests")
+
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+
+        floor = expected["throughput_rps"] * (1 - tolerance)
+        if stats["throughput_rps"] < floor:
+            regressions.append(
+                f"{name}: throughput {stats['throughput_rps']:.1f} rps < {floor:.1f} rps"
+            )
+        for metric in ("p95_ms", "p99_ms"):
+            ceiling = max(expected[metric] * (1 + tolerance), expected[metric] + min_delta_ms)
+            if stats[metric] > ceiling:
+                regressions.append(
+                    f"{name}: {metric} {stats[metric]:.2f} ms > {ceiling:.2f} ms"
+                )
+    return regressions
+
+async def _login_users(client, count: int) -> List[Dict[str, str]]:
+    """Sign in ``count`` wallets, returning their auth headers"""
+    headers = []
+    for i in range(count):
+        response = await client.post("/api/v1/auth/login", json={
+            "wallet_address": f"0x{i + 1:040x}",
+            "signature": "0x",
+            "message": "login"
+        })
+        response.raise_for_status()
+        headers.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+    return headers
+
+async def drive(
+    app,
+    scenarios: Sequence[Scenario],
+    total: int,
+    concurrency: int,
+    users: int = 50,
+    seed: int = 1
+) -> Dict[str, Dict[str, float]]:
+    """
+    Send ``total`` requests drawn from ``scenarios`` by weight.
+
+    ``concurrency`` workers each keep one request in flight, acting as a
+    randomly chosen signed-in user. Results are keyed by scenario name, plus
+    ``all`` for the whole mix.
+    """
+    import httpx
+
+    rng = random.Random(seed)
+    plan = rng.choices(scenarios, weights=[scenario.weight for scenario in scenarios], k=total)
+    latencies: Dict[str, List[float]] = {scenario.name: [] for scenario in scenarios}
+    errors: Dict[str, int] = {scenario.name: 0 for scenario in scenarios}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver",
+        timeout=30.0
+    ) as client:
+        auth = await _login_users(client, users)
+        queue = iter(plan)
+
+        async def worker():
+            for scenario in queue:
+                method, path, body = scenario.build(rng)
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body, headers=rng.choice(auth))
+                latencies[scenario.name].append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors[scenario.name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    results = {
+        name: summarize(samples, errors[name], elapsed)
+        for name, samples in latencies.items() if samples
+    }
+    results["all"] = summarize(
+        [sample for samples in latencies.values() for sample in samples],
+        sum(errors.values()),
+        elapsed
+    )
+    return results
+
+async def run(total: int, concurrency: int, warmup: int, users: int, seed: int) -> Dict[str, Dict[str, float]]:
+    """Prepare the offline backends, warm up, then measure one mix"""
+    import fakeredis.aioredis
+
+    from main import app
+    from app.core.database import create_tables
+    from app.core.redis import redis_client
+    from app.services.ai_service import AIService
+
+    await create_tables()
+    redis_client.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    redis_client.connected = True
+    app.state.ai_service = AIService()
+
+    try:
+        await drive(app, SCENARIOS, warmup, concurrency, users, seed)
+        return await drive(app, SCENARIOS, total, concurrency, users, seed)
+    finally:
+        await app.state.ai_service.close()
+        await redis_client.close()
+
+def print_results(results: Dict[str, Dict[str, float]]):
+    print(f"{'scenario':<18} {'reqs':>6} {'errs':>5} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in results.items():
+        print(
+            f"{name:<18} {stats['requests']:>6} {stats['errors']:>5} {stats['throughput_rps']:>9.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--upstream-latency-ms", type=float, default=5.0)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed fractional slowdown before a scenario counts as a regression")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write this run's results as the new baseline instead of checking")
+    args = parser.parse_args()
+
+    with StubLLMServer(latency=args.upstream_latency_ms / 1000, tls=False) as stub, \
+            tempfile.TemporaryDirectory() as tmpdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/bench.db"
+        os.environ["GROQ_API_KEY"] = "stub-key"
+        os.environ["GROQ_API_URL"] = stub.url
+        # Every virtual user would share a bucket per scenario otherwise
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+        os.environ["ENABLE_METRICS"] = "false"
+        # SQL echo would dominate the timings
+        os.environ["DEBUG"] = "false"
+        # SQLite serialises writers, so slow-request traces would flood the report
+        os.environ["TRACE_SLOW_REQUEST_MS"] = "60000"
+
+        results = asyncio.run(run(args.requests, args.concurrency, args.warmup, args.users, args.seed))
+
+    print_results(results)
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({
+            "config": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "users": args.users,
+                "seed": args.seed,
+                "upstream_latency_ms": args.upstream_latency_ms,
+            },
+            "scenarios": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline first")
+        return
+
+    baseline = json.loads(args.baseline.read_text())["scenarios"]
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions against {args.baseline.name} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Serves ``POST /openai/v1/chat/completions`` over HTTPS with a throwaway
+self-signed certificate, so benchmarks pay real TCP + TLS connection costs
+without calling (or paying for) the real upstream.
+"""
+import asyncio
+import datetime
+import ipaddress
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+STUB_COMPLETION_TEXT = (
+    "Simple Definition: a liquidity pool is a shared pot of tokens that traders swap against. "
+    "How It Works: providers deposit pairs and earn fees. "
+    "Important Considerations/Risks: impermanent loss and smart contract risk."
+)
+
+def _generate_self_signed_cert(directory: str) -> tuple[str, str]:
+    """Write a localhost certificate/key pair and return their paths"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.utcnow()
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(
+            x509.SubjectAlternativeName([
+                x509.DNSName("localhost"),
+                x509.IPAddress(ipaddress.ip_address("127.0.0.1")),
+            ]),
+            critical=False,
+        )
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+
+    cert_path = os.path.join(directory, "stub-llm.crt")
+    key_path = os.path.join(directory, "stub-llm.key")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def create_stub_app(latency: float = 0.0, text: str = STUB_COMPLETION_TEXT) -> Starlette:
+    """
+    Build an app that answers chat completions after ``latency`` seconds.
+
+    Streaming requests get the first chunk after ``latency`` and the remaining
+    words as separate ``chat.completion.chunk`` events.
+    """
+
+    async def stream_chunks(model: str):
+        if latency:
+            await asyncio.sleep(latency)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop" if i == len(words) - 1 else "",
+                        "logprobs": {"content": None},
+                        "delta": {"role": "assistant", "content": word if i == 0 else f" {word}"},
+                    }
+                ],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        if body.get("stream"):
+            return StreamingResponse(
+                stream_chunks(body.get("model", "stub")),
+                media_type="text/event-stream"
+            )
+        if latency:
+            await asyncio.sleep(latency)
+        return JSONResponse({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "logprobs": {"content": None},
+                    "message": {"role": "assistant", "content": text},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": len(str(body.get("messages", "")).split()),
+                "completion_tokens": len(text.split()),
+                "total_tokens": len(str(body.get("messages", "")).split()) + len(text.split()),
+            },
+        })
+
+    return Starlette(routes=[
+        Route("/openai/v1/chat/completions", chat_completions, methods=["POST"]),
+    ])
+
+class StubLLMServer:
+    """Run the stub app under uvicorn in a background thread"""
+
+    def __init__(self, latency: float = 0.0, tls: bool = True):
+        self.latency = latency
+        self.tls = tls
+        self.port = _free_port()
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self.cert_path: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{self.port}"
+
+    def start(self) -> "StubLLMServer":
+        ssl_options = {}
+        if self.tls:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            self.cert_path, key_path = _generate_self_signed_cert(self._tmpdir.name)
+            ssl_options = {"ssl_certfile": self.cert_path, "ssl_keyfile": key_path}
+
+        config = uvicorn.Config(
+            create_stub_app(self.latency),
+            host="127.0.0.1",
+            port=self.port,
+            log_level="warning",
+            lifespan="off",
+            **ssl_options,
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub LLM server failed to start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
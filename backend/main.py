@@ -2,19 +2,31 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
+from sqlalchemy import text
 import structlog
 import uvicorn
 
 from app.core.config import settings
-from app.core.database import engine, create_tables
-from app.core.redis import redis_client
+from app.core.database import engine, async_engine, create_tables
+from app.core.redis import redis_client, init_redis
 from app.api.v1.api import api_router
 from app.core.exceptions import setup_exception_handlers
+from app.core.catalog import catalog
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.metrics import MetricsMiddleware, instrument_pool, start_metrics_server
+from app.core.tracing import LogSpanExporter, TracingMiddleware, tracer
+from app.services.ai_service import AIService
+from app.services.ai_cache import listen_for_invalidations
+from app.services.protocol_metrics import ProtocolMetricsIngester, protocol_metrics_store
+from app.services.simulation_store import simulation_writer
 
 # Configure structured logging
 structlog.configure(
     processors=[
+        # Request and trace ids bound by TracingMiddleware
+        structlog.contextvars.merge_contextvars,
         structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
@@ -32,12 +44,20 @@ structlog.configure(
 
 logger = structlog.get_logger()
 
+# Individual spans are logged at debug level, each tagged with its request id
+tracer.add_exporter(LogSpanExporter())
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
     # Startup
     logger.info("Starting Aya DeFi Navigator API")
     
+    if settings.ENABLE_METRICS:
+        instrument_pool(engine, "sync")
+        instrument_pool(async_engine.sync_engine, "async")
+        start_metrics_server(settings.METRICS_PORT)
+    
     # Create database tables
     try:
         await create_tables()
@@ -46,19 +66,59 @@ async def lifespan(app: FastAPI):
         logger.warning(f"Database initialization failed: {e}")
         logger.info("API will run with mock data")
 
-    # Test Redis connection
+    # Encode the static catalog endpoints once instead of per request
+    catalog.compile_all()
+    
+    # Connect to Redis (connect() logs and swallows failures)
+    await init_redis()
+    if not redis_client.connected:
+        logger.info("API will run without caching")
+    
+    # Create the shared AI service (one pooled upstream client per process)
     try:
-        await redis_client.ping()
-        logger.info("Redis connection established")
+        app.state.ai_service = AIService()
+        logger.info("AI service initialized")
     except Exception as e:
-        logger.warning(f"Redis connection failed: {e}")
-        logger.info("API will run without caching")
+        app.state.ai_service = None
+        logger.warning(f"AI service initialization failed: {e}")
+    
+    # Keep per-worker AI cache tiers in sync with invalidations from peers
+    invalidation_task = asyncio.create_task(listen_for_invalidations())
+    
+    # Refresh protocol TVL/volume/APY in the background; requests only read the store
+    metrics_ingester = metrics_task = None
+    if settings.PROTOCOL_METRICS_ENABLED:
+        metrics_ingester = ProtocolMetricsIngester(
+            protocol_metrics_store,
+            settings.PROTOCOL_METRICS_INTERVAL,
+            settings.DEFILLAMA_API_URL,
+            settings.DEFILLAMA_YIELDS_URL
+        )
+        metrics_task = asyncio.create_task(metrics_ingester.run())
+    
+    # Write simulation runs to the database in batches
+    simulation_writer_task = asyncio.create_task(simulation_writer.run())
     
     yield
     
     # Shutdown
     logger.info("Shutting down Aya DeFi Navigator API")
+    invalidation_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await invalidation_task
+    if metrics_task:
+        metrics_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await metrics_task
+        await metrics_ingester.close()
+    simulation_writer_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await simulation_writer_task
+    await simulation_writer.close()
+    if app.state.ai_service:
+        await app.state.ai_service.close()
     await redis_client.close()
+    await async_engine.dispose()
 
 # Create FastAPI application
 app = FastAPI(
@@ -74,6 +134,8 @@ app = FastAPI(
 setup_exception_handlers(app)
 
 # Add middleware
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_HOSTS,
@@ -87,6 +149,12 @@ app.add_middleware(
     allowed_hosts=settings.ALLOWED_HOSTS
 )
 
+app.add_middleware(TracingMiddleware)
+
+# Outermost, so latency includes every other middleware
+if settings.ENABLE_METRICS:
+    app.add_middleware(MetricsMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
@@ -105,9 +173,8 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Check database connection
-        from app.core.database import get_db
-        db = next(get_db())
-        db.execute("SELECT 1")
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         
         # Check Redis connection
         await redis_client.ping()
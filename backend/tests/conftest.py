@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Settings and the database engines are built at import time, so point them
+# at a throwaway SQLite file before any test module imports the app
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='aya-tests-')}/aya.db"
+)
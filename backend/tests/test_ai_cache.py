@@ -0,0 +1,188 @@
+import pytest
+import asyncio
+import json
+import fakeredis.aioredis
+from unittest.mock import patch
+
+from app.core.local_cache import LocalTTLCache
+from app.core.redis import RedisClient
+from app.services.ai_cache import (
+    AICache,
+    ExplanationResult,
+    AI_CACHE_SCHEMA_VERSION,
+    AI_CACHE_INVALIDATION_CHANNEL,
+    apply_invalidation,
+    listen_for_invalidations,
+    normalize_text,
+    hash_key_parts
+)
+
+class FakeRedis:
+    """In-memory stand-in for RedisClient's JSON helpers"""
+    
+    def __init__(self):
+        self.store = {}
+        self.ttls = {}
+        self.published = []
+    
+    async def get_json(self, key):
+        value = self.store.get(key)
+        return json.loads(value) if value is not None else None
+    
+    async def set_json(self, key, value, ex=None):
+        self.store[key] = json.dumps(value)
+        self.ttls[key] = ex
+        return True
+    
+    async def delete(self, key):
+        self.store.pop(key, None)
+        return True
+    
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return True
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeRedis()
+    with patch('app.services.ai_cache.redis_client', redis):
+        yield redis
+
+@pytest.fixture
+def explain_cache():
+    return AICache("explain", ExplanationResult, ttl=3600)
+
+def test_normalize_text():
+    """Test that case, unicode width and whitespace are normalized"""
+    assert normalize_text("  Liquidity\tPOOLS ") == "liquidity pools"
+    assert normalize_text("Ｌｉｑｕｉｄｉｔｙ") == "liquidity"
+
+def test_key_is_versioned_and_hashed(explain_cache):
+    """Test key layout and that equivalent inputs share a key"""
+    key = explain_cache.key("Liquidity Pools", "beginner", True)
+    
+    assert key.startswith(f"ai:explain:v{AI_CACHE_SCHEMA_VERSION}:")
+    assert len(key.rsplit(":", 1)[1]) == 32
+    assert key == explain_cache.key("  liquidity   pools", "Beginner", True)
+    assert key != explain_cache.key("liquidity pools", "beginner", False)
+    assert hash_key_parts("a", "b c") != hash_key_parts("a b", "c")
+
+@pytest.mark.asyncio
+async def test_round_trip_and_stats(fake_redis, explain_cache):
+    """Test set/get round trip, TTL and hit/miss counters"""
+    result = {"text": "Pools", "examples": ["ETH/USDC"], "next_steps": ["Quiz"]}
+    
+    assert await explain_cache.get("pools", "beginner", True) is None
+    await explain_cache.set(result, "pools", "beginner", True)
+    assert await explain_cache.get("Pools", "beginner", True) == result
+    
+    assert list(fake_redis.ttls.values()) == [3600]
+    stats = explain_cache.stats()
+    assert stats["hits"] == stats["redis_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+@pytest.mark.asyncio
+async def test_invalid_payload_is_a_miss(fake_redis, explain_cache):
+    """Test that entries not matching the schema are ignored"""
+    fake_redis.store[explain_cache.key("pools", "beginner", True)] = json.dumps({"text": 1})
+    
+    assert await explain_cache.get("pools", "beginner", True) is None
+    assert explain_cache.misses == 1
+
+@pytest.mark.asyncio
+async def test_version_bump_invalidates(fake_redis):
+    """Test that a schema version bump stops reading old entries"""
+    result = {"text": "Pools", "examples": [], "next_steps": []}
+    await AICache("explain", ExplanationResult, ttl=60, version=1).set(result, "pools")
+    
+    assert await AICache("explain", ExplanationResult, ttl=60, version=2).get("pools") is None
+
+@pytest.mark.asyncio
+async def test_local_tier_serves_repeat_hits(fake_redis):
+    """Test that the in-process tier answers after the first Redis hit"""
+    cache = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    other_worker = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    result = {"text": "Pools", "examples": [], "next_steps": []}
+    await other_worker.set(result, "pools")
+    
+    assert await cache.get("pools") == result  # from Redis
+    fake_redis.store.clear()
+    assert await cache.get("pools") == result  # from local tier
+    
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["redis_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["local_hit_ratio"] == stats["redis_hit_ratio"] == 0.5
+
+@pytest.mark.asyncio
+async def test_local_tier_returns_copies(fake_redis):
+    """Test that callers mutating a result cannot corrupt the local tier"""
+    cache = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    await cache.set({"text": "Pools", "examples": [], "next_steps": []}, "pools")
+    
+    (await cache.get("pools"))["examples"].append("mutated")
+    assert (await cache.get("pools"))["examples"] == []
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers(fake_redis):
+    """Test that invalidate() publishes and peers evict their local copy"""
+    writer = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    reader = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    await writer.set({"text": "Old", "examples": [], "next_steps": []}, "pools")
+    await reader.get("pools")
+    assert len(reader.local) == 1
+    
+    await writer.invalidate("pools")
+    channel, message = fake_redis.published[-1]
+    assert channel == AI_CACHE_INVALIDATION_CHANNEL
+    
+    apply_invalidation(message)
+    assert len(reader.local) == 0
+    assert await reader.get("pools") is None
+
+@pytest.mark.asyncio
+async def test_invalidation_evicts_a_peer_over_pubsub():
+    """Test a second worker's listener evicts its LRU entry when a peer invalidates over Redis pub/sub"""
+    server = fakeredis.FakeServer()
+    writer_redis, reader_redis = RedisClient(), RedisClient()
+    for client in (writer_redis, reader_redis):
+        client.redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        client.connected = True
+    
+    reader = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+    with patch('app.services.ai_cache.redis_client', reader_redis):
+        listener = asyncio.create_task(listen_for_invalidations())
+        await reader.set({"text": "Old", "examples": [], "next_steps": []}, "pools")
+        assert len(reader.local) == 1
+        # Wait for the listener to subscribe before publishing
+        while not (await reader_redis.redis.pubsub_numsub(AI_CACHE_INVALIDATION_CHANNEL))[0][1]:
+            await asyncio.sleep(0.01)
+    
+    try:
+        with patch('app.services.ai_cache.redis_client', writer_redis):
+            writer = AICache("explain", ExplanationResult, ttl=3600, local_maxsize=10)
+            assert await writer.invalidate("pools")
+        
+        async with asyncio.timeout(2):
+            while len(reader.local):
+                await asyncio.sleep(0.01)
+    finally:
+        listener.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await listener
+
+def test_local_ttl_cache_lru_and_expiry():
+    """Test LRU eviction order and TTL expiry of the local tier"""
+    now = [0.0]
+    cache = LocalTTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    
+    now[0] = 11
+    assert cache.get("a") is None
+    assert len(cache) == 1
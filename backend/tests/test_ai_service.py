@@ -11,6 +11,22 @@ def ai_service():
         mock_settings.MODEL_NAME = "test-model"
         mock_settings.MAX_TOKENS = 1000
         mock_settings.TEMPERATURE = 0.7
+        mock_settings.LLM_TIMEOUT = 5.0
+        mock_settings.LLM_MAX_RETRIES = 0
+        mock_settings.LLM_MAX_CONNECTIONS = 10
+        mock_settings.LLM_MAX_KEEPALIVE_CONNECTIONS = 5
+        mock_settings.LLM_KEEPALIVE_EXPIRY = 30.0
+        mock_settings.GROQ_API_URL = "https://api.groq.com"
+        mock_settings.AI_EXPLAIN_CACHE_TTL = 3600
+        mock_settings.AI_QUIZ_CACHE_TTL = 7200
+        mock_settings.AI_LOCAL_CACHE_SIZE = 0
+        mock_settings.AI_LOCAL_CACHE_TTL = 300
+        mock_settings.AI_SEMANTIC_CACHE_THRESHOLD = 0.85
+        mock_settings.AI_SEMANTIC_INDEX_SIZE = 100
+        mock_settings.AI_SINGLE_FLIGHT_LOCK_TTL = 10
+        mock_settings.AI_SINGLE_FLIGHT_WAIT = 1.0
+        mock_settings.LLM_PROMPT_COST_PER_1K_TOKENS = 0.5
+        mock_settings.LLM_COMPLETION_COST_PER_1K_TOKENS = 1.0
         return AIService()
 
 @pytest.mark.asyncio
@@ -40,10 +56,10 @@ async def test_explain_concept_success(ai_service):
     - Learn about impermanent loss
     """
     
-    with patch.object(ai_service.client.chat.completions, 'create', return_value=mock_completion):
-        with patch('app.services.ai_service.redis_client') as mock_redis:
-            mock_redis.get.return_value = None
-            mock_redis.setex = AsyncMock()
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_completion):
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
+            mock_redis.set_json = AsyncMock()
             
             result = await ai_service.explain_concept(
                 concept="liquidity pools",
@@ -59,19 +75,19 @@ async def test_explain_concept_success(ai_service):
 @pytest.mark.asyncio
 async def test_explain_concept_cached(ai_service):
     """Test cached concept explanation"""
-    cached_result = str({
+    cached_result = {
         "text": "Cached explanation",
         "examples": ["Cached example"],
         "next_steps": ["Cached step"]
-    })
+    }
     
-    with patch('app.services.ai_service.redis_client') as mock_redis:
-        mock_redis.get.return_value = cached_result
+    with patch('app.services.ai_cache.redis_client') as mock_redis:
+        mock_redis.get_json = AsyncMock(return_value=cached_result)
         
         result = await ai_service.explain_concept("test concept")
         
         assert result["text"] == "Cached explanation"
-        mock_redis.get.assert_called_once()
+        mock_redis.get_json.assert_called_once()
 
 @pytest.mark.asyncio
 async def test_generate_quiz_success(ai_service):
@@ -80,10 +96,10 @@ async def test_generate_quiz_success(ai_service):
     mock_completion.choices = [Mock()]
     mock_completion.choices[0].message.content = "Quiz content"
     
-    with patch.object(ai_service.client.chat.completions, 'create', return_value=mock_completion):
-        with patch('app.services.ai_service.redis_client') as mock_redis:
-            mock_redis.get.return_value = None
-            mock_redis.setex = AsyncMock()
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_completion):
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
+            mock_redis.set_json = AsyncMock()
             
             with patch.object(ai_service, '_parse_quiz_questions') as mock_parse:
                 mock_parse.return_value = [
@@ -114,7 +130,7 @@ async def test_chat_success(ai_service):
     mock_completion.choices = [Mock()]
     mock_completion.choices[0].message.content = "This is a helpful response about DeFi."
     
-    with patch.object(ai_service.client.chat.completions, 'create', return_value=mock_completion):
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_completion):
         result = await ai_service.chat(
             message="What is DeFi?",
             context="User is a beginner"
@@ -168,9 +184,9 @@ async def test_analyze_transaction(ai_service):
 @pytest.mark.asyncio
 async def test_explain_concept_error_handling(ai_service):
     """Test error handling in concept explanation"""
-    with patch.object(ai_service.client.chat.completions, 'create', side_effect=Exception("API Error")):
-        with patch('app.services.ai_service.redis_client') as mock_redis:
-            mock_redis.get.return_value = None
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
             
             result = await ai_service.explain_concept("test concept")
             
@@ -181,9 +197,9 @@ async def test_explain_concept_error_handling(ai_service):
 @pytest.mark.asyncio
 async def test_generate_quiz_fallback(ai_service):
     """Test quiz generation fallback"""
-    with patch.object(ai_service.client.chat.completions, 'create', side_effect=Exception("API Error")):
-        with patch('app.services.ai_service.redis_client') as mock_redis:
-            mock_redis.get.return_value = None
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
             
             result = await ai_service.generate_quiz("test topic")
             
@@ -224,3 +240,165 @@ def test_get_fallback_quiz(ai_service):
     assert "options" in quiz["questions"][0]
     assert "correct_answer" in quiz["questions"][0]
     assert "explanation" in quiz["questions"][0]
+
+@pytest.mark.asyncio
+async def test_completion_timeout_falls_back(ai_service):
+    """Test that a hung completion is abandoned after the per-call timeout"""
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    
+    ai_service.timeout = 0.05
+    with patch.object(ai_service.client.chat.completions, 'create', side_effect=hang):
+        result = await ai_service.chat(message="What is DeFi?")
+    
+    assert "trouble" in result["text"].lower()
+
+@pytest.mark.asyncio
+async def test_completions_do_not_block_event_loop(ai_service):
+    """Test that concurrent completions overlap instead of running serially"""
+    async def slow_completion(*args, **kwargs):
+        await asyncio.sleep(0.1)
+        completion = Mock()
+        completion.choices = [Mock()]
+        completion.choices[0].message.content = "DeFi answer"
+        return completion
+    
+    with patch.object(ai_service.client.chat.completions, 'create', side_effect=slow_completion):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*[
+            ai_service.chat(message=f"Question {i}") for i in range(50)
+        ])
+        elapsed = loop.time() - started
+    
+    assert all(r["text"] == "DeFi answer" for r in results)
+    assert elapsed < 1.0
+
+@pytest.mark.asyncio
+async def test_close_releases_connection_pool(ai_service):
+    """Test that closing the service closes its pooled HTTP client"""
+    assert not ai_service.http_client.is_closed
+    await ai_service.close()
+    assert ai_service.http_client.is_closed
+
+class FakeStream:
+    """Async iterator standing in for a streamed Groq completion"""
+    
+    def __init__(self, deltas, delay=0.0):
+        self.deltas = deltas
+        self.delay = delay
+        self.closed = False
+    
+    def __aiter__(self):
+        return self._iterate()
+    
+    async def _iterate(self):
+        for delta in self.deltas:
+            await asyncio.sleep(self.delay)
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = delta
+            yield chunk
+    
+    async def close(self):
+        self.closed = True
+
+@pytest.mark.asyncio
+async def test_stream_chat_yields_tokens_then_metadata(ai_service):
+    """Test that chat streaming forwards deltas and ends with a done event"""
+    stream = FakeStream(["DeFi ", "lets you ", None, "swap tokens."])
+    
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=stream):
+        events = [event async for event in ai_service.stream_chat("How do I swap?")]
+    
+    tokens = [data["text"] for name, data in events if name == "token"]
+    assert tokens == ["DeFi ", "lets you ", "swap tokens."]
+    assert events[-1][0] == "done"
+    assert "Slippage" in events[-1][1]["related_topics"]
+    assert stream.closed
+
+@pytest.mark.asyncio
+async def test_stream_timeout_bounds_each_chunk_not_the_stream(ai_service):
+    """Test a slow consumer outlasts the timeout while a stalled upstream does not"""
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock,
+                      return_value=FakeStream(["a", "b", "c"])):
+        received = []
+        async for delta in ai_service._stream_complete("system", "prompt", timeout=0.05):
+            received.append(delta)
+            await asyncio.sleep(0.04)
+    assert received == ["a", "b", "c"]
+    
+    stalled = FakeStream(["a", "b"], delay=0.2)
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=stalled):
+        with pytest.raises(TimeoutError):
+            async for _ in ai_service._stream_complete("system", "prompt", timeout=0.05):
+                pass
+    assert stalled.closed
+
+@pytest.mark.asyncio
+async def test_stream_explain_concept_error_event(ai_service):
+    """Test that a failing upstream produces a trailing error event"""
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
+            
+            events = [event async for event in ai_service.stream_explain_concept("test concept")]
+    
+    assert events == [("error", {"message": events[0][1]["message"]})]
+    assert "apologize" in events[0][1]["message"].lower()
+
+@pytest.mark.asyncio
+async def test_explain_concept_semantic_cache(ai_service):
+    """Test that rephrased concepts reuse one answer and one LLM call"""
+    store = {}
+    
+    async def get_json(key):
+        return store.get(key)
+    
+    async def set_json(key, value, ex=None):
+        store[key] = value
+        return True
+    
+    mock_completion = Mock()
+    mock_completion.choices = [Mock()]
+    mock_completion.choices[0].message.content = "A smart contract audit reviews code"
+    mock_completion.usage = Mock(prompt_tokens=200, completion_tokens=100)
+    
+    with patch.object(ai_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_completion) as mock_create:
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = get_json
+            mock_redis.set_json = set_json
+            
+            for concept in ["Smart contract audit", "What is a smart contract audit?", "smart contract auditing"]:
+                result = await ai_service.explain_concept(concept)
+                assert result["text"] == "A smart contract audit reviews code"
+    
+    assert mock_create.await_count == 1
+    usage = ai_service.usage_stats()
+    assert usage["calls"] == 1
+    assert usage["cost_usd"] == pytest.approx(0.2)
+    semantic_stats = ai_service.cache_stats()[1]
+    assert semantic_stats["namespace"] == "semantic"
+    assert semantic_stats["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_explanations_coalesce(ai_service):
+    """Test that simultaneous cache misses share one upstream completion"""
+    async def slow_completion(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        completion = Mock()
+        completion.choices = [Mock()]
+        completion.choices[0].message.content = "Pools explained"
+        return completion
+    
+    with patch.object(ai_service.client.chat.completions, 'create', side_effect=slow_completion) as mock_create:
+        with patch('app.services.ai_cache.redis_client') as mock_redis:
+            mock_redis.get_json = AsyncMock(return_value=None)
+            mock_redis.set_json = AsyncMock()
+            
+            results = await asyncio.gather(*[
+                ai_service.explain_concept("Liquidity pools") for _ in range(20)
+            ])
+    
+    assert mock_create.call_count == 1
+    assert all(r["text"] == "Pools explained" for r in results)
@@ -0,0 +1,104 @@
+import pytest
+import math
+import time
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from unittest.mock import MagicMock
+
+from app.api.v1.api import api_router
+from app.core.deps import get_current_user
+from app.services.amm import (
+    MAX_TICK,
+    MIN_TICK,
+    ConcentratedLiquidityPool,
+    ConstantProductPool,
+    price_to_tick,
+    quote_ladder,
+    reference_pool,
+    tick_to_sqrt_price,
+)
+
+def test_constant_product_quotes_match_the_invariant():
+    """Test V2 output keeps x * y = k on the fee-adjusted input"""
+    pool = ConstantProductPool(1000.0, 1_850_000.0, fee=0.003)
+    quote = pool.quote([1.0, 100.0])
+
+    for amount_in, amount_out in zip(quote.amount_in, quote.amount_out):
+        after = (1000.0 + amount_in * 0.997) * (1_850_000.0 - amount_out)
+        assert after == pytest.approx(1000.0 * 1_850_000.0)
+    # Impact excludes the fee and is the trade's share of the new reserve
+    assert quote.price_impact[1] == pytest.approx(99.7 / 1099.7)
+    assert quote.minimum_received(0.5)[0] == pytest.approx(quote.amount_out[0] * 0.995)
+
+def test_full_range_concentrated_pool_matches_constant_product():
+    """Test one full-range V3 position behaves like the equivalent V2 pool"""
+    liquidity, sqrt_price = 1e6, math.sqrt(1850.0)
+    v3 = ConcentratedLiquidityPool(sqrt_price, [(MIN_TICK, MAX_TICK, liquidity)], fee=0.003)
+    v2 = ConstantProductPool(liquidity / sqrt_price, liquidity * sqrt_price, fee=0.003)
+    amounts = np.array([0.5, 50.0, 5_000.0])
+
+    assert v3.quote(amounts).amount_out == pytest.approx(v2.quote(amounts).amount_out, rel=1e-9)
+    assert v3.quote(amounts * 1850, zero_for_one=False).amount_out == pytest.approx(
+        v2.quote(amounts * 1850, zero_for_one=False).amount_out, rel=1e-9
+    )
+
+def test_concentrated_swaps_cross_ticks():
+    """Test liquidity changes at tick boundaries and runs out past the last one"""
+    sqrt_price = float(tick_to_sqrt_price(0))
+    pool = ConcentratedLiquidityPool(sqrt_price, [(-100, 100, 1000.0), (-200, -100, 4000.0)], fee=0.0)
+    sqrt_100, sqrt_200 = float(tick_to_sqrt_price(-100)), float(tick_to_sqrt_price(-200))
+    first_range = 1000.0 * (1 / sqrt_100 - 1 / sqrt_price)
+    second_range = 4000.0 * (1 / sqrt_200 - 1 / sqrt_100)
+
+    inside, crossing, beyond = pool.quote([first_range / 2, first_range + second_range / 2, 1e9]).amount_out
+    assert inside == pytest.approx(1000.0 * (sqrt_price - 1 / (1 / sqrt_price + first_range / 2 / 1000.0)))
+    assert crossing == pytest.approx(
+        1000.0 * (sqrt_price - sqrt_100) + 4000.0 * (sqrt_100 - 1 / (1 / sqrt_100 + second_range / 2 / 4000.0))
+    )
+    # All token1 between the current price and the lowest tick is sold and no more
+    assert beyond == pytest.approx(1000.0 * (sqrt_price - sqrt_100) + 4000.0 * (sqrt_100 - sqrt_200))
+    assert pool.quote(1e9).filled == pytest.approx(first_range + second_range)
+    assert price_to_tick(1.0001 ** 120.5, spacing=60) == 120
+
+def test_quote_ladder_is_one_vectorised_call():
+    """Test a 200-step ladder up to 1000 ETH is monotone and quick"""
+    pool = reference_pool("uniswap", "ETH", "USDC", 1850.0, 1.0)
+    started = time.perf_counter()
+    ladder = quote_ladder(pool, 1000.0, steps=200)
+    elapsed = time.perf_counter() - started
+
+    assert ladder.amount_in.shape == (200,)
+    assert ladder.amount_in[-1] == 1000.0
+    assert np.all(np.diff(ladder.amount_out) > 0)
+    assert np.all(np.diff(ladder.price_impact) > 0)
+    assert ladder.execution_price[0] == pytest.approx(1850.0 * (1 - pool.fee), rel=1e-4)
+    assert elapsed < 0.05
+
+    # A thin constant-product pool moves far more for the same trade
+    thin = reference_pool("sushiswap", "ETH", "AAVE", 1850.0, 90.0)
+    assert thin.quote(1000.0).price_impact > ladder.price_impact[-1] * 10
+
+@pytest.mark.asyncio
+async def test_swap_simulation_reports_pool_price_impact():
+    """Test /simulations/run quotes swaps and liquidity from the reference pool"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=1, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    swap = {"type": "swap", "protocol": "sushiswap", "token_a": "ETH", "token_b": "AAVE", "amount": "100", "seed": 1}
+    liquidity = {**swap, "type": "provide_liquidity", "protocol": "uniswap", "token_b": "USDC", "amount": "2"}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        swapped = (await client.post("/api/v1/simulations/run", json=swap)).json()
+        provided = (await client.post("/api/v1/simulations/run", json=liquidity)).json()
+
+    pool = reference_pool("sushiswap", "ETH", "AAVE", 1850.0, 90.0)
+    quote = pool.quote(100.0)
+    assert swapped["price_impact"] == f"{float(quote.price_impact) * 100:.2f}%"
+    assert swapped["outcomes"]["quoted"] == pytest.approx(float(quote.amount_out), rel=1e-6)
+    assert any("High price impact" in warning for warning in swapped["warnings"])
+    assert len(swapped["transaction_data"]["quote_ladder"]) == 6
+
+    assert provided["transaction_data"]["amount_b"] == "3700.000000"
+    assert 0 < provided["transaction_data"]["pool_share"] < 1
@@ -0,0 +1,205 @@
+import pytest
+import asyncio
+import json
+import httpx
+from alembic import command
+from alembic.config import Config
+from pathlib import Path
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, inspect, text
+from unittest.mock import patch
+
+from app.api.v1.api import api_router
+from app.core.database import Base, async_engine, create_tables, db_manager, get_async_database_url
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+class FakeRedis:
+    """In-memory stand-in for RedisClient's JSON helpers"""
+    
+    def __init__(self):
+        self.store = {}
+    
+    async def get_json(self, key):
+        value = self.store.get(key)
+        return json.loads(value) if value is not None else None
+    
+    async def set_json(self, key, value, ex=None):
+        self.store[key] = json.dumps(value)
+        return True
+    
+    async def delete(self, key):
+        return self.store.pop(key, None) is not None
+
+@pytest.fixture
+def user_cache_redis():
+    redis = FakeRedis()
+    with patch('app.services.user_cache.redis_client', redis):
+        yield redis
+
+@pytest.fixture
+def query_log():
+    """Statements executed through the async engine"""
+    statements = []
+    
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+@pytest.fixture
+def client():
+    """API client backed by a fresh database"""
+    asyncio.run(create_tables())  # registers every model
+    db_manager.reset_database()
+    
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver"
+    )
+
+async def _login(client, wallet="0xAbC0000000000000000000000000000000000001"):
+    response = await client.post("/api/v1/auth/login", json={
+        "wallet_address": wallet,
+        "signature": "0x",
+        "message": "login"
+    })
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def alembic_config(connection) -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    config.attributes["connection"] = connection
+    return config
+
+def test_migration_brings_existing_tables_up_to_date(tmp_path):
+    """Test the alembic revision upgrades a database created before run_id and the keyset indexes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        for index in ("ix_user_simulations_run_id", "ix_user_simulations_user_id_completed_at_id",
+                      "ix_user_quiz_attempts_user_id_quiz_id_completed_at_id",
+                      "ix_risk_assessments_type_target_expires_at"):
+            connection.execute(text(f"DROP INDEX {index}"))
+        connection.execute(text("ALTER TABLE user_simulations DROP COLUMN run_id"))
+        connection.execute(text(
+            "CREATE INDEX ix_user_simulations_user_id_started_at ON user_simulations (user_id, started_at)"
+        ))
+
+    with engine.connect() as connection:
+        command.upgrade(alembic_config(connection), "head")
+
+    inspector = inspect(engine)
+    assert "run_id" in {column["name"] for column in inspector.get_columns("user_simulations")}
+    indexes = {index["name"]: index for index in inspector.get_indexes("user_simulations")}
+    assert indexes["ix_user_simulations_run_id"]["unique"]
+    assert indexes["ix_user_simulations_user_id_completed_at_id"]["column_names"] == ["user_id", "completed_at", "id"]
+    assert "ix_user_simulations_user_id_started_at" not in indexes
+    assert "ix_user_quiz_attempts_user_id_quiz_id_completed_at_id" in {
+        index["name"] for index in inspector.get_indexes("user_quiz_attempts")
+    }
+    engine.dispose()
+
+def test_migration_is_a_no_op_on_a_fresh_database(tmp_path):
+    """Test tables already created by create_tables() are stamped without changes"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    Base.metadata.create_all(bind=engine)
+    before = {table: inspect(engine).get_indexes(table) for table in ("user_simulations", "user_quiz_attempts")}
+
+    with engine.connect() as connection:
+        command.upgrade(alembic_config(connection), "head")
+
+    inspector = inspect(engine)
+    assert {table: inspector.get_indexes(table) for table in before} == before
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() is not None
+    engine.dispose()
+
+def test_async_database_url():
+    """Test that sync URLs are mapped onto async drivers"""
+    assert get_async_database_url("postgresql://u:p@db:5432/aya") == "postgresql+asyncpg://u:p@db:5432/aya"
+    assert get_async_database_url("sqlite:///./aya.db") == "sqlite+aiosqlite:///./aya.db"
+    assert get_async_database_url("postgresql+asyncpg://db/aya") == "postgresql+asyncpg://db/aya"
+
+@pytest.mark.asyncio
+async def test_login_progress_and_profile_use_async_session(client):
+    """Test the migrated write endpoints end to end"""
+    async with client:
+        headers = await _login(client)
+        
+        response = await client.post(
+            "/api/v1/lessons/defi-fundamentals/complete",
+            json={"lesson_id": "defi-fundamentals", "completed": True, "score": 90},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert response.json()["new_progress"] == pytest.approx(2.5)
+        
+        response = await client.put(
+            "/api/v1/users/profile",
+            json={"username": "aya-learner", "experience_level": "intermediate"},
+            headers=headers
+        )
+        assert response.status_code == 200
+        profile = response.json()
+        assert profile["username"] == "aya-learner"
+        assert profile["total_lessons_completed"] == 1
+        
+        # A second login reuses the existing user
+        headers = await _login(client)
+        response = await client.get("/api/v1/auth/me", headers=headers)
+        assert response.json()["username"] == "aya-learner"
+
+@pytest.mark.asyncio
+async def test_username_conflict(client):
+    """Test the async uniqueness check on profile updates"""
+    async with client:
+        first = await _login(client, "0x0000000000000000000000000000000000000001")
+        second = await _login(client, "0x0000000000000000000000000000000000000002")
+        
+        response = await client.put("/api/v1/users/profile", json={"username": "taken"}, headers=first)
+        assert response.status_code == 200
+        response = await client.put("/api/v1/users/profile", json={"username": "taken"}, headers=second)
+        assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_cached_user_skips_database(client, user_cache_redis, query_log):
+    """Test that repeat reads authenticate from the snapshot cache"""
+    async with client:
+        headers = await _login(client)
+        await client.get("/api/v1/auth/me", headers=headers)  # warms the cache
+        
+        assert query_log
+        query_log.clear()
+        for path in ["/api/v1/auth/me", "/api/v1/users/profile", "/api/v1/lessons/"]:
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200
+        assert query_log == []
+
+@pytest.mark.asyncio
+async def test_user_writes_invalidate_snapshot(client, user_cache_redis):
+    """Test that progress, profile and deactivation changes are visible at once"""
+    async with client:
+        headers = await _login(client)
+        await client.get("/api/v1/auth/me", headers=headers)
+        
+        await client.post(
+            "/api/v1/lessons/defi-fundamentals/complete",
+            json={"lesson_id": "defi-fundamentals", "completed": True},
+            headers=headers
+        )
+        response = await client.get("/api/v1/users/profile", headers=headers)
+        assert response.json()["total_lessons_completed"] == 1
+        
+        await client.put("/api/v1/users/profile", json={"bio": "hi"}, headers=headers)
+        response = await client.get("/api/v1/users/profile", headers=headers)
+        assert response.json()["bio"] == "hi"
+        
+        await client.delete("/api/v1/users/account", headers=headers)
+        response = await client.get("/api/v1/auth/me", headers=headers)
+        assert response.status_code == 400
@@ -0,0 +1,58 @@
+import pytest
+import fakeredis.aioredis
+from fastapi import FastAPI
+from unittest.mock import patch
+
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.database import create_tables, db_manager
+from app.core.redis import redis_client
+from app.services.ai_service import AIService
+from benchmarks.bench_api import SCENARIOS, compare_to_baseline, drive
+from benchmarks.stub_llm import StubLLMServer
+
+BASELINE = {"p50_ms": 10.0, "p95_ms": 20.0, "p99_ms": 40.0, "throughput_rps": 100.0}
+
+def stats(**overrides):
+    return {"errors": 0, **BASELINE, **overrides}
+
+def test_compare_to_baseline_flags_only_real_regressions():
+    """Test tolerance, the absolute latency floor and error reporting"""
+    baseline = {"lessons.list": BASELINE}
+
+    assert compare_to_baseline({"lessons.list": stats(p95_ms=25.0, throughput_rps=80.0)}, baseline, 0.3) == []
+    # 30% slower but within min_delta_ms
+    assert compare_to_baseline({"lessons.list": stats(p50_ms=1.0, p95_ms=1.5)}, {"lessons.list": stats(p95_ms=1.0)}, 0.3) == []
+
+    regressions = compare_to_baseline(
+        {"lessons.list": stats(p99_ms=80.0, throughput_rps=50.0, errors=2), "new.route": stats()},
+        baseline,
+        0.3
+    )
+    assert len(regressions) == 3
+    assert any("p99_ms" in line for line in regressions)
+    assert any("throughput" in line for line in regressions)
+    assert any("2 failed requests" in line for line in regressions)
+
+@pytest.mark.asyncio
+async def test_every_scenario_succeeds_offline():
+    """Test the traffic mix runs cleanly against fakeredis and the stub LLM"""
+    await create_tables()
+    db_manager.reset_database()
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+
+    with StubLLMServer(tls=False) as stub, \
+            patch.object(settings, "GROQ_API_KEY", "stub-key"), \
+            patch.object(settings, "GROQ_API_URL", stub.url), \
+            patch.object(redis_client, "redis", fakeredis.aioredis.FakeRedis(decode_responses=True)), \
+            patch.object(redis_client, "connected", True):
+        app.state.ai_service = AIService()
+        try:
+            results = await drive(app, SCENARIOS, total=60, concurrency=4, users=3)
+        finally:
+            await app.state.ai_service.close()
+
+    assert set(results) == {scenario.name for scenario in SCENARIOS} | {"all"}
+    assert results["all"]["requests"] == 60
+    assert results["all"]["errors"] == 0
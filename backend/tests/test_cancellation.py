@@ -0,0 +1,56 @@
+import pytest
+import asyncio
+from unittest.mock import Mock
+from fastapi import HTTPException
+
+from app.core.cancellation import run_until_disconnect, CLIENT_CLOSED_REQUEST
+
+def make_request(disconnect_after=None):
+    """Build a fake request whose receive() reports a disconnect after a delay"""
+    request = Mock()
+    request.url.path = "/api/v1/ai/chat"
+    
+    async def receive():
+        if disconnect_after is None:
+            await asyncio.Event().wait()
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+    
+    request.receive = receive
+    return request
+
+@pytest.mark.asyncio
+async def test_returns_result_when_client_stays():
+    """Test that the wrapped call's result is returned normally"""
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+    
+    assert await run_until_disconnect(make_request(), work()) == "done"
+
+@pytest.mark.asyncio
+async def test_cancels_work_on_disconnect():
+    """Test that the wrapped call is cancelled when the client goes away"""
+    cancelled = asyncio.Event()
+    
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    with pytest.raises(HTTPException) as exc_info:
+        await run_until_disconnect(make_request(disconnect_after=0.01), work())
+    
+    assert exc_info.value.status_code == CLIENT_CLOSED_REQUEST
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+@pytest.mark.asyncio
+async def test_propagates_errors():
+    """Test that exceptions from the wrapped call are re-raised"""
+    async def work():
+        raise ValueError("boom")
+    
+    with pytest.raises(ValueError):
+        await run_until_disconnect(make_request(), work())
@@ -0,0 +1,105 @@
+import pytest
+import gzip
+import json
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1.api import api_router
+from app.core.catalog import PrecompiledResponse, ResponseCatalog
+from app.core.deps import get_current_user
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: None
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+def test_precompiled_body_matches_default_json_encoding():
+    """Test the bytes equal FastAPI's JSONResponse and the ETag follows content"""
+    payload = {"name": "Curve", "tvl": "$3.5B", "networks": ["ethereum"]}
+    first = PrecompiledResponse(payload)
+
+    assert json.loads(first.body) == payload
+    assert first.body == b'{"name":"Curve","tvl":"$3.5B","networks":["ethereum"]}'
+    assert PrecompiledResponse(dict(payload)).etag == first.etag
+    assert PrecompiledResponse({**payload, "tvl": "$3.6B"}).etag != first.etag
+    assert first.gzipped is None  # too small to be worth compressing
+
+def test_catalog_builds_each_entry_once():
+    """Test registered and keyed entries are compiled a single time"""
+    catalog = ResponseCatalog()
+    calls = []
+
+    @catalog.register("static")
+    def build():
+        calls.append("static")
+        return {"items": [1, 2, 3]}
+
+    assert catalog.compile_all() == 1
+    assert catalog.get("static") is catalog.get("static")
+    assert catalog.get(("variant", 1), build=lambda: calls.append("variant") or {}) is \
+        catalog.get(("variant", 1), build=lambda: calls.append("variant") or {})
+    assert calls == ["static", "variant"]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", [
+    "/api/v1/protocols/",
+    "/api/v1/protocols/categories/overview",
+    "/api/v1/simulations/",
+    "/api/v1/risk/protocols",
+    "/api/v1/quizzes/",
+])
+async def test_catalog_endpoints_revalidate_with_etag(client, path):
+    """Test every catalog endpoint answers If-None-Match with a bodiless 304"""
+    async with client:
+        response = await client.get(path)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"].endswith("no-cache")
+
+        again = await client.get(path, headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+
+        weak_list = await client.get(path, headers={"If-None-Match": f'"stale", W/{etag}'})
+        assert weak_list.status_code == 304
+
+        stale = await client.get(path, headers={"If-None-Match": '"stale"'})
+        assert stale.status_code == 200
+        assert stale.json() == response.json()
+
+@pytest.mark.asyncio
+async def test_gzip_variant_and_filtered_listings(client):
+    """Test pre-gzipped bodies and that filters keep their own ETags"""
+    async with client:
+        plain = await client.get("/api/v1/protocols/", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+
+        # httpx decodes gzip transparently; check the raw bytes too
+        zipped = await client.get("/api/v1/protocols/", headers={"Accept-Encoding": "gzip"})
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.json() == plain.json()
+        assert int(zipped.headers["content-length"]) < len(plain.content)
+
+        listing = plain.json()
+        assert listing["total_count"] == 6
+        assert listing["categories"] == sorted(listing["categories"])
+
+        dex = await client.get("/api/v1/protocols/?category=dex")
+        assert [p["name"] for p in dex.json()["protocols"]] == ["uniswap", "curve"]
+        assert dex.json()["categories"] == listing["categories"]
+        assert dex.headers["etag"] != plain.headers["etag"]
+
+        repeat = await client.get("/api/v1/protocols/?category=dex", headers={"If-None-Match": dex.headers["etag"]})
+        assert repeat.status_code == 304
+
+        none = await client.get("/api/v1/protocols/?risk_level=extreme")
+        assert none.json()["protocols"] == [] and none.json()["total_count"] == 0
+
+def test_gzip_bytes_round_trip():
+    """Test the stored gzip body decompresses to the plain one"""
+    compiled = PrecompiledResponse({"rows": ["protocol"] * 200})
+    assert compiled.gzipped is not None
+    assert gzip.decompress(compiled.gzipped) == compiled.body
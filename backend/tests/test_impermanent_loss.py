@@ -0,0 +1,89 @@
+import pytest
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from unittest.mock import AsyncMock, MagicMock
+
+from app.api.v1.api import api_router
+from app.core.database import get_async_db
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.services.amm import amounts_for_liquidity
+from app.services.impermanent_loss import (
+    GRID_PRICE_MOVES_PCT,
+    GRID_RANGES_PCT,
+    impermanent_loss_profile,
+    impermanent_loss_surface,
+)
+
+def test_full_range_curve_matches_closed_form():
+    """Test the full-range curve is 2 * sqrt(r) / (1 + r) - 1"""
+    profile = impermanent_loss_profile("uniswap", "ETH", "USDC", horizon_days=30)
+    ratio = profile.price_ratio
+    assert profile.impermanent_loss == pytest.approx(2 * np.sqrt(ratio) / (1 + ratio) - 1, abs=1e-12)
+
+    # A doubling loses ~5.72%; earning it back over 30 days takes ~69.6% APY
+    doubled = GRID_PRICE_MOVES_PCT.index(100.0)
+    assert profile.move_impermanent_loss[doubled] == pytest.approx(2 * np.sqrt(2) / 3 - 1)
+    assert profile.move_break_even_fee_apy[doubled] == pytest.approx(
+        (1.5 - np.sqrt(2)) * 365 / 30 * 100
+    )
+
+def test_range_positions_match_the_pool_math():
+    """Test a ±10% position's value against amounts held in a concentrated pool"""
+    loss, _ = impermanent_loss_surface(np.array([10.0]), np.array([0.95, 1.2]), horizon_days=30)
+
+    sqrt_lower, sqrt_upper = np.sqrt(0.9), np.sqrt(1.1)
+    held0, held1 = amounts_for_liquidity(1.0, sqrt_lower, sqrt_upper, 1.0)
+    for ratio, expected in zip((0.95, 1.2), loss[0]):
+        amount0, amount1 = amounts_for_liquidity(np.sqrt(ratio), sqrt_lower, sqrt_upper, 1.0)
+        assert (amount0 * ratio + amount1) / (held0 * ratio + held1) - 1 == pytest.approx(expected)
+
+    # Narrower ranges lose more for the same move, across the whole grid
+    profile = impermanent_loss_profile("uniswap", "ETH", "USDC", 10)
+    assert profile.grid_impermanent_loss.shape == (len(GRID_RANGES_PCT), len(GRID_PRICE_MOVES_PCT))
+    assert np.all(np.diff(profile.grid_impermanent_loss, axis=0) <= 1e-12)
+    assert np.all(profile.grid_break_even_fee_apy >= 0)
+
+def test_profiles_are_cached_by_pool_and_range():
+    """Test equivalent requests share one cached, read-only profile"""
+    first = impermanent_loss_profile("Uniswap", "eth", "usdc", 25)
+    assert impermanent_loss_profile("uniswap", "ETH", "USDC", 25.0) is first
+    assert impermanent_loss_profile("uniswap", "ETH", "USDC", 10) is not first
+    assert impermanent_loss_profile("curve", "ETH", "USDC", 25) is not first
+    with pytest.raises(ValueError):
+        first.impermanent_loss[0] = 0.0
+    with pytest.raises(ValueError):
+        impermanent_loss_profile("uniswap", "ETH", "SHIB")
+
+@pytest.mark.asyncio
+async def test_impermanent_loss_endpoint_and_simulation_result():
+    """Test the standalone endpoint and the provide_liquidity result"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=1, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_for_update] = lambda: user
+    app.dependency_overrides[get_async_db] = lambda: AsyncMock()
+
+    params = {"protocol": "uniswap", "token_a": "ETH", "token_b": "USDC", "range_pct": 10}
+    request = {"type": "provide_liquidity", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC",
+               "amount": "1", "range_pct": 10, "seed": 3}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        standalone = await client.get("/api/v1/simulations/impermanent-loss", params=params)
+        bad_range = await client.get("/api/v1/simulations/impermanent-loss", params={**params, "range_pct": 150})
+        unknown = await client.get("/api/v1/simulations/impermanent-loss", params={**params, "token_b": "SHIB"})
+        simulated = (await client.post("/api/v1/simulations/run", json=request)).json()
+
+    assert standalone.status_code == 200
+    body = standalone.json()
+    assert len(body["curve"]["impermanent_loss_pct"]) == len(body["curve"]["price"]) == 801
+    assert body["grid"]["ranges_pct"][0] is None
+    assert bad_range.status_code == 400 and unknown.status_code == 400
+
+    moves = simulated["transaction_data"]["impermanent_loss"]
+    assert moves["range_pct"] == 10
+    assert [point["price_move_pct"] for point in moves["points"]] == list(GRID_PRICE_MOVES_PCT)
+    quarter = body["grid"]["price_moves_pct"].index(25.0)
+    ten_pct = body["grid"]["ranges_pct"].index(10.0)
+    assert moves["points"][quarter]["break_even_fee_apy"] == body["grid"]["break_even_fee_apy"][ten_pct][quarter]
+    assert any("25% price move" in warning for warning in simulated["warnings"])
@@ -0,0 +1,131 @@
+import pytest
+import math
+import uuid
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from unittest.mock import MagicMock
+
+from app.api.v1.api import api_router
+from app.core.database import AsyncSessionLocal, create_tables
+from app.core.deps import get_current_user
+from app.models.simulation import Simulation, UserSimulation
+from app.services.lending import LendingBook, LendingPosition, rescore_borrow_positions
+
+def test_health_factor_and_liquidation_prices():
+    """Test multi-collateral health and that each liquidation price brings HF to 1"""
+    position = LendingPosition(collateral={"ETH": 1.0, "WBTC": 0.05}, debt={"USDC": 2000.0})
+    book = LendingBook([position])
+    assessment = book.assess()
+
+    weighted = 1850 * 0.825 + 0.05 * 43000 * 0.75
+    assert assessment.health_factor[0] == pytest.approx(weighted / 2000)
+    assert assessment.collateral_drop_pct[0] == pytest.approx((1 - 2000 / weighted) * 100)
+
+    prices = book.prices()
+    for column, asset in enumerate(book.assets):
+        moved = prices.copy()
+        moved[column] = assessment.liquidation_price[0, column]
+        assert book.health_factors(moved)[0, 0] == pytest.approx(1.0), asset
+    eth = book.assets.index("ETH")
+    assert assessment.liquidation_price[0, eth] == pytest.approx((2000 - 0.05 * 43000 * 0.75) / 0.825)
+
+    # Volatile debt is liquidated when its price rises
+    short = LendingBook([LendingPosition(collateral={"USDC": 5000.0}, debt={"ETH": 2.0})]).assess()
+    assert short.liquidation_price[0, short.assets.index("ETH")] == pytest.approx(5000 * 0.8 / 2)
+
+def test_time_to_liquidation_under_rate_drift():
+    """Test the closed form with and without drift in the borrow rate"""
+    book = LendingBook([LendingPosition(collateral={"ETH": 1.0}, debt={"USDC": 1000.0})])
+    health = 1850 * 0.825 / 1000
+    net_rate = 0.052 - 0.02
+
+    flat = book.assess(rate_drift=0.0).time_to_liquidation_days[0]
+    assert flat == pytest.approx(math.log(health) / net_rate * 365)
+
+    drifting = book.assess(rate_drift=2.0).time_to_liquidation_days[0] / 365
+    assert math.log(health) - net_rate * drifting - 0.01 * drifting ** 2 == pytest.approx(0.0, abs=1e-9)
+    assert drifting * 365 < flat
+
+    # Collateral out-earning the debt never liquidates without drift
+    earning = LendingBook([LendingPosition(collateral={"USDC": 5000.0}, debt={"ETH": 1.0})])
+    assert np.isinf(earning.assess(rate_drift=0.0).time_to_liquidation_days[0])
+
+def test_book_scores_match_single_positions():
+    """Test a batch, including price scenarios, equals scoring positions one by one"""
+    rng = np.random.default_rng(0)
+    positions = [
+        LendingPosition(collateral={"ETH": float(eth), "WBTC": float(btc)}, debt={"USDC": float(debt)})
+        for eth, btc, debt in zip(rng.uniform(1, 5, 50), rng.uniform(0, 0.2, 50), rng.uniform(500, 4000, 50))
+    ]
+    book = LendingBook(positions)
+    crash = {"ETH": 1200.0}
+    batch = book.assess(crash)
+    for index in (0, 17, 49):
+        single = LendingBook([positions[index]]).assess(crash)
+        assert batch.position(index) == single.position(0)
+
+    scenarios = book.prices() * rng.lognormal(0, 0.2, (200, len(book.assets)))
+    assert book.health_factors(scenarios).shape == (200, 50)
+
+def test_positions_from_simulation_params():
+    """Test run requests and catalog defaults both parse"""
+    default = LendingPosition.from_params({"token_a": "USDC", "amount": "1000", "token_b": "ETH"})
+    assert default.collateral["ETH"] * 1850 * 0.6 == pytest.approx(1000)
+    catalog = LendingPosition.from_params({
+        "collateral_token": "ETH", "collateral_amount": "1.0", "borrow_token": "USDC", "borrow_amount": "1000"
+    })
+    assert catalog == LendingPosition(collateral={"ETH": 1.0}, debt={"USDC": 1000.0})
+    with pytest.raises(ValueError):
+        LendingPosition.from_params({"token_a": "USDC"})
+
+@pytest.mark.asyncio
+async def test_rescore_borrow_positions_in_one_pass():
+    """Test persisted borrow simulations are re-scored together at new prices"""
+    await create_tables()
+    user_id = 9_231
+    async with AsyncSessionLocal() as db:
+        borrow = Simulation(simulation_id=f"borrow-{uuid.uuid4()}", name="Borrow", type="borrow", protocol="aave")
+        swap = Simulation(simulation_id=f"swap-{uuid.uuid4()}", name="Swap", type="swap", protocol="uniswap")
+        db.add_all([borrow, swap])
+        await db.flush()
+        db.add_all([
+            UserSimulation(user_id=user_id, simulation_id=borrow.id, status="success",
+                           input_params={"token_a": "USDC", "amount": "1000", "collateral": {"ETH": "1"}}),
+            UserSimulation(user_id=user_id, simulation_id=borrow.id, status="success",
+                           input_params={"token_a": "USDC", "amount": "2000", "token_b": "ETH"}),
+            UserSimulation(user_id=user_id, simulation_id=borrow.id, status="success", input_params={"token_a": "USDC"}),
+            UserSimulation(user_id=user_id, simulation_id=swap.id, status="success",
+                           input_params={"token_a": "ETH", "amount": "1", "token_b": "USDC"}),
+        ])
+        await db.commit()
+
+        scored = await rescore_borrow_positions(db, prices={"ETH": 1000.0}, user_id=user_id)
+
+    assert len(scored) == 2
+    assert scored[0]["health_factor"] == pytest.approx(1000 * 0.825 / 1000, abs=1e-4)
+    # Opened at 60% LTV, a 46% fall in ETH has pushed the second below 1
+    assert scored[1]["health_factor"] < 1
+    assert scored[1]["time_to_liquidation_days"] == 0.0
+
+@pytest.mark.asyncio
+async def test_borrow_simulation_reports_liquidation_levels():
+    """Test /simulations/run returns health, liquidation prices and time to liquidation"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=1, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    request = {"type": "borrow", "protocol": "aave", "token_a": "USDC", "amount": "2000",
+               "collateral": {"ETH": "1", "WBTC": "0.05"}, "seed": 2}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        result = (await client.post("/api/v1/simulations/run", json=request)).json()
+        invalid = await client.post("/api/v1/simulations/run", json={**request, "collateral": {"ETH": "-1"}})
+
+    data = result["transaction_data"]
+    assert data["collateral"] == {"ETH": 1.0, "WBTC": 0.05}
+    assert data["collateral_token"] == "WBTC"
+    assert set(data["liquidation_prices"]) == {"ETH", "USDC", "WBTC"}
+    assert data["time_to_liquidation_days"] > 0
+    assert any("Liquidated if your collateral falls" in warning for warning in result["warnings"])
+    assert invalid.status_code == 400
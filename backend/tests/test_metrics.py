@@ -0,0 +1,68 @@
+import pytest
+import asyncio
+import httpx
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import MetricsMiddleware, instrument_pool, observe_llm, observe_redis
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    """Test latency histograms use the route template, not the raw path"""
+    app = FastAPI()
+    in_flight_during_request = []
+    
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        in_flight_during_request.append(sample(
+            "aya_http_requests_in_flight", method="GET", route="/items/{item_id}"
+        ))
+        return {"id": item_id}
+    
+    app.add_middleware(MetricsMiddleware)
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = sample("aya_http_request_duration_seconds_count", **labels)
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        for item_id in range(3):
+            await client.get(f"/items/{item_id}")
+        await client.get("/nope")
+    
+    assert sample("aya_http_request_duration_seconds_count", **labels) - before == 3
+    assert sample("aya_http_request_duration_seconds_count", method="GET", route="<unmatched>", status="404") >= 1
+    assert in_flight_during_request == [1.0, 1.0, 1.0]
+    assert sample("aya_http_requests_in_flight", method="GET", route="/items/{item_id}") == 0
+
+def test_pool_checkout_wait_and_checked_out(tmp_path):
+    """Test DB pool instrumentation on a real engine"""
+    engine = create_engine(f"sqlite:///{tmp_path}/metrics.db", poolclass=QueuePool)
+    instrument_pool(engine, "test")
+    
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert sample("aya_db_pool_checked_out", engine="test") == 1
+    
+    assert sample("aya_db_pool_checked_out", engine="test") == 0
+    assert sample("aya_db_pool_checkout_wait_seconds_count", engine="test") == 1
+
+def test_redis_and_llm_observers():
+    """Test command latency, error counting and LLM outcomes"""
+    before = sample("aya_redis_command_errors_total", command="TEST")
+    with observe_redis("TEST"):
+        pass
+    with pytest.raises(ConnectionError):
+        with observe_redis("TEST"):
+            raise ConnectionError
+    
+    assert sample("aya_redis_command_duration_seconds_count", command="TEST") >= 2
+    assert sample("aya_redis_command_errors_total", command="TEST") - before == 1
+    
+    with pytest.raises(asyncio.TimeoutError):
+        with observe_llm("test"):
+            raise asyncio.TimeoutError
+    assert sample("aya_llm_request_duration_seconds_count", operation="test", outcome="timeout") == 1
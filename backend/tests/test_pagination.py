@@ -0,0 +1,112 @@
+import pytest
+import httpx
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import select
+from unittest.mock import MagicMock
+
+from app.api.v1.api import api_router
+from app.core.database import AsyncSessionLocal, create_tables
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.core.pagination import decode_cursor, encode_cursor, fetch_keyset_page
+from app.models.quiz import Quiz, UserQuizAttempt
+
+async def ensure_quiz(slug: str) -> int:
+    async with AsyncSessionLocal() as db:
+        quiz_pk = (await db.execute(select(Quiz.id).where(Quiz.quiz_id == slug))).scalar_one_or_none()
+        if quiz_pk is None:
+            quiz = Quiz(quiz_id=slug, title=slug)
+            db.add(quiz)
+            await db.commit()
+            quiz_pk = quiz.id
+        return quiz_pk
+
+def test_cursors_are_opaque_and_scoped():
+    """Test a cursor round-trips and is rejected by other listings or when mangled"""
+    completed_at = datetime(2024, 1, 15, 10, 30, 0, 123456)
+    cursor = encode_cursor("simulations", completed_at, 42)
+    assert "2024" not in cursor
+    assert decode_cursor("simulations", cursor) == (completed_at, 42)
+    for scope, bad in (("quizzes:defi-basics", cursor), ("simulations", "not-a-cursor"), ("simulations", "W10=")):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(scope, bad)
+        assert error.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_keyset_pages_break_ties_on_id():
+    """Test attempts finished at the same instant are neither skipped nor repeated"""
+    await create_tables()
+    quiz_pk = await ensure_quiz("pagination-ties")
+    user_id = 9_501
+    same_time = datetime(2024, 2, 1, 12, 0, 0)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            UserQuizAttempt(user_id=user_id, quiz_id=quiz_pk, answers=[], score=score, passed=False,
+                            completed_at=same_time + timedelta(seconds=score % 2))
+            for score in range(7)
+        ])
+        db.add(UserQuizAttempt(user_id=user_id, quiz_id=quiz_pk, answers=[], score=99, passed=True))
+        await db.commit()
+
+        query = select(UserQuizAttempt.id, UserQuizAttempt.score, UserQuizAttempt.completed_at).where(
+            UserQuizAttempt.user_id == user_id
+        )
+        seen, cursor = [], None
+        while True:
+            page = await fetch_keyset_page(db, query, UserQuizAttempt, "ties", 3, cursor)
+            seen.extend((row.completed_at, row.id) for row in page.rows)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+    # Unfinished attempts are not listed
+    assert len(seen) == 7
+    assert seen == sorted(seen, reverse=True)
+
+@pytest.mark.asyncio
+async def test_quiz_results_page_submitted_attempts():
+    """Test submitted attempts are persisted, creating the quiz row on first submit, and paged newest first"""
+    await create_tables()
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=9_502, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_for_update] = lambda: user
+
+    answers = ([1, 1, 2, 1], [0, 0, 0, 0], [1, 1, 2, 0])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        for seconds, attempt in enumerate(answers, start=60):
+            submitted = await client.post(
+                "/api/v1/quizzes/wallet-security/submit",
+                json={"quiz_id": "wallet-security", "answers": attempt, "time_taken": seconds}
+            )
+            assert submitted.status_code == 200
+            assert submitted.json()["time_taken"] == seconds
+        negative_time = await client.post(
+            "/api/v1/quizzes/wallet-security/submit",
+            json={"quiz_id": "wallet-security", "answers": answers[0], "time_taken": -1}
+        )
+
+        first = (await client.get("/api/v1/quizzes/wallet-security/results", params={"limit": 2})).json()
+        second = (await client.get(
+            "/api/v1/quizzes/wallet-security/results", params={"limit": 2, "cursor": first["next_cursor"]}
+        )).json()
+        other_quiz = await client.get(
+            "/api/v1/quizzes/defi-basics/results", params={"cursor": first["next_cursor"]}
+        )
+        bad_limit = await client.get("/api/v1/quizzes/wallet-security/results", params={"limit": 0})
+        unattempted = (await client.get("/api/v1/quizzes/liquidity-pools/results")).json()
+        unattempted_bad_limit = await client.get("/api/v1/quizzes/liquidity-pools/results", params={"limit": 0})
+
+    assert [attempt["score"] for attempt in first["attempts"] + second["attempts"]] == [75, 0, 100]
+    assert [attempt["time_taken"] for attempt in first["attempts"] + second["attempts"]] == [62, 61, 60]
+    assert first["has_more"] and not second["has_more"] and second["next_cursor"] is None
+    assert first["best_score"] == 100 and first["total_attempts"] == 3
+    assert user.update_progress.call_count == 2
+    assert other_quiz.status_code == 400
+    assert negative_time.status_code == 400
+    assert bad_limit.status_code == 400 and unattempted_bad_limit.status_code == 400
+    assert unattempted["attempts"] == [] and unattempted["total_attempts"] == 0
+    async with AsyncSessionLocal() as db:
+        quiz = (await db.execute(select(Quiz).where(Quiz.quiz_id == "wallet-security"))).scalar_one()
+    assert quiz.title == "Wallet Security Quiz" and quiz.passing_score == 75
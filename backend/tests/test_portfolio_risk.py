@@ -0,0 +1,96 @@
+import pytest
+import time
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.api.v1.api import api_router
+from app.core.deps import get_current_user
+from app.services.portfolio_risk import (
+    analyze_portfolio,
+    correlation_matrix,
+    modeled_returns,
+    normalize_weights,
+    portfolio_risk_report,
+)
+
+def test_metrics_match_covariance_definitions():
+    """Test the O(n) shortcuts against the textbook covariance formulas"""
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, size=(500, 6)) + rng.normal(0, 0.01, size=(500, 1))
+    weights = np.array([5.0, 1.0, 1.0, 1.0, 1.0, 1.0])
+    metrics = analyze_portfolio(weights, returns, periods_per_year=365)
+
+    w = weights / weights.sum()
+    cov = np.cov(returns, rowvar=False)
+    portfolio_vol = np.sqrt(w @ cov @ w)
+    assert metrics.hhi == pytest.approx((w ** 2).sum())
+    assert metrics.volatility == pytest.approx(portfolio_vol * np.sqrt(365))
+    assert metrics.diversification_ratio == pytest.approx(w @ np.sqrt(np.diag(cov)) / portfolio_vol)
+
+    # Weighted mean of the off-diagonal correlations
+    scaled = w * np.sqrt(np.diag(cov))
+    pairs = np.outer(scaled, scaled)
+    np.fill_diagonal(pairs, 0)
+    expected = (pairs * correlation_matrix(returns)).sum() / pairs.sum()
+    assert metrics.average_correlation == pytest.approx(expected)
+
+    portfolio = returns @ w
+    cutoff = np.quantile(portfolio, 0.05)
+    assert metrics.value_at_risk == pytest.approx(-cutoff)
+    assert metrics.conditional_var == pytest.approx(-portfolio[portfolio <= cutoff].mean())
+    assert metrics.conditional_var >= metrics.value_at_risk
+
+def test_scores_follow_concentration_and_correlation():
+    """Test the PortfolioRisk scores at the extremes"""
+    returns = modeled_returns(("ETH", "BTC", "USDC", "AAVE"))
+
+    single = analyze_portfolio([1, 0, 0, 0], returns)
+    assert single.concentration_risk == "high"
+    assert single.diversification_score == 0
+
+    spread = analyze_portfolio([1, 1, 1, 1], returns)
+    assert spread.concentration_risk == "medium"
+    assert spread.diversification_score > single.diversification_score
+    assert spread.volatility_score < single.volatility_score
+
+    stable = analyze_portfolio([0, 0, 1, 0], returns)
+    assert stable.volatility_score <= 1
+
+    with pytest.raises(ValueError):
+        normalize_weights([0, 0])
+    with pytest.raises(ValueError):
+        analyze_portfolio([1, 1], returns)
+
+def test_large_portfolio_in_milliseconds():
+    """Test hundreds of assets over thousands of samples stays fast"""
+    rng = np.random.default_rng(1)
+    returns = rng.normal(0, 0.03, size=(5000, 500))
+    weights = rng.random(500)
+    analyze_portfolio(weights, returns)
+
+    started = time.perf_counter()
+    metrics = analyze_portfolio(weights, returns)
+    assert time.perf_counter() - started < 0.1
+    assert metrics.concentration_risk == "low"
+    assert abs(metrics.average_correlation) < 0.05
+
+    report = portfolio_risk_report([{"token": f"T{i}", "value_usd": w} for i, w in enumerate(weights)], returns=returns)
+    assert report["asset_count"] == 500 and report["correlation"] is None
+
+@pytest.mark.asyncio
+async def test_portfolio_endpoints_use_the_engine():
+    """Test both portfolio endpoints report the engine's scores"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: type("U", (), {"id": 1})()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        analysis = (await client.get("/api/v1/risk/portfolio/0xabc")).json()["risk_analysis"]
+        assessment = (await client.post("/api/v1/risk/assess", json={"type": "portfolio", "address": "0xabc"})).json()
+
+    assert analysis["concentration_risk"] == "high"
+    assert 0 <= analysis["diversification_score"] <= 100
+    assert analysis["correlation"]["assets"] == ["ETH", "USDC", "AAVE", "UNI"]
+    assert assessment["risk_score"]["volatility"] == analysis["volatility_score"]
+    assert assessment["details"]["value_at_risk_1d_usd"] == analysis["statistics"]["value_at_risk_1d_usd"]
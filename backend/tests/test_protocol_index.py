@@ -0,0 +1,106 @@
+import pytest
+import httpx
+import random
+from fastapi import FastAPI
+
+from app.api.v1.api import api_router
+from app.api.v1.endpoints.protocols import PROTOCOLS
+from app.services.protocol_index import ProtocolIndex, parse_apy, parse_usd
+
+CATEGORIES = ["dex", "lending", "staking", "bridge", "derivatives"]
+NETWORKS = ["ethereum", "polygon", "arbitrum", "optimism", "base", "bsc"]
+RISK_LEVELS = ["low", "medium", "high"]
+
+def generated_catalog(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"protocol-{i}",
+            "category": rng.choice(CATEGORIES),
+            "supported_networks": rng.sample(NETWORKS, rng.randint(1, 3)),
+            "risk_level": rng.choice(RISK_LEVELS),
+            "tvl": f"${rng.randint(1, 900)}M",
+            "apy_range": f"{rng.randint(1, 5)}-{rng.randint(5, 40)}%",
+        }
+        for i in range(count)
+    ]
+
+def scan(protocols, filters):
+    """The list-comprehension filtering the index replaces"""
+    matches = protocols
+    if filters.get("category"):
+        matches = [p for p in matches if p["category"] == filters["category"]]
+    if filters.get("network"):
+        matches = [p for p in matches if filters["network"] in p["supported_networks"]]
+    if filters.get("risk_level"):
+        matches = [p for p in matches if p["risk_level"] == filters["risk_level"]]
+    return matches
+
+def test_parsers():
+    """Test TVL and APY strings become sortable numbers"""
+    assert parse_usd("$4.2B") == pytest.approx(4.2e9)
+    assert parse_usd("$450M") == pytest.approx(4.5e8)
+    assert parse_usd("$1,250") == 1250
+    assert parse_usd("n/a") == 0.0
+    assert parse_apy("5-25%") == 25.0
+    assert parse_apy("3.5%") == 3.5
+
+def test_bitset_filters_match_a_linear_scan():
+    """Test every facet combination against the naive filter, including unknown values"""
+    protocols = generated_catalog(3000)
+    index = ProtocolIndex(protocols)
+
+    for category in [None, *CATEGORIES, "unknown"]:
+        for network in [None, "arbitrum", "bsc"]:
+            for risk_level in [None, "high"]:
+                filters = {"category": category, "network": network, "risk_level": risk_level}
+                total, page = index.search(filters)
+                expected = scan(protocols, filters)
+                assert total == len(expected)
+                assert page == expected
+
+def test_sorting_pagination_and_facets():
+    """Test sorted pages are contiguous and facet counts ignore their own filter"""
+    protocols = generated_catalog(500)
+    index = ProtocolIndex(protocols)
+    filters = {"category": "lending", "network": "ethereum", "risk_level": None}
+
+    total, everything = index.search(filters, sort_by="tvl")
+    tvls = [parse_usd(p["tvl"]) for p in everything]
+    assert tvls == sorted(tvls, reverse=True)
+
+    pages = [index.search(filters, sort_by="tvl", offset=offset, limit=25)[1] for offset in range(0, total, 25)]
+    assert [p for page in pages for p in page] == everything
+    assert index.search(filters, offset=total, limit=25) == (total, [])
+
+    _, ascending = index.search(filters, sort_by="apy", descending=False)
+    assert [parse_apy(p["apy_range"]) for p in ascending] == sorted(parse_apy(p["apy_range"]) for p in everything)
+
+    facets = index.facets(filters)
+    for category in CATEGORIES:
+        assert facets["category"][category] == len(scan(protocols, {**filters, "category": category}))
+    assert facets["risk_level"]["high"] == len(scan(protocols, {**filters, "risk_level": "high"}))
+    assert index.facets({}) == index.facet_counts
+    assert sum(index.facet_counts["category"].values()) == 500
+
+@pytest.mark.asyncio
+async def test_protocols_endpoint_sorts_and_pages():
+    """Test the query parameters end to end"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        response = await client.get("/api/v1/protocols/?sort_by=tvl&limit=2")
+        body = response.json()
+        assert [p["name"] for p in body["protocols"]] == ["lido", "aave"]
+        assert body["total_count"] == len(PROTOCOLS)
+        assert body["facets"]["category"]["dex"] == 2
+
+        response = await client.get("/api/v1/protocols/?network=polygon&sort_by=apy&order=asc&offset=1&limit=2")
+        body = response.json()
+        assert [p["name"] for p in body["protocols"]] == ["aave", "curve"]
+        assert body["total_count"] == 4
+        assert body["facets"]["network"]["ethereum"] == len(PROTOCOLS)
+
+        assert (await client.get("/api/v1/protocols/?sort_by=name")).status_code == 400
+        assert (await client.get("/api/v1/protocols/?limit=0")).status_code == 400
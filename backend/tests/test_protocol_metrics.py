@@ -0,0 +1,157 @@
+import pytest
+import httpx
+import threading
+from fastapi import FastAPI
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from unittest.mock import patch
+
+from app.api.v1.api import api_router
+from app.api.v1.endpoints import protocols
+from app.services import protocol_metrics
+from app.services.protocol_metrics import (
+    MAX_HISTORY_POINTS,
+    MetricsRingBuffer,
+    ProtocolMetricsIngester,
+    ProtocolMetricsStore,
+    format_usd,
+)
+
+def stub_defillama(failing=()):
+    """DefiLlama-shaped upstream; paths in ``failing`` answer 503"""
+    payloads = {
+        "/protocols": [
+            {"name": "Uniswap V3", "slug": "uniswap-v3", "tvl": 4.2e9},
+            {"name": "Aave V3", "slug": "aave-v3", "tvl": 6.8e9},
+            {"name": "Unlisted", "slug": "unlisted", "tvl": 1.0},
+        ],
+        "/overview/dexs": {"protocols": [{"name": "Uniswap V3", "slug": "uniswap-v3", "total24h": 1.2e9}]},
+        "/pools": {"data": [
+            {"project": "uniswap-v3", "apy": 10.0, "tvlUsd": 300.0},
+            {"project": "uniswap-v3", "apy": 20.0, "tvlUsd": 100.0},
+            {"project": "aave-v3", "apy": 3.5, "tvlUsd": 50.0},
+            {"project": "aave-v3", "apy": 90.0, "tvlUsd": 0},
+        ]},
+    }
+    requests = []
+
+    async def endpoint(request):
+        requests.append(request.url.path)
+        if request.url.path in failing:
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        return JSONResponse(payloads[request.url.path])
+
+    app = Starlette(routes=[Route(path, endpoint) for path in payloads])
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://llama")
+    return client, requests
+
+def ingester(store, failing=()):
+    client, requests = stub_defillama(failing)
+    return ProtocolMetricsIngester(store, 300, "http://llama", "http://llama", http_client=client), requests
+
+def test_ring_buffer_wraps_and_windows():
+    """Test old samples are overwritten and windows are time-ordered suffixes"""
+    buffer = MetricsRingBuffer(capacity=3)
+    assert buffer.latest() is None
+
+    for ts in range(5):
+        buffer.append(float(ts), ts * 10.0, 0.0, 1.0)
+
+    assert len(buffer) == 3
+    assert buffer.rows()[:, 0].tolist() == [2.0, 3.0, 4.0]
+    assert buffer.window(since=3.0)[:, 1].tolist() == [30.0, 40.0]
+    assert buffer.latest()[0] == 4.0
+
+def test_store_thins_long_histories():
+    """Test retention sizing and that thinning keeps the newest sample"""
+    store = ProtocolMetricsStore(retention=1000, interval=1)
+    assert store.capacity == 1001
+    for ts in range(1000):
+        store.record(float(ts), {"uniswap": (1.0, 2.0, 3.0)})
+
+    snapshot = store.snapshot("uniswap", timeframe=10_000, now=999.0)
+    timestamps = snapshot["history"]["timestamps"]
+    assert len(timestamps) <= MAX_HISTORY_POINTS
+    assert timestamps[-1] == 999.0 and timestamps == sorted(timestamps)
+    assert store.snapshot("aave", timeframe=60) is None
+
+@pytest.mark.asyncio
+async def test_ingest_once_records_bulk_metrics():
+    """Test one bulk request per metric and the TVL-weighted APY"""
+    store = ProtocolMetricsStore(retention=3600, interval=300)
+    metrics_ingester, requests = ingester(store)
+    reduce_tvl, reducer_threads = protocol_metrics._reduce_tvl, []
+    def recording_reduce_tvl(payload):
+        reducer_threads.append(threading.get_ident())
+        return reduce_tvl(payload)
+
+    try:
+        with patch.object(protocol_metrics, "_reduce_tvl", recording_reduce_tvl):
+            assert await metrics_ingester.ingest_once(now=1000.0) == 2
+    finally:
+        await metrics_ingester.close()
+
+    assert sorted(requests) == ["/overview/dexs", "/pools", "/protocols"]
+    # Payloads are parsed off the event loop's thread
+    assert reducer_threads and threading.get_ident() not in reducer_threads
+    uniswap = store.snapshot("uniswap", timeframe=3600, now=1000.0)["current"]
+    assert uniswap == {
+        "tvl_usd": 4.2e9, "volume_24h_usd": 1.2e9, "apy_pct": 12.5,
+        "tvl": "$4.2B", "volume_24h": "$1.2B", "apy": "12.50%",
+    }
+    aave = store.snapshot("aave", timeframe=3600, now=1000.0)["current"]
+    assert aave["volume_24h_usd"] is None and aave["apy_pct"] == 3.5
+
+@pytest.mark.asyncio
+async def test_failed_upstream_keeps_serving_its_last_value():
+    """Test partial and total upstream failures"""
+    store = ProtocolMetricsStore(retention=3600, interval=300)
+    healthy, _ = ingester(store)
+    partial, _ = ingester(store, failing={"/pools"})
+    try:
+        await healthy.ingest_once(now=700.0)
+        await partial.ingest_once(now=1000.0)
+    finally:
+        await healthy.close()
+        await partial.close()
+
+    snapshot = store.snapshot("uniswap", timeframe=3600, now=1000.0)
+    assert snapshot["current"]["tvl_usd"] == 4.2e9
+    assert snapshot["current"]["apy_pct"] == 12.5 and snapshot["current"]["apy"] == "12.50%"
+    # The missed sample is a gap in the history
+    assert snapshot["history"]["apy_pct"] == [12.5, None]
+    assert snapshot["last_updated"] == 1000.0
+
+    down, _ = ingester(store, failing={"/protocols", "/overview/dexs", "/pools"})
+    try:
+        assert await down.ingest_once(now=1300.0) == 0
+    finally:
+        await down.close()
+    assert down.failures == 1
+    # Nothing recorded, so the last good sample is still served
+    assert store.snapshot("uniswap", timeframe=3600, now=1300.0)["last_updated"] == 1000.0
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reads_the_store():
+    """Test live data, the static fallback and timeframe validation"""
+    store = ProtocolMetricsStore(retention=7 * 86400, interval=300)
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+    with patch.object(protocols, "protocol_metrics_store", store):
+        async with client:
+            fallback = await client.get("/api/v1/protocols/aave/metrics")
+            assert fallback.json()["source"] == "static"
+            assert fallback.json()["metrics"]["current"]["tvl"] == "$6.8B"
+
+            store.record(1_700_000_000.0, {"aave": (7.1e9, float("nan"), 3.4)})
+            live = (await client.get("/api/v1/protocols/Aave/metrics?timeframe=7d")).json()
+            assert live["source"] == "defillama"
+            assert live["metrics"]["current"]["tvl"] == format_usd(7.1e9)
+            assert live["metrics"]["current"]["volume_24h_usd"] is None
+            assert live["last_updated"] == "2023-11-14T22:13:20"
+
+            assert (await client.get("/api/v1/protocols/aave/metrics?timeframe=1y")).status_code == 400
+            assert (await client.get("/api/v1/protocols/unknown/metrics")).status_code == 404
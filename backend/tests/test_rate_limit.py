@@ -0,0 +1,113 @@
+import pytest
+import httpx
+from fastapi import FastAPI
+from jose import jwt
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.core.rate_limit import LocalTokenBucket, RateLimitMiddleware, RateLimitRule
+
+RULES = [
+    RateLimitRule("ai", "/api/v1/ai", per_minute=60, burst=2),
+    RateLimitRule("default", "/", per_minute=60, burst=5),
+]
+
+def make_client():
+    app = FastAPI()
+    
+    @app.get("/api/v1/ai/chat")
+    async def ai_chat():
+        return {"ok": True}
+    
+    @app.get("/api/v1/lessons")
+    async def lessons():
+        return {"ok": True}
+    
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+    
+    app.add_middleware(RateLimitMiddleware, rules=RULES, enabled=True)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+@pytest.fixture
+def redis_down():
+    with patch('app.core.rate_limit.redis_client') as mock_redis:
+        mock_redis.rate_limit_acquire = AsyncMock(return_value=None)
+        yield mock_redis
+
+@pytest.mark.asyncio
+async def test_ai_routes_get_tighter_limit(redis_down):
+    """Test per-route buckets and the local fallback when Redis is down"""
+    async with make_client() as client:
+        ai_statuses = [(await client.get("/api/v1/ai/chat")).status_code for _ in range(3)]
+        lesson_statuses = [(await client.get("/api/v1/lessons")).status_code for _ in range(5)]
+    
+    assert ai_statuses == [200, 200, 429]
+    assert lesson_statuses == [200] * 5
+
+@pytest.mark.asyncio
+async def test_rejection_format_and_headers(redis_down):
+    """Test the 429 body, Retry-After and remaining-token headers"""
+    async with make_client() as client:
+        first = await client.get("/api/v1/ai/chat")
+        await client.get("/api/v1/ai/chat")
+        rejected = await client.get("/api/v1/ai/chat")
+    
+    assert first.headers["x-ratelimit-limit"] == "60"
+    assert first.headers["x-ratelimit-remaining"] == "1"
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "1"
+    assert rejected.json()["error"]["code"] == "HTTP_429"
+
+@pytest.mark.asyncio
+async def test_clients_are_limited_separately(redis_down):
+    """Test that authenticated users get their own bucket and probes are exempt"""
+    token = jwt.encode({"sub": "0xabc"}, settings.SECRET_KEY, algorithm="HS256")
+    async with make_client() as client:
+        for _ in range(2):
+            await client.get("/api/v1/ai/chat")
+        assert (await client.get("/api/v1/ai/chat")).status_code == 429
+        
+        authed = await client.get("/api/v1/ai/chat", headers={"Authorization": f"Bearer {token}"})
+        assert authed.status_code == 200
+        
+        forged = await client.get("/api/v1/ai/chat", headers={"Authorization": "Bearer forged"})
+        assert forged.status_code == 429
+        
+        assert all([(await client.get("/health")).status_code == 200 for _ in range(10)])
+
+@pytest.mark.asyncio
+async def test_one_redis_call_per_request():
+    """Test that Redis decisions are used as-is with a single call each"""
+    with patch('app.core.rate_limit.redis_client') as mock_redis:
+        mock_redis.rate_limit_acquire = AsyncMock(side_effect=[(True, 4.0, 0.0), (False, 0.2, 2.5)])
+        async with make_client() as client:
+            allowed = await client.get("/api/v1/lessons")
+            rejected = await client.get("/api/v1/lessons")
+    
+    assert allowed.status_code == 200
+    assert rejected.status_code == 429
+    assert rejected.headers["retry-after"] == "3"
+    assert mock_redis.rate_limit_acquire.await_count == 2
+    mock_redis.rate_limit_acquire.assert_awaited_with("default:ip:127.0.0.1", 1.0, 5)
+
+def test_rules_match_on_path_segments():
+    """Test a prefix covers itself and paths below it, not paths that merely share its start"""
+    ai, default = RULES
+    assert ai.matches("/api/v1/ai") and ai.matches("/api/v1/ai/chat")
+    assert not ai.matches("/api/v1/aiX") and not ai.matches("/api/v1/ai-tools")
+    assert default.matches("/api/v1/aiX") and default.matches("/")
+
+def test_local_token_bucket_refills():
+    """Test refill over time in the fallback bucket"""
+    now = [0.0]
+    bucket = LocalTokenBucket(clock=lambda: now[0])
+    
+    assert bucket.acquire("k", rate=1.0, capacity=1)[0]
+    allowed, _, retry_after = bucket.acquire("k", rate=1.0, capacity=1)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+    
+    now[0] = 1.0
+    assert bucket.acquire("k", rate=1.0, capacity=1)[0]
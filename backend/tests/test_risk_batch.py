@@ -0,0 +1,79 @@
+import pytest
+import asyncio
+import httpx
+from fastapi import FastAPI
+from unittest.mock import patch
+
+from app.api.v1.api import api_router
+from app.api.v1.endpoints import risk
+from app.core.config import settings
+from app.core.deps import get_current_user
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: type("User", (), {"id": 1})()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver")
+
+@pytest.mark.asyncio
+async def test_batch_keeps_order_and_reports_item_errors(client):
+    """Test results line up with the request and failures stay per item"""
+    batch = [
+        {"type": "protocol", "protocol": "uniswap"},
+        {"type": "unknown"},
+        {"type": "protocol", "protocol": "Aave"},
+        {"type": "transaction", "protocol": "aave", "amount": "not-a-number"},
+        {"type": "transaction", "protocol": "aave", "amount": "5000"},
+    ]
+    async with client:
+        response = await client.post("/api/v1/risk/assess/batch", json={"assessments": batch})
+
+    body = response.json()
+    assert response.status_code == 200
+    assert [item["index"] for item in body["results"]] == list(range(5))
+    assert [item["status_code"] for item in body["results"]] == [200, 400, 200, 500, 200]
+    assert body["results"][0]["assessment"]["risk_score"]["overall"] == 25
+    assert body["results"][1]["error"] == "Invalid risk assessment type"
+    assert body["results"][2]["assessment"]["risk_score"]["overall"] == 30
+    assert body["results"][4]["assessment"]["risk_level"] == "medium"
+    assert body["failed"] == 2 and body["total"] == 5
+
+@pytest.mark.asyncio
+async def test_batch_dedupes_and_bounds_concurrency(client):
+    """Test identical targets run once and no more than the limit run at once"""
+    running = peak = calls = 0
+
+    async def slow_protocol_risk(protocol):
+        nonlocal running, peak, calls
+        calls += 1
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return await original(protocol)
+
+    original = risk._assess_protocol_risk
+    batch = [{"type": "protocol", "protocol": f"p{i % 10}"} for i in range(30)]
+    batch.append({"type": "protocol", "protocol": "P0"})
+
+    with patch.object(risk, "_assess_protocol_risk", slow_protocol_risk), \
+            patch.object(settings, "RISK_BATCH_CONCURRENCY", 3):
+        async with client:
+            body = (await client.post("/api/v1/risk/assess/batch", json={"assessments": batch})).json()
+
+    assert calls == 10 and body["unique"] == 10
+    assert peak == 3
+    results = body["results"]
+    assert results[0]["assessment"] == results[10]["assessment"] == results[30]["assessment"]
+
+@pytest.mark.asyncio
+async def test_batch_size_limit(client):
+    """Test oversized batches are rejected outright"""
+    with patch.object(settings, "RISK_BATCH_MAX_ITEMS", 2):
+        async with client:
+            response = await client.post(
+                "/api/v1/risk/assess/batch",
+                json={"assessments": [{"type": "token", "address": "0x1"}] * 3}
+            )
+    assert response.status_code == 400
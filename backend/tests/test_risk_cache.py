@@ -0,0 +1,164 @@
+import pytest
+import asyncio
+import fakeredis.aioredis
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from unittest.mock import patch
+
+from app.api.v1.api import api_router
+from app.core.database import AsyncSessionLocal, create_tables
+from app.core.deps import get_current_user
+from app.core.redis import redis_client
+from app.models.risk_assessment import RiskAssessment
+from app.services.risk_cache import RiskAssessmentCache
+
+class Clock:
+    def __init__(self, now: float = 1_700_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def assessment(overall: int = 25):
+    return {
+        "risk_score": {
+            "overall": overall, "smart_contract": 15, "liquidity": 10,
+            "volatility": 30, "regulatory": 20, "team": 10
+        },
+        "risk_level": "low",
+        "warnings": ["w"],
+        "recommendations": ["r"],
+        "details": {"tvl": "$4.2B"},
+    }
+
+@pytest.fixture
+def redis():
+    fake = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_client, "redis", fake), patch.object(redis_client, "connected", True):
+        yield fake
+
+async def persisted(target: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count()).select_from(RiskAssessment).where(RiskAssessment.target == target)
+        )).scalar_one()
+
+@pytest.mark.asyncio
+async def test_fresh_entries_are_served_and_persisted(redis):
+    """Test a miss computes and persists once, then reads hit until expiry"""
+    await create_tables()
+    cache = RiskAssessmentCache(ttl=300, stale_ttl=600, clock=Clock())
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return assessment()
+
+    first = await cache.get_or_compute("protocol", "fresh-dex", compute, user_id=1)
+    second = await cache.get_or_compute("protocol", "fresh-dex", compute, user_id=1)
+
+    assert len(calls) == 1
+    assert second == first
+    assert first["expires_at"] == first["created_at"] + 300
+    assert await persisted("fresh-dex") == 1
+    assert 300 < await redis.ttl(cache.key("protocol", "fresh-dex")) <= 900
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_stale_entries_refresh_in_background(redis):
+    """Test an expired entry is returned at once while one refresh runs"""
+    await create_tables()
+    clock = Clock()
+    cache = RiskAssessmentCache(ttl=300, stale_ttl=600, clock=clock)
+    release = asyncio.Event()
+    versions = iter([assessment(25), assessment(40)])
+
+    async def compute():
+        if cache.misses and cache.stale_hits:
+            await release.wait()
+        return next(versions)
+
+    original = await cache.get_or_compute("protocol", "stale-dex", compute, user_id=1)
+    clock.now += 301
+
+    stale = await asyncio.gather(*(
+        cache.get_or_compute("protocol", "stale-dex", compute, user_id=1) for _ in range(5)
+    ))
+    assert all(record == original for record in stale)
+    assert cache.stats()["refreshing"] == 1
+
+    release.set()
+    await asyncio.gather(*cache._refreshing.values())
+    refreshed = await cache.get_or_compute("protocol", "stale-dex", compute, user_id=1)
+    assert refreshed["risk_score"]["overall"] == 40
+    assert refreshed["expires_at"] == clock.now + 300
+    # The refresh replaced the stale row rather than adding one
+    assert await persisted("stale-dex") == 1
+
+@pytest.mark.asyncio
+async def test_refresh_only_replaces_the_refreshing_users_rows(redis):
+    """Test one user's refresh keeps other users' persisted assessments"""
+    await create_tables()
+    clock = Clock()
+    cache = RiskAssessmentCache(ttl=300, stale_ttl=600, clock=clock)
+
+    async def compute():
+        return assessment()
+
+    await cache.get_or_compute("protocol", "shared-dex", compute, user_id=1)
+    await redis.flushall()
+    clock.now += 901
+    await cache.get_or_compute("protocol", "shared-dex", compute, user_id=2)
+    await redis.flushall()
+    clock.now += 901
+    await cache.get_or_compute("protocol", "shared-dex", compute, user_id=2)
+
+    async with AsyncSessionLocal() as db:
+        owners = (await db.execute(
+            select(RiskAssessment.user_id).where(RiskAssessment.target == "shared-dex")
+        )).scalars().all()
+    assert sorted(owners) == [1, 2]
+
+@pytest.mark.asyncio
+async def test_database_answers_when_redis_loses_the_entry(redis):
+    """Test persisted rows are served (and re-warm Redis) after a flush"""
+    await create_tables()
+    clock = Clock()
+    cache = RiskAssessmentCache(ttl=300, stale_ttl=600, clock=clock)
+
+    async def compute():
+        return assessment()
+
+    original = await cache.get_or_compute("token", "0xdb", compute, user_id=1)
+    await redis.flushall()
+
+    async def fail():
+        raise AssertionError("should be served from the database")
+
+    clock.now += 10
+    restored = await cache.get_or_compute("token", "0xdb", fail, user_id=1)
+    assert restored["assessment_id"] == original["assessment_id"]
+    assert restored["expires_at"] == pytest.approx(original["expires_at"])
+    assert await redis.exists(cache.key("token", "0xdb"))
+
+    # Past the stale window nothing is served and it is computed again
+    await redis.flushall()
+    clock.now += 300 + 600
+    recomputed = await cache.get_or_compute("token", "0xdb", compute, user_id=1)
+    assert recomputed["assessment_id"] != original["assessment_id"]
+
+@pytest.mark.asyncio
+async def test_assess_endpoint_reuses_cached_assessment(redis):
+    """Test repeated /risk/assess calls return the same assessment"""
+    await create_tables()
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: type("User", (), {"id": 1})()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        first = (await client.post("/api/v1/risk/assess", json={"type": "protocol", "protocol": "Curve"})).json()
+        second = (await client.post("/api/v1/risk/assess", json={"type": "protocol", "protocol": "curve"})).json()
+
+    assert first["assessment_id"] == second["assessment_id"]
+    assert first["expires_at"] > first["created_at"]
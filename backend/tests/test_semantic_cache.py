@@ -0,0 +1,96 @@
+import pytest
+
+from app.services.llm_usage import LLMUsageMeter
+from app.services.semantic_cache import SemanticIndex, normalize_concept
+
+@pytest.mark.parametrize("concept", [
+    "Liquidity Pool",
+    "liquidity pools",
+    "What is a liquidity pool?",
+    "How does a liquidity pool work?",
+    "  LIQUIDITY   pools! "
+])
+def test_normalize_concept_variants(concept):
+    """Test that phrasings of the same concept share one key"""
+    assert normalize_concept(concept) == "liquidity pool"
+
+def test_normalize_concept_keeps_distinct_concepts():
+    """Test that normalization does not merge different concepts"""
+    assert normalize_concept("impermanent loss") == "impermanent loss"
+    assert normalize_concept("liquid staking") != normalize_concept("liquidity staking")
+    assert normalize_concept("the") == "the"
+
+def test_semantic_index_matches_near_duplicates():
+    """Test nearest-neighbour reuse above the threshold only"""
+    index = SemanticIndex(threshold=0.85)
+    scope = ("beginner", True)
+    index.add(scope, "smart contract audit")
+    index.add(scope, "flash loan")
+    
+    neighbour, similarity = index.nearest(scope, "smart contracts audit")
+    assert neighbour == "smart contract audit"
+    assert similarity >= 0.85
+    
+    assert index.nearest(scope, "uniswap") is None
+    assert index.nearest(("advanced", True), "flash loan") is None
+    assert index.stats()["hits"] == 1
+
+def test_semantic_index_requires_same_word_count():
+    """Test that a narrower concept does not reuse a broader answer"""
+    index = SemanticIndex(threshold=0.85)
+    index.add("scope", "liquidity pool")
+    
+    assert index.nearest("scope", "liquidity pool fee") is None
+
+def test_semantic_index_discard_and_maxsize():
+    """Test that discarded and evicted concepts are no longer matched"""
+    index = SemanticIndex(threshold=0.85, maxsize=1)
+    index.add("scope", "smart contract audit")
+    index.discard("scope", "smart contract audit")
+    assert index.nearest("scope", "smart contracts audit") is None
+    
+    index.add("scope", "smart contract audit")
+    index.add("scope", "flash loan")
+    assert index.nearest("scope", "smart contracts audit") is None
+    assert index.stats()["size"] == 1
+
+def test_semantic_index_embeds_each_concept_once():
+    """Test lookups embed only the query, across stacked and newly added concepts"""
+    index = SemanticIndex(threshold=0.85, stack_batch=4)
+    transform = index.vectorizer.transform
+    embedded = []
+    index.vectorizer.transform = lambda concepts: embedded.extend(concepts) or transform(concepts)
+    concepts = ["smart contract audit", "flash loan", "impermanent loss", "yield farming",
+                "liquid staking", "governance token"]
+    for concept in concepts:
+        index.add("scope", concept)
+    index.discard("scope", "flash loan")
+    
+    # The first four were stacked together, the last two are still pending
+    assert index.nearest("scope", "smart contracts audit")[0] == "smart contract audit"
+    assert index.nearest("scope", "governance tokens")[0] == "governance token"
+    assert index.nearest("scope", "flash loans") is None
+    assert embedded == concepts + ["smart contracts audit", "governance tokens", "flash loans"]
+
+def test_llm_usage_meter_window():
+    """Test spend accounting over a rolling window"""
+    now = [0.0]
+    meter = LLMUsageMeter(
+        prompt_cost_per_1k=1.0,
+        completion_cost_per_1k=2.0,
+        window=3600,
+        clock=lambda: now[0]
+    )
+    meter.record(1000, 500)
+    now[0] = 1800
+    meter.record(2000, 0)
+    
+    stats = meter.stats()
+    assert stats["calls"] == 2
+    assert stats["cost_usd"] == pytest.approx(4.0)
+    
+    now[0] = 3700
+    stats = meter.stats()
+    assert stats["calls"] == 1
+    assert stats["cost_usd"] == pytest.approx(2.0)
+    assert stats["total_cost_usd"] == pytest.approx(4.0)
@@ -0,0 +1,153 @@
+import pytest
+import math
+import time
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from unittest.mock import MagicMock, patch
+
+from app.api.v1.api import api_router
+from app.core.deps import get_current_user
+from app.services import simulation_engine as engine_module
+from app.services.simulation_engine import MonteCarloEngine, relative_volatility, request_seed, summarize
+
+def normal_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+RUNS = {
+    "swap": lambda engine, seed: engine.swap("ETH", "USDC", 1.0, 0.5, seed),
+    "lend": lambda engine, seed: engine.lend("USDC", 1000.0, seed),
+    "borrow": lambda engine, seed: engine.borrow("USDC", "ETH", 1000.0, seed),
+    "stake": lambda engine, seed: engine.stake("ETH", 2.0, seed),
+    "provide_liquidity": lambda engine, seed: engine.provide_liquidity("ETH", "USDC", 1.0, seed),
+}
+
+@pytest.mark.parametrize("kind", RUNS)
+def test_seeded_runs_are_reproducible_and_fast(kind):
+    """Test 100k paths per type are deterministic per seed and quick"""
+    engine = MonteCarloEngine(paths=100_000, horizon_days=30)
+    run = RUNS[kind]
+    first = run(engine, 42)
+
+    started = time.perf_counter()
+    again = run(engine, 42)
+    elapsed = time.perf_counter() - started
+
+    assert again == first
+    assert run(engine, 43)["outcome"] != first["outcome"]
+    assert first["paths"] == 100_000 and first["seed"] == 42
+    # ~50ms is the target; leave headroom for slow CI machines
+    assert elapsed < 0.25
+
+def test_borrow_paths_fit_the_latency_budget():
+    """Test the path-based borrow run, the heaviest type, stays near the ~50ms target"""
+    engine = MonteCarloEngine(paths=100_000, horizon_days=30)
+    engine.borrow("USDC", "ETH", 1000.0, seed=1)
+    timings = []
+    for seed in range(5):
+        started = time.perf_counter()
+        engine.borrow("USDC", "ETH", 1000.0, seed=seed)
+        timings.append(time.perf_counter() - started)
+    # Measured ~25ms; the median keeps one slow run on CI from failing it
+    assert sorted(timings)[2] < 0.1
+
+def test_summarize_matches_numpy_percentiles():
+    """Test the single-sort percentiles equal np.percentile"""
+    values = np.random.default_rng(0).lognormal(size=10_001)
+    summary = summarize(values, decimals=12)
+    expected = np.percentile(values, (5, 25, 50, 75, 95))
+    assert [summary[f"p{p}"] for p in (5, 25, 50, 75, 95)] == pytest.approx(expected)
+
+def test_swap_that_always_reverts_has_an_empty_summary():
+    """Test a slippage floor no path reaches gives None percentiles rather than a missing key"""
+    outcome = MonteCarloEngine(paths=1_000, horizon_days=30).swap("ETH", "USDC", 1.0, -50.0, 7)
+    assert outcome["revert_probability"] == 1.0
+    assert outcome["outcome"]["p50"] is None and outcome["outcome"]["mean"] is None
+
+def test_liquidation_probability_matches_barrier_formula():
+    """Test the Brownian-bridge check against the closed-form GBM hitting probability"""
+    engine = MonteCarloEngine(paths=200_000, horizon_days=30)
+    with patch.dict(engine_module.BASE_APY, {"borrow": 1e-9}):
+        result = engine.borrow("USDC", "ETH", 1000.0, seed=7, ltv=0.7)
+
+    sigma = relative_volatility("ETH", "USDC")
+    years = 30 / 365
+    barrier = -math.log(0.825 / 0.7)
+    drift = -0.5 * sigma ** 2
+    spread = sigma * math.sqrt(years)
+    expected = (
+        normal_cdf((barrier - drift * years) / spread)
+        + math.exp(2 * drift * barrier / sigma ** 2) * normal_cdf((barrier + drift * years) / spread)
+    )
+    assert result["liquidation_probability"] == pytest.approx(expected, abs=0.01)
+
+def test_outcomes_respond_to_risk_inputs():
+    """Test liquidation, revert and impermanent-loss behaviour"""
+    engine = MonteCarloEngine(paths=20_000, horizon_days=30)
+
+    assert engine.borrow("USDC", "USDT", 1000.0, seed=1)["liquidation_probability"] == 0.0
+    safe = engine.borrow("USDC", "ETH", 1000.0, seed=1, ltv=0.4)["liquidation_probability"]
+    risky = engine.borrow("USDC", "ETH", 1000.0, seed=1, ltv=0.75)["liquidation_probability"]
+    assert safe < risky
+
+    tight = engine.swap("ETH", "USDC", 1.0, 0.0, seed=1)
+    loose = engine.swap("ETH", "USDC", 1.0, 1.0, seed=1)
+    assert tight["revert_probability"] == pytest.approx(0.5, abs=0.02)
+    assert loose["revert_probability"] < 0.01
+
+    liquidity = engine.provide_liquidity("ETH", "USDC", 1.0, seed=1)
+    assert liquidity["impermanent_loss_pct"]["p95"] <= 0
+    assert liquidity["deposit_usd"] == 3700.0
+
+    assert request_seed("swap", "uniswap", "ETH") == request_seed("swap", "uniswap", "eth")
+
+@pytest.mark.asyncio
+async def test_run_endpoint_reports_outcomes():
+    """Test /simulations/run returns Monte Carlo outcomes and rejects unknown tokens"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=1, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    request = {"type": "borrow", "protocol": "aave", "token_a": "USDC", "token_b": "ETH", "amount": "1000", "seed": 5}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        first = (await client.post("/api/v1/simulations/run", json=request)).json()
+        second = (await client.post("/api/v1/simulations/run", json=request)).json()
+        unknown = await client.post("/api/v1/simulations/run", json={**request, "token_b": "SHIB"})
+        missing = await client.post("/api/v1/simulations/run", json={**request, "type": "swap", "token_b": None})
+
+    assert first["outcomes"] == second["outcomes"]
+    assert first["outcomes"]["seed"] == 5
+    assert 0 < first["outcomes"]["liquidation_probability"] < 1
+    assert "chance of liquidation" in first["warnings"][0]
+    assert unknown.status_code == 400 and missing.status_code == 400
+
+@pytest.mark.asyncio
+async def test_run_endpoint_rejects_bad_amounts():
+    """Test bad amounts and slippage get a 400 and are never queued"""
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(id=1, wallet_address="0xabc")
+
+    requests = [
+        {"type": "swap", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC"},
+        {"type": "provide_liquidity", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC"},
+        {"type": "borrow", "protocol": "aave", "token_a": "USDC", "token_b": "ETH"},
+    ]
+    with patch("app.api.v1.endpoints.simulations.simulation_writer") as writer:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            for request in requests:
+                for amount in ("inf", "nan", "0", "-5", "abc"):
+                    response = await client.post("/api/v1/simulations/run", json={**request, "amount": amount})
+                    assert response.status_code == 400, (request["type"], amount)
+            slippage = [
+                await client.post("/api/v1/simulations/run", json={**requests[0], "amount": "1", "slippage": value})
+                for value in (-1, 100, 1e9)
+            ]
+            collateral = await client.post(
+                "/api/v1/simulations/run", json={**requests[2], "amount": "100", "collateral": {"ETH": "inf"}}
+            )
+
+    assert [response.status_code for response in slippage] == [400, 400, 400]
+    assert collateral.status_code == 400
+    writer.submit.assert_not_called()
@@ -0,0 +1,208 @@
+import pytest
+import asyncio
+import uuid
+import httpx
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.api.v1.api import api_router
+from app.core.database import AsyncSessionLocal, create_tables
+from app.core.deps import get_current_user, get_current_user_for_update
+from app.models.simulation import Simulation, UserSimulation
+from app.models.user import User
+from app.services.simulation_store import SimulationRunWriter
+
+def run_record(user_id: int, started_at: datetime, simulation_type: str = "swap", protocol: str = "uniswap"):
+    return {
+        "run_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "type": simulation_type,
+        "protocol": protocol,
+        "input_params": {"type": simulation_type, "protocol": protocol, "token_a": "ETH", "amount": "1"},
+        "result_data": {"expected_output": "1850 USDC"},
+        "status": "success",
+        "execution_time": 12,
+        "gas_estimate": "150000",
+        "started_at": started_at,
+        "completed_at": started_at + timedelta(milliseconds=12),
+    }
+
+async def count_runs(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(
+            select(func.count()).select_from(UserSimulation).where(UserSimulation.user_id == user_id)
+        )).scalar_one()
+
+@pytest.mark.asyncio
+async def test_runs_are_written_in_batches():
+    """Test buffered runs are inserted batch_size at a time and catalog rows are reused"""
+    await create_tables()
+    writer = SimulationRunWriter(batch_size=3, flush_interval=60, max_pending=100)
+    now = datetime.utcnow()
+    records = [run_record(8_101, now + timedelta(seconds=i), protocol="testdex") for i in range(7)]
+    for record in records:
+        assert writer.submit(record)
+
+    assert writer.get_pending(records[0]["run_id"]) is records[0]
+    assert await count_runs(8_101) == 0
+
+    await writer.flush()
+    assert writer.stats() == {"pending": 0, "written": 7, "batches": 3, "dropped": 0, "failed": 0, "retried": 0}
+    assert await count_runs(8_101) == 7
+    async with AsyncSessionLocal() as db:
+        catalog = (await db.execute(select(Simulation).where(Simulation.protocol == "testdex"))).scalars().all()
+    assert [(row.type, row.simulation_id) for row in catalog] == [("swap", "testdex-swap")]
+
+@pytest.mark.asyncio
+async def test_flush_applies_progress_and_invalidates_users():
+    """Test each user's runs are counted in the batch commit and their snapshot dropped after it"""
+    await create_tables()
+    wallet_address = f"0x{uuid.uuid4().hex[:40]}"
+    async with AsyncSessionLocal() as db:
+        user = User(wallet_address=wallet_address, total_simulations_completed=1)
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    writer = SimulationRunWriter(batch_size=100, flush_interval=60, max_pending=100)
+    now = datetime.utcnow()
+    for _ in range(3):
+        writer.submit(run_record(user_id, now))
+    writer.submit(run_record(8_104, now))
+
+    with patch("app.services.simulation_store.invalidate_cached_user", AsyncMock()) as invalidate:
+        await writer.flush()
+
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+    assert user.total_simulations_completed == 4
+    assert user.overall_progress_percentage > 0
+    invalidate.assert_awaited_once_with(wallet_address)
+
+@pytest.mark.asyncio
+async def test_failed_commits_are_retried_without_losing_runs():
+    """Test a transient failure is retried and a bad run is isolated from its batch"""
+    await create_tables()
+    writer = SimulationRunWriter(batch_size=3, flush_interval=60, max_pending=100, retry_attempts=2, retry_backoff=0.01)
+    now = datetime.utcnow()
+    records = [run_record(8_105, now) for _ in range(4)]
+    # Not JSON serialisable, so this run can never be written
+    records[1]["result_data"] = {"expected_output": object()}
+    for record in records:
+        writer.submit(record)
+
+    failures = [RuntimeError("database restarting")]
+    def flaky_session():
+        if failures:
+            raise failures.pop()
+        return AsyncSessionLocal()
+
+    with patch("app.services.simulation_store.AsyncSessionLocal", flaky_session):
+        await writer.flush()
+
+    # The first batch failed twice, then was written run by run
+    assert writer.stats() == {"pending": 0, "written": 3, "batches": 3, "dropped": 0, "failed": 1, "retried": 3}
+    assert await count_runs(8_105) == 3
+
+@pytest.mark.asyncio
+async def test_runs_stay_buffered_while_the_database_is_down():
+    """Test an outage longer than the retries keeps every run pending for the next flush"""
+    await create_tables()
+    writer = SimulationRunWriter(batch_size=2, flush_interval=60, max_pending=100, retry_attempts=2, retry_backoff=0.01)
+    now = datetime.utcnow()
+    records = [run_record(8_106, now) for _ in range(3)]
+    for record in records:
+        writer.submit(record)
+
+    def unreachable():
+        raise OperationalError("SELECT 1", {}, ConnectionRefusedError("connection refused"))
+
+    with patch("app.services.simulation_store.AsyncSessionLocal", unreachable):
+        await writer.flush()
+
+    assert writer.stats()["pending"] == 3 and writer.stats()["failed"] == 0
+    assert all(writer.get_pending(record["run_id"]) is record for record in records)
+    assert await count_runs(8_106) == 0
+
+    # The database is back by the next interval
+    await writer.flush()
+    assert writer.stats()["pending"] == 0 and writer.stats()["written"] == 3
+    assert await count_runs(8_106) == 3
+
+@pytest.mark.asyncio
+async def test_background_loop_flushes_full_batches_and_stragglers():
+    """Test run() writes a full batch at once and a partial one after the interval"""
+    await create_tables()
+    writer = SimulationRunWriter(batch_size=2, flush_interval=0.2, max_pending=3)
+    task = asyncio.create_task(writer.run())
+    now = datetime.utcnow()
+    try:
+        writer.submit(run_record(8_102, now))
+        writer.submit(run_record(8_102, now))
+        await asyncio.sleep(0.1)
+        assert await count_runs(8_102) == 2
+
+        writer.submit(run_record(8_102, now))
+        await asyncio.sleep(0.05)
+        assert await count_runs(8_102) == 2
+        await asyncio.sleep(0.3)
+        assert await count_runs(8_102) == 3
+    finally:
+        task.cancel()
+        await writer.close()
+
+    # A full buffer drops new runs instead of growing
+    for _ in range(4):
+        writer.submit(run_record(8_102, now))
+    assert writer.dropped == 1
+    await writer.close()
+    assert await count_runs(8_102) == 6
+
+@pytest.mark.asyncio
+async def test_history_and_details_read_persisted_runs():
+    """Test details are served before and after the write, and history pages by keyset"""
+    await create_tables()
+    writer = SimulationRunWriter(batch_size=100, flush_interval=60, max_pending=100)
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    user = MagicMock(id=8_103, wallet_address="0xabc")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_for_update] = lambda: user
+
+    request = {"type": "swap", "protocol": "uniswap", "token_a": "ETH", "token_b": "USDC", "amount": "1"}
+    with patch("app.api.v1.endpoints.simulations.simulation_writer", writer):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            run_ids = []
+            for amount in ("1", "2", "3", "4", "5"):
+                result = (await client.post("/api/v1/simulations/run", json={**request, "amount": amount})).json()
+                run_ids.append(result["simulation_id"])
+
+            pending = (await client.get(f"/api/v1/simulations/{run_ids[0]}")).json()
+            assert pending["input"]["amount"] == "1"
+            assert (await client.get("/api/v1/simulations/history")).json()["simulations"] == []
+
+            await writer.flush()
+            stored = (await client.get(f"/api/v1/simulations/{run_ids[0]}")).json()
+            assert stored["output"]["simulation_id"] == run_ids[0]
+            assert stored["estimated_gas"] == "150000"
+            assert stored["execution_time_ms"] >= 0
+
+            seen, cursor = [], None
+            while True:
+                params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+                page = (await client.get("/api/v1/simulations/history", params=params)).json()
+                seen.extend(item["simulation_id"] for item in page["simulations"])
+                cursor = page["next_cursor"]
+                assert page["has_more"] == (cursor is not None)
+                if cursor is None:
+                    break
+
+            bad_cursor = await client.get("/api/v1/simulations/history", params={"cursor": "not-a-cursor"})
+            missing = await client.get(f"/api/v1/simulations/{uuid.uuid4()}")
+
+    assert seen == run_ids[::-1]
+    assert bad_cursor.status_code == 400
+    assert missing.status_code == 404
@@ -0,0 +1,132 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+
+from app.services.single_flight import SingleFlight
+
+class FakeLockRedis:
+    """In-memory stand-in for RedisClient's lock helpers"""
+    
+    def __init__(self):
+        self.locks = {}
+    
+    async def acquire_lock(self, key, token, ttl):
+        if key in self.locks:
+            return False
+        self.locks[key] = token
+        return True
+    
+    async def release_lock(self, key, token):
+        if self.locks.get(key) == token:
+            del self.locks[key]
+            return True
+        return False
+    
+    async def exists(self, key):
+        return key in self.locks
+
+@pytest.fixture
+def fake_redis():
+    redis = FakeLockRedis()
+    with patch('app.services.single_flight.redis_client', redis):
+        yield redis
+
+async def _no_cache():
+    return None
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call(fake_redis):
+    """Test that N identical in-flight calls run once and all get the result"""
+    flight = SingleFlight("test", lock_ttl=10, wait_timeout=1)
+    calls = 0
+    
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"text": "shared"}
+    
+    results = await asyncio.gather(*[flight.do("k", call, _no_cache) for _ in range(100)])
+    
+    assert calls == 1
+    assert all(r == {"text": "shared"} for r in results)
+    assert flight.stats()["local_joins"] == 99
+    assert fake_redis.locks == {}
+    
+    await flight.do("k", call, _no_cache)
+    assert calls == 2  # nothing in flight any more, so it runs again
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller(fake_redis):
+    """Test that a failing call fails all of its waiters and releases the lock"""
+    flight = SingleFlight("test", lock_ttl=10, wait_timeout=1)
+    
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+    
+    results = await asyncio.gather(
+        *[flight.do("k", call, _no_cache) for _ in range(3)],
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert fake_redis.locks == {}
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call(fake_redis):
+    """Test that the caller who started the call can go away safely"""
+    flight = SingleFlight("test", lock_ttl=10, wait_timeout=1)
+    
+    async def call():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    first = asyncio.create_task(flight.do("k", call, _no_cache))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("k", call, _no_cache))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    
+    assert await second == "done"
+
+@pytest.mark.asyncio
+async def test_waits_for_result_from_another_worker(fake_redis):
+    """Test that a held Redis lock makes this worker reuse the cached result"""
+    flight = SingleFlight("test", lock_ttl=10, wait_timeout=1, poll_interval=0.01)
+    fake_redis.locks["singleflight:test:k"] = "other-worker"
+    cache = {}
+    
+    async def call():
+        raise AssertionError("should not be called")
+    
+    async def cached():
+        return cache.get("k")
+    
+    async def other_worker_finishes():
+        await asyncio.sleep(0.05)
+        cache["k"] = "from other worker"
+        del fake_redis.locks["singleflight:test:k"]
+    
+    result, _ = await asyncio.gather(flight.do("k", call, cached), other_worker_finishes())
+    
+    assert result == "from other worker"
+    assert flight.stats()["remote_joins"] == 1
+
+@pytest.mark.asyncio
+async def test_runs_call_when_other_worker_gives_up(fake_redis):
+    """Test the fallback when the lock holder releases without a result"""
+    flight = SingleFlight("test", lock_ttl=10, wait_timeout=1, poll_interval=0.01)
+    fake_redis.locks["singleflight:test:k"] = "other-worker"
+    
+    async def call():
+        return "computed here"
+    
+    async def other_worker_fails():
+        await asyncio.sleep(0.03)
+        del fake_redis.locks["singleflight:test:k"]
+    
+    result, _ = await asyncio.gather(flight.do("k", call, _no_cache), other_worker_fails())
+    
+    assert result == "computed here"
+    assert flight.stats()["leaders"] == 1
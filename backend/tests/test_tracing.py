@@ -0,0 +1,125 @@
+import pytest
+import httpx
+import structlog
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.redis import RedisClient
+from app.core.tracing import InMemorySpanExporter, Tracer, TracingMiddleware, tracer
+from app.services.ai_service import AIService
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracer.add_exporter(exporter)
+    yield exporter
+    tracer.remove_exporter(exporter)
+
+def spans_by_name(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+def test_nested_spans_share_trace_and_record_errors(exporter):
+    """Test parent links, the root breakdown and exception status"""
+    with tracer.span("root") as root:
+        with tracer.span("child", {"step": 1}):
+            pass
+        with pytest.raises(ValueError):
+            with tracer.span("child"):
+                raise ValueError("boom")
+
+    child, failed, finished_root = exporter.get_finished_spans()
+    assert finished_root is root
+    assert {child.trace_id, failed.trace_id} == {root.trace_id}
+    assert child.parent_span_id == failed.parent_span_id == root.span_id
+    assert child.attributes == {"step": 1} and child.status == "UNSET"
+    assert failed.status == "ERROR" and failed.attributes["exception.type"] == "ValueError"
+    assert root.breakdown["child"]["count"] == 2
+    assert tracer.current_span() is None
+
+def test_traceparent_continues_caller_trace_and_disabled_tracer():
+    """Test W3C trace context propagation and the no-op path"""
+    local = Tracer()
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+    with local.span("incoming", traceparent=traceparent) as span:
+        pass
+    assert span.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert span.parent_span_id == "00f067aa0ba902b7"
+
+    disabled = Tracer(enabled=False)
+    with disabled.span("ignored") as span:
+        span.set_attribute("key", "value")
+    assert not span.is_recording
+
+@pytest.mark.asyncio
+async def test_redis_commands_are_traced(exporter):
+    """Test every RedisClient round trip gets its own span"""
+    client = RedisClient()
+    client.redis = Mock(get=AsyncMock(return_value="1"), set=AsyncMock(side_effect=ConnectionError("down")))
+    client.connected = True
+
+    with tracer.span("request"):
+        assert await client.get("key") == "1"
+        assert await client.set("key", "2") is False
+
+    spans = spans_by_name(exporter)
+    assert spans["redis.GET"].parent_span_id == spans["request"].span_id
+    assert spans["redis.GET"].attributes["db.operation"] == "GET"
+    assert spans["redis.SET"].status == "ERROR"
+
+@pytest.mark.asyncio
+async def test_llm_completion_is_traced_with_token_counts(exporter):
+    """Test AIService completions record model and token usage"""
+    with patch.object(settings, "GROQ_API_KEY", "test-key"):
+        service = AIService()
+    completion = Mock()
+    completion.choices = [Mock()]
+    completion.choices[0].message.content = "answer"
+    completion.usage = Mock(prompt_tokens=12, completion_tokens=3)
+
+    try:
+        with patch.object(service.client.chat.completions, "create", new_callable=AsyncMock, return_value=completion):
+            assert await service._complete("system", "prompt") == "answer"
+    finally:
+        await service.close()
+
+    span = spans_by_name(exporter)["llm.complete"]
+    assert span.attributes["llm.model"] == service.model
+    assert span.attributes["llm.prompt_tokens"] == 12
+    assert span.attributes["llm.completion_tokens"] == 3
+
+@pytest.mark.asyncio
+async def test_request_spans_are_correlated_by_request_id(exporter):
+    """Test one request's DB and Redis spans share its trace, and logs see its id"""
+    client = RedisClient()
+    client.redis = Mock(get=AsyncMock(return_value=None))
+    client.connected = True
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+        await db.execute(text("SELECT 1"))
+        await client.get(f"item:{item_id}")
+        return structlog.contextvars.get_contextvars()
+
+    app.add_middleware(TracingMiddleware)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as http:
+        response = await http.get("/items/1", headers={"X-Request-ID": "req-123"})
+        generated = await http.get("/items/2")
+
+    assert response.headers["x-request-id"] == "req-123"
+    assert response.json()["request_id"] == "req-123"
+    assert generated.headers["x-request-id"] not in ("", "req-123")
+
+    spans = [span for span in exporter.get_finished_spans() if span.trace_id == response.json()["trace_id"]]
+    by_name = {span.name: span for span in spans}
+    root = by_name["GET /items/{item_id}"]
+    assert {"db.session", "db.query", "redis.GET"} <= set(by_name)
+    assert by_name["redis.GET"].parent_span_id == root.span_id
+    assert root.attributes["http.status_code"] == 200
+    assert set(root.breakdown) == {"db.session", "db.query", "redis.GET"}
+    assert structlog.contextvars.get_contextvars() == {}